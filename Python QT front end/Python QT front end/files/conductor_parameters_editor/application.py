@@ -4,8 +4,6 @@ import logging
 
 from qtpy import QtWidgets
 
-import pandas as pd
-
 import dlr_simutils_common.application
 
 from .gui import input_parameters_widget
@@ -14,6 +12,10 @@ from .gui import progress_dialog
 from dlr_simutils_common.gui import conductor_info_widget
 
 from .core.simulation import processor
+from .core import scenarios
+from .core import numerical_setup
+from .core import rating_table
+from .core import surrogate
 
 from qtpy.QtCore import Signal
 
@@ -40,9 +42,25 @@ class ApplicationWindow(dlr_simutils_common.application.ApplicationWindow):
 
         self.processingProgressDialog = None  # Instantiated and cleared on-demand
 
+        # Narrow the thermal current bisection range using the heat balance estimate
+        self._processor.adaptiveBrackets = True
+
+        # Tuned numerical setups of conductor families (see core.numerical_setup)
+        try:
+            self._processor.numericalProfile = numerical_setup.load_profile(
+                numerical_setup.profile_path(self._conductorDefinitionsPath)
+            )
+        except Exception:
+            logger.warning("Failed to load numerical profile; using default numerical setup!", exc_info=True)
+
         # Export filename
         self.exportFilename = None
 
+        # Instant ampacity estimators: pre-computed rating tables (see core.rating_table) and surrogate models (see
+        # core.surrogate), loaded on demand
+        self._ratingTablesPath = self._conductorDefinitionsPath.parent / "rating-tables"
+        self._ampacityEstimators = {}
+
         # *** UI ***
         self.setWindowTitle("Conductor parameters editor")
 
@@ -62,7 +80,12 @@ class ApplicationWindow(dlr_simutils_common.application.ApplicationWindow):
         ampacity_label.setMaximumSize(70, 50)
         self.ampacity_edit = QtWidgets.QLineEdit()
 
+        scenarios_button = QtWidgets.QPushButton("Run scenario batch...")
+        scenarios_button.setMaximumSize(300, 50)
+        scenarios_button.clicked.connect(self.onRunScenarioBatch)
+
         Hbox_layout.addWidget(run_button)
+        Hbox_layout.addWidget(scenarios_button)
         Hbox_layout.addWidget(ampacity_label)
         Hbox_layout.addWidget(self.ampacity_edit)
         layout.addWidget(buttons_widget)  # Add buttons_widget to the main layout
@@ -209,7 +232,12 @@ class ApplicationWindow(dlr_simutils_common.application.ApplicationWindow):
         if not lineParameters:
             return
 
-
+        # Show instant estimate while the simulation is running
+        self.showAmpacityEstimate(
+            self._conductorType,
+            lineParameters,
+            self.changedWeatherConditionsWidget.weatherParameters,
+        )
 
         # Collect input parameters
         initialWeatherConditions = self.initialWeatherConditionsWidget.weatherParameters
@@ -237,6 +265,123 @@ class ApplicationWindow(dlr_simutils_common.application.ApplicationWindow):
             QtWidgets.QMessageBox.warning(self, "Error", f"Failed to start processing:\n{e}")
             return
 
+    def onRunScenarioBatch(self):
+        # Retrieve conductor parameters
+        lineParameters = copy.copy(
+            self._conductorDefinitions.get(self._conductorType)
+        )
+        if not lineParameters:
+            return
+
+        # Scenario table (see core.scenarios); parameters that it does not specify are taken from the input widgets
+        filename, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self,
+            "Load scenarios",
+            "",
+            "Scenario tables (*.csv *.xlsx);;All files (*.*)",
+        )
+        if not filename:
+            return
+
+        baseScenario = scenarios.make_scenario(
+            self.initialWeatherConditionsWidget.weatherParameters,
+            self.initialLineLoadWidget.lineLoad,
+            self.changedWeatherConditionsWidget.weatherParameters,
+            self.changedLineLoadWidget.lineLoad,
+        )
+        try:
+            scenarioList = scenarios.load_scenarios(filename, baseScenario)
+        except Exception as e:
+            logger.error("Failed to load scenarios!", exc_info=True)
+            QtWidgets.QMessageBox.warning(self, "Error", f"Failed to load scenarios:\n{e}")
+            return
+
+        # Run processing; the scenarios are distributed over the worker pool
+        try:
+            self._processor.processData(
+                self._conductorType,
+                lineParameters,
+                None,
+                None,
+                None,
+                None,
+                os.cpu_count(),
+                scenarios=scenarioList,
+            )
+        except Exception as e:
+            logger.error("Failed to start processing!", exc_info=True)
+            QtWidgets.QMessageBox.warning(self, "Error", f"Failed to start processing:\n{e}")
+            return
+
+    def _getAmpacityEstimator(self, conductorType):
+        # Prefer the rating table; fall back to the surrogate model
+        if conductorType in self._ampacityEstimators:
+            return self._ampacityEstimators[conductorType]
+
+        estimator = None
+        try:
+            estimator = rating_table.RatingTable.open_for_conductor(self._ratingTablesPath, conductorType)
+        except FileNotFoundError:
+            filename = surrogate.surrogate_path(self._conductorDefinitionsPath, conductorType)
+            if filename.is_file():
+                try:
+                    estimator = surrogate.Surrogate.load(filename)
+                except Exception:
+                    logger.warning("Failed to load surrogate model for %s!", conductorType, exc_info=True)
+        except Exception:
+            logger.warning("Failed to open rating table for %s!", conductorType, exc_info=True)
+
+        self._ampacityEstimators[conductorType] = estimator
+        return estimator
+
+    def showAmpacityEstimate(self, conductorType, lineParameters, weatherConditions):
+        estimator = self._getAmpacityEstimator(conductorType)
+        if estimator is None:
+            return
+
+        # Rating tables and surrogates are computed for line orientation 0, i.e., with wind direction relative to the
+        # line
+        weather = {
+            key: weatherConditions[key]
+            for key in ('ambient_temperature', 'wind_speed', 'solar_irradiance')
+        }
+        weather['wind_direction'] = weatherConditions['wind_direction'] - lineParameters.get('line_orientation', 0.0)
+
+        try:
+            if isinstance(estimator, rating_table.RatingTable):
+                ampacity, outOfRange = estimator.query(
+                    line_altitude=self.spinBoxAltitude.value(),
+                    critical_temperature=self.spinBoxCriticalTemperature.value(),
+                    **weather,
+                )
+                source = "rating table"
+            else:
+                # Like multi_fidelity.SurrogateScreening: the surrogate only applies to the line altitude and critical
+                # temperature it was trained for
+                settings = {
+                    'line_altitude': self.spinBoxAltitude.value(),
+                    'critical_temperature': self.spinBoxCriticalTemperature.value(),
+                }
+                mismatched = [key for key, value in settings.items() if value != estimator.metadata[key]]
+                if mismatched:
+                    logger.info(
+                        "Surrogate model of %s was trained for a different %s; no estimate.",
+                        conductorType, ' and '.join(mismatched),
+                    )
+                    self.ampacity_edit.setText("")
+                    return
+                predictions, outOfRange = estimator.predict(**weather)
+                ampacity = predictions['steady_ampacity']
+                source = "surrogate model"
+        except Exception:
+            logger.warning("Failed to estimate ampacity for %s!", conductorType, exc_info=True)
+            return
+
+        text = f"{float(ampacity):.0f} A ({source})"
+        if outOfRange:
+            text += ", out of range"
+        self.ampacity_edit.setText(text)
+
     def onProcessingStarted(self, numAllSamples):
         logger.debug("Processing started!")
 
@@ -287,12 +432,14 @@ class ApplicationWindow(dlr_simutils_common.application.ApplicationWindow):
             )
 
     def onExportResults(self):
-        # Check that we have results
-        results = self._processor.results
-        if not results or not results[0].succeeded:
+        # Check that we have results; results of all scenarios are exported as a single table
+        if not self._processor.results:
+            QtWidgets.QMessageBox.information(self, "No results", "No results to export!")
+            return
+        df = self._processor.resultsDataset()
+        if df.empty:
             QtWidgets.QMessageBox.information(self, "No results", "No results to export!")
             return
-        results = results[0]
 
         # Obtain filename
         filename, _ = QtWidgets.QFileDialog.getSaveFileName(
@@ -311,24 +458,6 @@ class ApplicationWindow(dlr_simutils_common.application.ApplicationWindow):
 
         self.exportFilename = filename  # Store for reuse
 
-        # Create pandas dataframe. The results are represented in a dataclasses.dataclass structure that contains lists,
-        # so we cannot directly pass it to pandas' dataframe.
-        EXPORT_COLUMNS = (
-            "time",
-            "ambient_temperature",
-            "wind_speed",
-            "wind_direction",
-            "relative_humidity",
-            "solar_irradiance",
-            "air_pressure",
-            "rain_rate",
-            "line_load",
-            "ampacity",
-            "time_to_overheat",
-            "conductor_core_temperature",
-        )
-
-        df = pd.DataFrame({key: getattr(results, key) for key in EXPORT_COLUMNS})
         try:
             df.to_csv(filename, index=False)
         except Exception as e:
@@ -2,4 +2,7 @@
 from dlr_simutils_common.core import (  # noqa: F401
     conductor_definition,
     diter,
+    numerical_setup,
+    rating_table,
+    surrogate,
 )
@@ -0,0 +1,97 @@
+import itertools
+
+import pandas as pd
+
+
+WEATHER_KEYS = (
+    'ambient_temperature',
+    'wind_speed',
+    'wind_direction',
+    'air_pressure',
+    'rain_rate',
+    'relative_humidity',
+    'solar_irradiance',
+)
+
+# Scenario parameters, as columns of scenario tables: initial and changed weather and line load
+SCENARIO_COLUMNS = tuple(
+    f"{stage}_{key}"
+    for stage in ('initial', 'changed')
+    for key in WEATHER_KEYS + ('line_load',)
+)
+
+
+def make_scenario(initialWeather, initialLineLoad, changedWeather, changedLineLoad, name=None):
+    """
+    Step-change scenario: the line is in equilibrium with the initial
+    weather and line load, which change at time 0.
+    """
+    return {
+        'name': name,
+        'initial_weather': {key: float(initialWeather[key]) for key in WEATHER_KEYS},
+        'initial_line_load': float(initialLineLoad),
+        'changed_weather': {key: float(changedWeather[key]) for key in WEATHER_KEYS},
+        'changed_line_load': float(changedLineLoad),
+    }
+
+
+def scenario_parameters(scenario):
+    # Flat representation of the scenario (see SCENARIO_COLUMNS)
+    parameters = {}
+    for stage in ('initial', 'changed'):
+        for key in WEATHER_KEYS:
+            parameters[f"{stage}_{key}"] = scenario[f"{stage}_weather"][key]
+        parameters[f"{stage}_line_load"] = scenario[f"{stage}_line_load"]
+    return parameters
+
+
+def _scenario_from_parameters(base, parameters, name):
+    values = {**scenario_parameters(base), **parameters}
+    return make_scenario(
+        {key: values[f"initial_{key}"] for key in WEATHER_KEYS},
+        values['initial_line_load'],
+        {key: values[f"changed_{key}"] for key in WEATHER_KEYS},
+        values['changed_line_load'],
+        name=name,
+    )
+
+
+def scenario_table(base, table):
+    """
+    Scenarios from a table (DataFrame) with one row per scenario and any
+    subset of SCENARIO_COLUMNS (plus an optional 'name' column); missing
+    parameters are taken from the `base` scenario.
+    """
+    unknown = set(table.columns) - set(SCENARIO_COLUMNS) - {'name'}
+    if unknown:
+        raise ValueError(f"Unknown scenario parameter(s): {', '.join(sorted(unknown))}!")
+
+    scenarios = []
+    for index, row in enumerate(table.to_dict('records')):
+        name = row.pop('name', None)
+        scenarios.append(_scenario_from_parameters(base, row, str(name) if name is not None else f"#{index + 1}"))
+    return scenarios
+
+
+def load_scenarios(filename, base):
+    """Load scenarios from a CSV or Excel file (see scenario_table())."""
+    filename = str(filename)
+    try:
+        if filename.lower().endswith(('.xlsx', '.xls')):
+            table = pd.read_excel(filename)
+        else:
+            table = pd.read_csv(filename)
+    except Exception as e:
+        raise RuntimeError(f"Failed to load scenarios from '{filename}': {e}!")
+    return scenario_table(base, table)
+
+
+def scenario_grid(base, **axes):
+    """
+    Scenarios over the full grid of the given parameter values (keyword
+    arguments named after SCENARIO_COLUMNS, e.g., changed_line_load=[...]);
+    the remaining parameters are taken from the `base` scenario.
+    """
+    names = list(axes)
+    table = pd.DataFrame(list(itertools.product(*axes.values())), columns=names)
+    return scenario_table(base, table)
@@ -1,14 +1,42 @@
-import collections
+import pandas as pd
 
 from .worker import SimulationWorker
+from .. import scenarios as scenarios_module
 
 from dlr_simutils_common.core.simulation.processor import SimulationProcessor as SimulationProcessorBase
+from dlr_simutils_common.core import scenario_builder
 
 
 class SimulationProcessor(SimulationProcessorBase):
+    # Columns of the exported results, per scenario
+    EXPORT_COLUMNS = (
+        "time",
+        "ambient_temperature",
+        "wind_speed",
+        "wind_direction",
+        "relative_humidity",
+        "solar_irradiance",
+        "air_pressure",
+        "rain_rate",
+        "line_load",
+        "ampacity",
+        "time_to_overheat",
+        "conductor_core_temperature",
+    )
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        # Rows at which ratings are evaluated (see dlr_simutils_common.core.simulation.schedule); the outputs in
+        # between would be interpolated, so the displayed and exported results are evaluated at every row by default
+        self.ratingSchedule = None
+
+        # Timeline of the step-change scenarios [s]: initial conditions for `preDuration`, changed conditions for
+        # `duration`; the half-minute time step matches the simulation's discrete time step
+        self.timeStep = 30
+        self.duration = 3600
+        self.preDuration = 300
+
     def _initializeProcessing(
         self,
         conductorType,
@@ -17,19 +45,28 @@ class SimulationProcessor(SimulationProcessorBase):
         initialLineLoad,
         changedWeatherData,
         changedLineLoad,
-        numWorkers
+        numWorkers,
+        scenarios=None,
     ):
-        # Initialize numSamples and numWorkers - required by parent!
-        self.numSamples = 1
-        self.numWorkers = min(self.numSamples, numWorkers)
+        # Without explicit scenarios (see core.scenarios), the single scenario is given by the initial and changed
+        # weather and line load
+        if scenarios is None:
+            scenarios = [
+                scenarios_module.make_scenario(initialWeatherData, initialLineLoad, changedWeatherData, changedLineLoad)
+            ]
+
+        # Initialize numSamples and numWorkers - required by parent! Keep at least one worker, so that the processing
+        # finishes (and signals so) even without scenarios.
+        self.numSamples = len(scenarios)
+        self.numWorkers = max(1, min(self.numSamples, numWorkers))
 
         # Store parametrization for sample generation
         self.conductorType = conductorType
         self.lineData = lineData
-        self.initialWeatherData = initialWeatherData
-        self.initialLineLoad = initialLineLoad
-        self.changedWeatherData = changedWeatherData
-        self.changedLineLoad = changedLineLoad
+        self.scenarios = list(scenarios)
+
+        # Results in the order of scenarios (`results` holds them in order of completion)
+        self.scenarioResults = [None] * len(self.scenarios)
 
         # Reset sample counter
         self.numGeneratedSamples = 0
@@ -42,39 +79,51 @@ class SimulationProcessor(SimulationProcessorBase):
         if self.numGeneratedSamples >= self.numSamples:
             return None
 
-        # There is, in fact, only one sample...
+        scenarioIndex = self.numGeneratedSamples
+        scenario = self.scenarios[scenarioIndex]
         self.numGeneratedSamples += 1
 
-        # ... so it makes more sense to crate input data series here than in the worker.
-        dataSeries = collections.defaultdict(lambda: [])
-
-        STEP = 30  # half-minute time step (which also matches the simulation's discrete time step)
-        DURATION = 3600  # 1 hour
-        PRE_DURATION = 300  # 5 min
-        WEATHER_KEYS = (
-            'ambient_temperature',
-            'wind_speed',
-            'wind_direction',
-            'air_pressure',
-            'rain_rate',
-            'relative_humidity',
-            'solar_irradiance',
+        # Input data series of the scenario (columnar arrays, see dlr_simutils_common.core.scenario_builder)
+        dataSeries = scenario_builder.step_change_data_series(
+            scenario['initial_weather'],
+            scenario['initial_line_load'],
+            scenario['changed_weather'],
+            scenario['changed_line_load'],
+            duration=self.duration,
+            pre_duration=self.preDuration,
+            time_step=self.timeStep,
         )
 
-        # -M * STEP, .., 0
-        for timestamp in range(-PRE_DURATION, STEP, STEP):
-            dataSeries["time"].append(timestamp)
-            for key in WEATHER_KEYS:
-                dataSeries[key].append(self.initialWeatherData[key])
-            dataSeries["line_load"].append(self.initialLineLoad)
-
-        # STEP, .., N * STEP
-        for timestamp in range(STEP, DURATION + STEP, STEP):
-            dataSeries["time"].append(timestamp)
-            for key in WEATHER_KEYS:
-                dataSeries[key].append(self.changedWeatherData[key])
-            dataSeries["line_load"].append(self.changedLineLoad)
-
-        dataSeries.default_factory = None
-
-        return self.lineData, dataSeries
+        return scenarioIndex, self.lineData, dataSeries
+
+    def onWorkerResultReady(self, result):
+        if result.scenario_index is not None:
+            self.scenarioResults[result.scenario_index] = result
+        super().onWorkerResultReady(result)
+
+    def resultsDataset(self):
+        """
+        Results of all successfully processed scenarios as a single table
+        (DataFrame) in long format: one row per scenario and time point,
+        with the scenario index, name and parameters, followed by
+        EXPORT_COLUMNS. With a single scenario, only EXPORT_COLUMNS are
+        included.
+        """
+        frames = []
+        for index, (scenario, result) in enumerate(zip(self.scenarios, self.scenarioResults)):
+            if result is None or not result.succeeded:
+                continue
+            frame = pd.DataFrame({key: getattr(result, key) for key in self.EXPORT_COLUMNS})
+            if len(self.scenarios) > 1:
+                parameters = {
+                    'scenario': index,
+                    'scenario_name': scenario['name'],
+                    **scenarios_module.scenario_parameters(scenario),
+                }
+                for position, (key, value) in enumerate(parameters.items()):
+                    frame.insert(position, key, value)
+            frames.append(frame)
+
+        if not frames:
+            return pd.DataFrame(columns=self.EXPORT_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
@@ -5,6 +5,9 @@ from dlr_simutils_common.core.simulation.result import SimulationResult as Simul
 
 @dataclasses.dataclass
 class SimulationResult(SimulationResultBase):
+    # Index of the scenario (see SimulationProcessor)
+    scenario_index: int = None
+
     # Timestamps
     time: list = None
 
@@ -13,6 +16,9 @@ class SimulationResult(SimulationResultBase):
     time_to_overheat: list = None
     conductor_core_temperature: list = None
 
+    # Flags of evaluated (as opposed to interpolated) outputs; None if all were evaluated
+    evaluated: list = None
+
     # Input data
     ambient_temperature: list = None
     wind_speed: list = None
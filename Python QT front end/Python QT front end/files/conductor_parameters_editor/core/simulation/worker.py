@@ -1,6 +1,7 @@
 from .result import SimulationResult
 
 from dlr_simutils_common.core.simulation.worker import SimulationWorker as SimulationWorkerBase
+from dlr_simutils_common.core.simulation import schedule
 from dlr_simutils_common.core import diter
 
 
@@ -17,17 +18,28 @@ class SimulationWorker(SimulationWorkerBase):
         'line_load',
     )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self._scenarioIndex = None
+
+    def _processSample(self, sample):
+        # Remember the scenario, so that error results can be attributed to it as well
+        self._scenarioIndex, _, _ = sample
+        return super()._processSample(sample)
+
     def _createResultForErrorMessage(self, error_message):
         return SimulationResult(
             succeeded=False,
             error_message=error_message,
+            scenario_index=self._scenarioIndex,
         )
 
     def _initializeSimulationResult(self, sample):
-        result = SimulationResult()
+        result = SimulationResult(scenario_index=self._scenarioIndex)
 
         # Copy input data series to the result structure
-        _, dataSeries = sample
+        _, _, dataSeries = sample
 
         for key in self.DATA_SERIES_KEYS:
             setattr(result, key, dataSeries[key])
@@ -35,13 +47,16 @@ class SimulationWorker(SimulationWorkerBase):
         return result
 
     def _createDiterSimulationRequest(self, sample, pbd_file):
-        lineData, dataSeries = sample
+        _, lineData, dataSeries = sample
+
+        # Pass only the rows at which ratings are needed (and input breakpoints) to the solver
+        dataSeries, self._ratingIndices = schedule.compact_data_series(dataSeries, self.processor.ratingSchedule)
 
         # Convert data series into measurement entries list
         measurementEntries = []
         for idx in range(len(dataSeries["time"])):
             measurementEntries.append({
-                key: dataSeries[key][idx]
+                key: float(dataSeries[key][idx])
                 for key in self.DATA_SERIES_KEYS
             })
 
@@ -50,11 +65,23 @@ class SimulationWorker(SimulationWorkerBase):
             lineData,
             measurementEntries,
             presimulation_time=7200,
+            numerical_setup=diter.numerical_setup_for_conductor(self.processor.numericalProfile, lineData),
+            current_bracket=self._currentBracket(lineData, dataSeries),
         )
         diter.write_request_to_protobuffer(pbd_file, request)
 
     def _finalizeSimulationResult(self, result, csv_data):
-        # Retrieve result series. Explicitly convert to python floats
-        result.ampacity = [float(value) for value in csv_data[' I_th [A]']]
-        result.conductor_core_temperature = [float(value) for value in csv_data[' T_core [deg C]']]
-        result.time_to_overheat = [float(value) for value in csv_data[' time_to_overheat [s]']]
+        # Retrieve result series, mapped back to the full timeline. Explicitly convert to python floats
+        outputs = {
+            'ampacity': csv_data[' I_th [A]'],
+            'conductor_core_temperature': csv_data[' T_core [deg C]'],
+            'time_to_overheat': csv_data[' time_to_overheat [s]'],
+        }
+        for key, values in outputs.items():
+            values = schedule.expand_output(values, self._ratingIndices, result.time)
+            setattr(result, key, [float(value) for value in values])
+
+        if len(self._ratingIndices) < len(result.time):
+            result.evaluated = [False] * len(result.time)
+            for index in self._ratingIndices:
+                result.evaluated[index] = True
@@ -0,0 +1,293 @@
+import sys
+import json
+import pathlib
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+from . import conductor_definition, time_series
+from .simulation import batch
+import dlr_simutils_common.core.logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Conductor parameters calibrated by default: surface properties, radial conductivity and convection coefficients
+DEFAULT_PARAMETERS = (
+    'emissivity',
+    'absorptivity',
+    'effective_radial_thermal_conductivity',
+    'nusselt_base_1',
+    'nusselt_base_2',
+    'nusselt_base_3',
+    'nusselt_exp_1',
+    'nusselt_exp_2',
+    'nusselt_exp_3',
+)
+
+
+def latin_hypercube(num_points, num_parameters, rng):
+    # Latin hypercube design on the unit hypercube
+    strata = np.stack([rng.permutation(num_points) for _ in range(num_parameters)], axis=1)
+    return (strata + rng.random((num_points, num_parameters))) / num_points
+
+
+class Calibration:
+    """
+    Calibration of conductor parameters against measured conductor
+    temperatures, by differential evolution (DE/rand/1/bin with dithered
+    mutation factor).
+
+    The cost of a candidate is the RMS difference between the simulated
+    core temperature and the measurement, over the rows with a finite
+    measurement after the spin-up time (during which the simulated state
+    settles from its initial condition). Candidates are constrained to
+    the parameter bounds (see conductor_definition.load_parameter_bounds()),
+    intersected with the physically plausible ranges (see
+    conductor_definition.physical_parameter_bounds()).
+
+    Each generation is evaluated as one parallel batch. Costs are cached
+    per candidate, so that repeated candidates (e.g., at the bounds) are
+    simulated once.
+    """
+
+    def __init__(
+        self,
+        line_data,
+        bounds,
+        data_series,
+        measured_temperature,
+        parameters=DEFAULT_PARAMETERS,
+        spin_up=3600,
+        num_workers=None,
+        request_options=None,
+    ):
+        self.line_data = line_data
+        bounds = conductor_definition.physical_parameter_bounds(bounds)
+        self.parameters = [parameter for parameter in parameters if parameter in bounds]
+        self.lower_bounds = np.array([bounds[parameter][0] for parameter in self.parameters])
+        self.upper_bounds = np.array([bounds[parameter][1] for parameter in self.parameters])
+        self.data_series = data_series
+        self.num_workers = num_workers
+        self.request_options = request_options or {}
+
+        skipped = set(parameters) - set(self.parameters)
+        if skipped:
+            logger.warning("No bounds for parameters %s; skipping them!", ', '.join(sorted(skipped)))
+
+        time = np.asarray(data_series['time'], dtype=float)
+        self.measured_temperature = np.asarray(measured_temperature, dtype=float)
+        if self.measured_temperature.shape != time.shape:
+            raise ValueError("Measured temperatures do not match the data series!")
+        self.cost_mask = np.isfinite(self.measured_temperature) & (time >= time[0] + spin_up)
+        if not self.cost_mask.any():
+            raise ValueError("No measured temperatures after the spin-up time!")
+
+        self._costs = {}  # candidate (tuple of parameter values) -> cost
+
+    def to_unit(self, values):
+        # Parameters with equal bounds map to 0
+        width = self.upper_bounds - self.lower_bounds
+        offset = np.asarray(values, dtype=float) - self.lower_bounds
+        return np.where(width > 0, offset / np.where(width > 0, width, 1), 0)
+
+    def from_unit(self, unit_points):
+        return self.lower_bounds + np.asarray(unit_points) * (self.upper_bounds - self.lower_bounds)
+
+    def candidate_line_data(self, values):
+        line_data = dict(self.line_data)
+        line_data.update(zip(self.parameters, np.asarray(values, dtype=float).tolist()))
+        return line_data
+
+    def cost(self, result):
+        # RMS temperature difference [deg C]; infinite for failed simulations
+        if result is None or not result.succeeded:
+            return np.inf
+        difference = result.conductor_core_temperature[self.cost_mask] - self.measured_temperature[self.cost_mask]
+        return float(np.sqrt(np.mean(np.square(difference))))
+
+    def evaluate(self, unit_points):
+        """Costs of the candidates given on the unit hypercube; new candidates are simulated as one parallel batch."""
+        keys = [tuple(values) for values in self.from_unit(unit_points).tolist()]
+        pending = [key for key in dict.fromkeys(keys) if key not in self._costs]
+        if pending:
+            samples = [
+                batch.SimulationSample(
+                    line_data=self.candidate_line_data(key),
+                    data_series=self.data_series,
+                    request_options=self.request_options,
+                )
+                for key in pending
+            ]
+            results = batch.run_batch(samples, self.num_workers)
+            for key, result in zip(pending, results):
+                self._costs[key] = self.cost(result)
+
+            numFailures = sum(1 for key in pending if np.isinf(self._costs[key]))
+            if numFailures:
+                logger.warning("%d out of %d evaluations failed!", numFailures, len(pending))
+
+        return np.array([self._costs[key] for key in keys])
+
+    def run(
+        self,
+        population_size=None,
+        max_generations=50,
+        crossover_rate=0.9,
+        mutation_factor=(0.5, 1.0),
+        tolerance=0.01,
+        seed=None,
+    ):
+        """
+        Run the differential evolution. The initial population is a Latin
+        hypercube design plus the current parameters of the conductor
+        definition (clipped to the bounds); `population_size` defaults to
+        five times the number of parameters. The mutation factor is drawn
+        uniformly from the `mutation_factor` range per generation. Stops
+        after `max_generations`, or once the costs of the population are
+        within `tolerance` [deg C] of each other.
+
+        Returns (best parameters dictionary, best cost, history DataFrame
+        with the best and mean cost per generation).
+        """
+        rng = np.random.default_rng(seed)
+        numParameters = len(self.parameters)
+        size = max(4, population_size or 5 * numParameters)
+
+        population = latin_hypercube(size, numParameters, rng)
+        current = [self.line_data.get(parameter) for parameter in self.parameters]
+        if all(value is not None for value in current):
+            population[0] = np.clip(self.to_unit(current), 0, 1)
+        costs = self.evaluate(population)
+
+        history = []
+        for generation in range(max_generations + 1):
+            finite = np.isfinite(costs)
+            best = int(np.argmin(costs))
+            history.append({
+                'generation': generation,
+                'best_cost': costs[best],
+                'mean_cost': float(np.mean(costs[finite])) if finite.any() else np.inf,
+                'evaluations': len(self._costs),
+            })
+            logger.info(
+                "Generation %d: best cost %.3f deg C (%d evaluations).", generation, costs[best], len(self._costs),
+            )
+
+            if finite.all() and costs.max() - costs.min() <= tolerance:
+                logger.info("Population converged.")
+                break
+            if generation == max_generations:
+                break
+
+            # Mutation: each member gets a base vector and a difference of two further distinct members
+            others = np.array([
+                rng.choice(np.delete(np.arange(size), index), 3, replace=False)
+                for index in range(size)
+            ])
+            factor = rng.uniform(*mutation_factor)
+            mutants = population[others[:, 0]] + factor * (population[others[:, 1]] - population[others[:, 2]])
+
+            # Binomial crossover, with at least one parameter from the mutant
+            crossover = rng.random((size, numParameters)) < crossover_rate
+            crossover[np.arange(size), rng.integers(numParameters, size=size)] = True
+            trials = np.clip(np.where(crossover, mutants, population), 0, 1)
+
+            trialCosts = self.evaluate(trials)
+            improved = trialCosts <= costs
+            population[improved] = trials[improved]
+            costs[improved] = trialCosts[improved]
+
+        best = int(np.argmin(costs))
+        if not np.isfinite(costs[best]):
+            raise RuntimeError("Calibration failed: no candidate could be simulated!")
+
+        parameters = dict(zip(self.parameters, self.from_unit(population[best]).tolist()))
+        return parameters, float(costs[best]), pd.DataFrame(history)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate conductor parameters against measured temperatures.")
+    dlr_simutils_common.core.logging.parser_add_logging_arguments(parser)
+    parser.add_argument('conductor', type=pathlib.Path, help="Conductor definition (JSON) file.")
+    parser.add_argument('measurements', type=pathlib.Path,
+                        help="Weather, load and temperature time series (CSV, Parquet or Excel) with columns named "
+                             "after the data series keys; missing weather is taken from the standard weather.")
+    parser.add_argument('--temperature-column', default='conductor_temperature',
+                        help="Column with the measured conductor temperature [deg C].")
+    parser.add_argument('--bounds', type=pathlib.Path, default=None, help="Parameter bounds file (defaults to "
+                        f"{conductor_definition.PARAMETER_BOUNDS_FILENAME} next to the conductor definition).")
+    parser.add_argument('--parameter', action='append', default=None,
+                        help="Parameter to calibrate (repeatable; default: surface, radial and convection parameters).")
+    parser.add_argument('--range', type=conductor_definition.parse_parameter_range, action='append', default=None,
+                        help="Search range of a parameter, e.g., emissivity=0.5:0.9 (repeatable; narrows the bounds).")
+    parser.add_argument('--line-altitude', type=float, default=300.0, help="Line altitude [m].")
+    parser.add_argument('--line-orientation', type=float, default=0.0, help="Line orientation [deg].")
+    parser.add_argument('--time-step', type=float, default=30, help="Time step of the data series [s].")
+    parser.add_argument('--spin-up', type=float, default=3600, help="Initial period excluded from the cost [s].")
+    parser.add_argument('--population-size', type=int, default=None, help="Population size.")
+    parser.add_argument('--generations', type=int, default=50, help="Maximum number of generations.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of parallel simulations.")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed.")
+    parser.add_argument('--output', '-o', type=pathlib.Path, default=None,
+                        help="Output file of the calibrated conductor definition (JSON).")
+    args = parser.parse_args()
+
+    dlr_simutils_common.core.logging.setup_logging(args, default_level='INFO')
+
+    with open(args.conductor, 'r') as fp:
+        definition = json.load(fp)
+    line_data = dict(definition)
+    line_data['line_altitude'] = args.line_altitude
+    line_data['line_orientation'] = args.line_orientation
+
+    bounds = conductor_definition.physical_parameter_bounds(
+        conductor_definition.load_parameter_bounds(
+            args.bounds or args.conductor.parent / conductor_definition.PARAMETER_BOUNDS_FILENAME
+        ),
+        dict(args.range or []),
+    )
+
+    available = time_series.column_names(args.measurements)
+    columns = {key: key for key in batch.DATA_SERIES_KEYS[1:] if key in available}
+    columns[args.temperature_column] = 'measured_temperature'
+    data_series = time_series.load_time_series(
+        args.measurements,
+        columns,
+        time_step=args.time_step,
+        defaults=batch.STANDARD_WEATHER,
+        extra_keys=('measured_temperature',),
+    )
+    measured_temperature = data_series.pop('measured_temperature')
+
+    calibration = Calibration(
+        line_data,
+        bounds,
+        data_series,
+        measured_temperature,
+        parameters=args.parameter or DEFAULT_PARAMETERS,
+        spin_up=args.spin_up,
+        num_workers=args.workers,
+    )
+    parameters, cost, history = calibration.run(
+        population_size=args.population_size,
+        max_generations=args.generations,
+        seed=args.seed,
+    )
+
+    logger.info("Calibrated parameters (RMS error %.3f deg C):", cost)
+    for name, value in parameters.items():
+        logger.info("  %s: %g (was %s)", name, value, definition.get(name))
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump({**definition, **parameters}, fp, indent=4)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
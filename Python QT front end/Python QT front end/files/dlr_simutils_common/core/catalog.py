@@ -0,0 +1,246 @@
+import sys
+import json
+import shutil
+import hashlib
+import pathlib
+import argparse
+import logging
+
+import numpy as np
+
+from . import conductor_definition, rating_table, static_rating
+from .simulation import batch
+import dlr_simutils_common.core.logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Definition fields that do not affect simulations (identification and computed outputs)
+NON_SIMULATION_FIELDS = ('name', 'standard', 'aliases', 'static_thermal_limit')
+
+
+def _hash(content):
+    text = json.dumps(content, sort_keys=True, default=batch._json_default)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def definition_hash(definition):
+    # Content hash of the simulation-relevant fields of a conductor definition
+    return _hash({key: value for key, value in definition.items() if key not in NON_SIMULATION_FIELDS})
+
+
+def load_manifest(filename):
+    # Manifest: {"tasks": {task: {"setup": setup hash, "conductors": {name: definition hash}}}}
+    filename = pathlib.Path(filename)
+    if not filename.is_file():
+        return {'tasks': {}}
+    try:
+        with open(filename, 'r') as fp:
+            return json.load(fp)
+    except Exception as e:
+        raise RuntimeError(f"Failed to load catalog manifest from '{filename}': {e}!")
+
+
+def save_manifest(filename, manifest):
+    with open(filename, 'w') as fp:
+        json.dump(manifest, fp, indent=4)
+
+
+class StaticThermalLimitTask:
+    """Static thermal limits, written into the definition files (see core.static_rating)."""
+
+    name = 'static_thermal_limit'
+
+    def __init__(self, num_workers=None):
+        self.num_workers = num_workers
+
+    def setup(self):
+        return {
+            'weather': batch.STANDARD_WEATHER,
+            'line_altitude': static_rating.STANDARD_LINE_ALTITUDE,
+            'horizon': static_rating.STEADY_STATE_HORIZON,
+        }
+
+    def output_exists(self, definition):
+        return definition.get('static_thermal_limit') is not None
+
+    def run(self, groups):
+        limits = static_rating.compute_static_thermal_limits([group[0][1] for group in groups], self.num_workers)
+
+        done = []
+        for group, limit in zip(groups, limits):
+            if limit is None:
+                logger.warning("Failed to compute static thermal limit of %s!", group[0][1]['name'])
+                continue
+            for filename, definition in group:
+                definition['static_thermal_limit'] = round(limit, 1)
+                with open(filename, 'w') as fp:
+                    json.dump(definition, fp, indent=4)
+                done.append(definition['name'])
+        return done
+
+
+class RatingTableTask:
+    """Rating tables (see core.rating_table), one per conductor in `tables_dir`."""
+
+    name = 'rating_table'
+
+    def __init__(self, tables_dir, axis_values=None, num_workers=None):
+        self.tables_dir = pathlib.Path(tables_dir)
+        self.axis_values = axis_values
+        self.num_workers = num_workers
+
+    def setup(self):
+        axis_values = {**rating_table.DEFAULT_AXIS_VALUES, **(self.axis_values or {})}
+        return {
+            'axis_values': {
+                key: sorted(np.asarray(axis_values[key], dtype=float).tolist())
+                for key in rating_table.AXES
+            },
+            'fixed_weather': rating_table.DEFAULT_FIXED_WEATHER,
+        }
+
+    def output_exists(self, definition):
+        data_file, metadata_file, *_ = rating_table.table_paths(
+            self.tables_dir,
+            rating_table.table_name(definition['name']),
+        )
+        return data_file.is_file() and metadata_file.is_file()
+
+    def run(self, groups):
+        done = []
+        for group in groups:
+            _, definition = group[0]
+            try:
+                data_file = rating_table.generate_rating_table(
+                    definition,
+                    self.tables_dir,
+                    axis_values=self.axis_values,
+                    num_workers=self.num_workers,
+                )
+            except Exception:
+                logger.warning("Failed to generate rating table of %s!", definition['name'], exc_info=True)
+                continue
+            done.append(definition['name'])
+
+            # Conductors with identical content get a copy of the table
+            with open(data_file.with_suffix('.json'), 'r') as fp:
+                metadata = json.load(fp)
+            for _, other in group[1:]:
+                otherData, otherMetadata, *_ = rating_table.table_paths(
+                    self.tables_dir,
+                    rating_table.table_name(other['name']),
+                )
+                shutil.copyfile(data_file, otherData)
+                with open(otherMetadata, 'w') as fp:
+                    json.dump({**metadata, 'conductor': other['name']}, fp, indent=4)
+                done.append(other['name'])
+        return done
+
+
+def stale_conductors(files, task, manifest, force=False):
+    """
+    Group the definitions (dictionary file name -> definition) whose
+    outputs of the task are out of date: new conductors, conductors with
+    changed simulation-relevant fields, conductors with missing outputs,
+    or all of them if the task setup changed. Stale conductors with
+    identical content are grouped, so that each group is computed once.
+    Aliases are part of the definition and never cause additional work.
+    Returns a list of groups (lists of (file name, definition)).
+    """
+    entry = manifest['tasks'].get(task.name, {})
+    setupChanged = force or entry.get('setup') != _hash(task.setup())
+    known = entry.get('conductors', {})
+
+    groups = {}
+    for filename, definition in files.items():
+        contentHash = definition_hash(definition)
+        if (
+            not setupChanged
+            and known.get(definition['name']) == contentHash
+            and task.output_exists(definition)
+        ):
+            continue
+        groups.setdefault(contentHash, []).append((filename, definition))
+    return list(groups.values())
+
+
+def rerun(data_dir, tasks, force=False, dry_run=False):
+    """
+    Recompute the outputs of the tasks for stale conductors only (see
+    stale_conductors()), and record the content hashes of the updated
+    conductors in the manifest. Returns a dictionary mapping task names to
+    the names of the (re)computed conductors.
+    """
+    data_dir = pathlib.Path(data_dir)
+    manifest_file = data_dir / conductor_definition.CATALOG_MANIFEST_FILENAME
+    manifest = load_manifest(manifest_file)
+
+    # The manifest is keyed by conductor name; duplicated names are skipped (with a warning)
+    files = conductor_definition.load_definition_files(data_dir, skip_duplicates=True)
+    names = [definition['name'] for definition in files.values()]
+
+    updated = {}
+    for task in tasks:
+        groups = stale_conductors(files, task, manifest, force)
+        numStale = sum(len(group) for group in groups)
+        logger.info(
+            "Task %s: %d out of %d conductors are stale (%d distinct).",
+            task.name, numStale, len(files), len(groups),
+        )
+        if dry_run:
+            updated[task.name] = [definition['name'] for group in groups for _, definition in group]
+            continue
+
+        setupHash = _hash(task.setup())
+        entry = manifest['tasks'].get(task.name, {})
+        if entry.get('setup') != setupHash:
+            entry = {'setup': setupHash, 'conductors': {}}
+
+        done = set(task.run(groups)) if groups else set()
+        hashes = {definition['name']: definition_hash(definition) for definition in files.values()}
+        entry['conductors'] = {
+            name: (hashes[name] if name in done else entry['conductors'].get(name))
+            for name in names
+            if name in done or name in entry['conductors']
+        }
+        manifest['tasks'][task.name] = entry
+        save_manifest(manifest_file, manifest)
+
+        updated[task.name] = sorted(done)
+
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute catalog outputs for changed or new conductors only.")
+    dlr_simutils_common.core.logging.parser_add_logging_arguments(parser)
+    parser.add_argument('conductor_dir', type=pathlib.Path, help="Directory with conductor definition (JSON) files.")
+    parser.add_argument('--task', choices=(StaticThermalLimitTask.name, RatingTableTask.name), action='append',
+                        default=None, help="Task to rerun (repeatable; default: static thermal limit only).")
+    parser.add_argument('--tables-dir', type=pathlib.Path, default=pathlib.Path('rating-tables'),
+                        help="Output directory of the rating tables.")
+    parser.add_argument('--force', action='store_true', help="Recompute all conductors.")
+    parser.add_argument('--dry-run', action='store_true', help="Only report the stale conductors.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of parallel simulations.")
+    args = parser.parse_args()
+
+    dlr_simutils_common.core.logging.setup_logging(args, default_level='INFO')
+
+    tasks = []
+    for name in args.task or [StaticThermalLimitTask.name]:
+        if name == StaticThermalLimitTask.name:
+            tasks.append(StaticThermalLimitTask(args.workers))
+        else:
+            tasks.append(RatingTableTask(args.tables_dir, num_workers=args.workers))
+
+    updated = rerun(args.conductor_dir, tasks, force=args.force, dry_run=args.dry_run)
+    for name, conductors in updated.items():
+        logger.info("Task %s: %s", name, ', '.join(conductors) or "nothing to do")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,177 @@
+import sys
+import pathlib
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+from . import utils
+import dlr_simutils_common.core.logging
+
+
+logger = logging.getLogger(__name__)
+
+
+NUM_MONTHS = 12
+NUM_HOURS = 24
+
+# Default histogram bin edges for the weather keys
+DEFAULT_BINS = {
+    'ambient_temperature': np.arange(-40, 50.5, 0.5),  # [deg C]
+    'wind_speed': np.arange(0, 25.25, 0.25),  # [m/s]
+    'wind_direction': np.arange(0, 365, 5),  # [deg]
+    'air_pressure': np.arange(800, 1201, 1),  # [mbar]
+    'rain_rate': np.arange(0, 101, 1),  # [mm/h]
+    'relative_humidity': np.arange(0, 101, 1),  # [%]
+    'solar_irradiance': np.arange(0, 1510, 10),  # [W/m^2]
+}
+
+
+class Climatology:
+    """
+    Per-month, per-hour histograms of weather variables.
+
+    `counts[key]` is an array of shape (12, 24, num_bins), and `bins[key]`
+    the corresponding bin edges.
+    """
+
+    def __init__(self, counts, bins):
+        self.counts = counts
+        self.bins = bins
+
+    @property
+    def variables(self):
+        return list(self.counts.keys())
+
+    def histogram(self, key, month, hour):
+        """Return (hist, bins) for the given variable, month (1-12) and hour (0-23)."""
+        return self.counts[key][month - 1, hour].astype(float), self.bins[key]
+
+    def histograms(self, month, hour, keys=None):
+        """Return dictionary of (hist, bins) tuples, e.g., for ImportanceWeatherSampler.from_histograms()."""
+        return {key: self.histogram(key, month, hour) for key in (keys or self.variables)}
+
+    def cdf(self, key, month, hour):
+        """Return (cdf, bins) to be used with np.interp() for sampling."""
+        hist, bins = self.histogram(key, month, hour)
+        if not hist.any():
+            raise ValueError(f"No data for {key!r} in month {month}, hour {hour}!")
+        return utils.cdf_from_histogram(hist, bins), bins
+
+    def save(self, filename):
+        arrays = {}
+        for key in self.variables:
+            arrays[f"{key}.counts"] = self.counts[key]
+            arrays[f"{key}.bins"] = self.bins[key]
+        np.savez_compressed(filename, **arrays)
+
+    @classmethod
+    def load(cls, filename):
+        counts = {}
+        bins = {}
+        with np.load(filename) as data:
+            for name in data.files:
+                key, kind = name.rsplit('.', 1)
+                if kind == 'counts':
+                    counts[key] = data[name]
+                else:
+                    bins[key] = data[name]
+        return cls(counts, bins)
+
+
+class ClimatologyBuilder:
+    """
+    Builds climatology incrementally from chunks of (arbitrarily long)
+    weather records; memory use depends only on the histogram size.
+
+    Values that are missing or fall outside the bin range are ignored.
+    """
+
+    def __init__(self, bins=None, time_column='time'):
+        bins = bins or DEFAULT_BINS
+        self.bins = {key: np.asarray(edges, dtype=float) for key, edges in bins.items()}
+        self.time_column = time_column
+
+        self.counts = {
+            key: np.zeros(NUM_MONTHS * NUM_HOURS * (len(edges) - 1), dtype=np.int64)
+            for key, edges in self.bins.items()
+        }
+        self.num_records = 0
+
+    def update(self, data):
+        """Update histograms with a DataFrame chunk."""
+        timestamps = pd.to_datetime(data[self.time_column])
+        slot = (timestamps.dt.month.to_numpy() - 1) * NUM_HOURS + timestamps.dt.hour.to_numpy()
+
+        for key, edges in self.bins.items():
+            if key not in data:
+                continue
+
+            num_bins = len(edges) - 1
+            values = data[key].to_numpy(dtype=float)
+
+            # Bin index; the last edge is inclusive
+            index = np.searchsorted(edges, values, side='right') - 1
+            index[values == edges[-1]] = num_bins - 1
+            valid = (index >= 0) & (index < num_bins) & np.isfinite(values)
+
+            self.counts[key] += np.bincount(
+                slot[valid] * num_bins + index[valid],
+                minlength=self.counts[key].size,
+            )
+
+        self.num_records += len(data)
+
+    def update_from_file(self, filename, chunksize=1000000, **read_csv_kwargs):
+        # Read only the columns we need
+        def usecols(column):
+            return column == self.time_column or column in self.bins
+
+        for chunk in pd.read_csv(filename, chunksize=chunksize, usecols=usecols, **read_csv_kwargs):
+            self.update(chunk)
+            logger.debug("Processed %d records from %s...", self.num_records, filename)
+
+    def climatology(self):
+        counts = {
+            key: self.counts[key].reshape(NUM_MONTHS, NUM_HOURS, -1)
+            for key in self.bins
+            if self.counts[key].any()
+        }
+
+        # Store counts in the smallest sufficient unsigned type
+        for key, value in counts.items():
+            dtype = np.uint32 if value.max() <= np.iinfo(np.uint32).max else np.uint64
+            counts[key] = value.astype(dtype)
+
+        return Climatology(counts, {key: self.bins[key] for key in counts})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build per-month, per-hour weather climatology from CSV records.")
+    dlr_simutils_common.core.logging.parser_add_logging_arguments(parser)
+    parser.add_argument('input', nargs='+', type=pathlib.Path, help="Input CSV file(s).")
+    parser.add_argument('--output', '-o', type=pathlib.Path, required=True, help="Output .npz file.")
+    parser.add_argument('--time-column', default='time', help="Name of the timestamp column.")
+    parser.add_argument('--chunk-size', type=int, default=1000000, help="Number of rows read at once.")
+    args = parser.parse_args()
+
+    dlr_simutils_common.core.logging.setup_logging(args)
+
+    builder = ClimatologyBuilder(time_column=args.time_column)
+    for filename in args.input:
+        logger.info("Processing %s...", filename)
+        builder.update_from_file(filename, chunksize=args.chunk_size)
+
+    climatology = builder.climatology()
+    if not climatology.variables:
+        logger.error("No weather data found in input file(s)!")
+        return -1
+
+    climatology.save(args.output)
+    logger.info("Climatology for %s written to %s", ', '.join(climatology.variables), args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,45 @@
+import re
 import json
+import logging
 
 
-def load_conductor_definitions(data_dir):
-    definitions = {}
+logger = logging.getLogger(__name__)
+
+
+# Parameter bounds file, stored next to the conductor definitions (see load_parameter_bounds())
+PARAMETER_BOUNDS_FILENAME = "config_conductor_data_min_max.json"
+
+# Manifest of computed catalog outputs, stored next to the conductor definitions (see core.catalog)
+CATALOG_MANIFEST_FILENAME = "catalog-manifest.json"
+
+# Physically plausible ranges of thermal parameters, for sampling studies (see physical_parameter_bounds()); the
+# bounds file holds the much wider input limits of the editor.
+PHYSICAL_PARAMETER_BOUNDS = {
+    'emissivity': (0.0, 1.0),
+    'absorptivity': (0.0, 1.0),
+    'effective_radial_thermal_conductivity': (0.5, 10.0),  # [W / m K]
+    'skin_effect_factor': (1.0, 1.2),
+    'wetted_factor': (0.0, 1.0),
+    'impinging_factor': (0.0, 1.0),
+    'recovery_factor': (0.0, 1.0),
+    **{f'nusselt_base_{idx}': (0.01, 1.0) for idx in (1, 2, 3)},
+    **{f'nusselt_exp_{idx}': (0.3, 1.0) for idx in (1, 2, 3)},
+}
+
+
+def load_definition_files(data_dir, skip_duplicates=False):
+    """
+    Load the conductor definition files in the directory. Returns a
+    dictionary mapping file names to definitions (without alias copies).
+    With `skip_duplicates`, files whose conductor name is already used by
+    a previous file (in file name order) are skipped with a warning.
+    """
+    files = {}
+    names = {}
+    for filename in sorted(data_dir.glob("*.json")):
+        if filename.name in (PARAMETER_BOUNDS_FILENAME, CATALOG_MANIFEST_FILENAME):
+            continue
 
-    # Load conductor definitions - disallow duplicated primary names
-    for filename in data_dir.glob("*.json"):
         # Load definition from JSON
         try:
             with open(filename, 'r') as fp:
@@ -13,6 +47,21 @@ def load_conductor_definitions(data_dir):
         except Exception as e:
             raise RuntimeError(f"Failed to load conductor definition from '{filename}': {e}!")
 
+        name = definition.get("name")
+        if skip_duplicates and name in names:
+            logger.warning("Conductor %s in '%s' is already defined in '%s'; skipping it!", name, filename, names[name])
+            continue
+        names.setdefault(name, filename)
+        files[filename] = definition
+
+    return files
+
+
+def load_conductor_definitions(data_dir, skip_duplicates=False):
+    definitions = {}
+
+    # Load conductor definitions - disallow duplicated primary names (unless batch tools skip them)
+    for definition in load_definition_files(data_dir, skip_duplicates).values():
         name = definition["name"]
         if name in definitions:
             raise ValueError(f"Duplicated conductor identifier: {name}!")
@@ -24,7 +73,81 @@ def load_conductor_definitions(data_dir):
     for definition in list(definitions.values()):
         for name in definition.get("aliases", []):
             if name in definitions:
+                if skip_duplicates:
+                    logger.warning("Conductor alias %s is already defined; skipping it!", name)
+                    continue
                 raise ValueError(f"Duplicated conductor alias: {name}!")
             definitions[name] = definition
 
     return definitions
+
+
+def _parse_bound(text):
+    # Bounds are given as strings with units, e.g., "0.000035 1/°C"; parse the leading number only.
+    match = re.match(r'\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)', text)
+    if not match:
+        raise ValueError(f"Invalid bound value: {text!r}!")
+    return float(match.group(1))
+
+
+def load_parameter_bounds(filename):
+    """
+    Load the parameter bounds (config_conductor_data_min_max.json) and
+    map them to conductor definition field names. Returns a dictionary
+    mapping field names to (min, max) tuples, in units of the conductor
+    definition files (i.e., specific conductivities in S / m).
+    """
+    try:
+        with open(filename, 'r') as fp:
+            config = json.load(fp)
+    except Exception as e:
+        raise RuntimeError(f"Failed to load parameter bounds from '{filename}': {e}!")
+
+    bounds = {}
+    for section, prefix in (('inner', 'inner_part_'), ('outer', 'outer_part_'), ('common', '')):
+        for name, entry in config[section].items():
+            min_value = _parse_bound(entry["min"])
+            max_value = _parse_bound(entry["max"])
+
+            if name == 'specific_conductivity':
+                min_value *= 1000000.0  # MS / m -> S / m
+                max_value *= 1000000.0
+
+            # Abbreviated names in the configuration file, e.g., "specific_heat_coeff."
+            name = name.replace('coeff.', 'coefficient')
+
+            if name in ('nusselt_base', 'nusselt_exp.'):
+                # Shared bounds for all three Nusselt parameters
+                for idx in (1, 2, 3):
+                    bounds[f"{name.rstrip('.')}_{idx}"] = (min_value, max_value)
+            else:
+                bounds[prefix + name] = (min_value, max_value)
+
+    return bounds
+
+
+def physical_parameter_bounds(bounds, ranges=None):
+    """
+    Intersect parameter bounds (see load_parameter_bounds()) with the
+    physically plausible ranges (PHYSICAL_PARAMETER_BOUNDS) and the
+    optional study ranges (dictionary field name -> (min, max)). Returns
+    a new dictionary; parameters without bounds are left out.
+    """
+    result = {}
+    for name, (min_value, max_value) in bounds.items():
+        for limits in (PHYSICAL_PARAMETER_BOUNDS, ranges or {}):
+            if name in limits:
+                min_value = max(min_value, limits[name][0])
+                max_value = min(max_value, limits[name][1])
+        if min_value > max_value:
+            raise ValueError(f"Empty range of parameter {name}: ({min_value}, {max_value})!")
+        result[name] = (min_value, max_value)
+    return result
+
+
+def parse_parameter_range(text):
+    # Study range of a parameter on the command line, e.g., "emissivity=0.5:0.9"
+    match = re.fullmatch(r'\s*(\w+)\s*=\s*([^:]+):(.+)', text)
+    if not match:
+        raise ValueError(f"Invalid parameter range: {text!r}!")
+    return match.group(1), (float(match.group(2)), float(match.group(3)))
@@ -20,6 +20,39 @@ else:
     diter_exe = pathlib.Path(diter_exe)
 
 
+# Default numerical setup of the simulation request; see generate_simulation_request() and core.numerical_setup
+DEFAULT_NUMERICAL_SETUP = {
+    'num_nodes': 100,  # number of nodes in discretization of the main simulation
+    'time_step': 10,  # time step of the main simulation [s]
+    'inner_num_nodes': None,  # number of nodes in inner simulations (None: same as main simulation)
+    'inner_time_step': None,  # time step of inner simulations [s] (None: same as main simulation)
+    'inner_simulation_duration': 3600,  # time horizon of the thermal current [s]
+    'time_to_overheat_duration': 3600,  # maximal duration of time-to-overheat simulations [s]
+    'max_iterations': 30,  # maximal number of bisection iterations
+    'current_precision': 1,  # bisection precision [A]
+}
+
+# Default bisection range of the thermal current [A]
+DEFAULT_CURRENT_BRACKET = (0, 2500)
+
+
+def numerical_setup_for_conductor(profile, line_data):
+    """
+    Look up the tuned numerical setup of the conductor's family in the
+    numerical profile (see core.numerical_setup), by conductor name or
+    alias. Returns None if there is no profile or the conductor is not
+    part of any tuned family.
+    """
+    if not profile:
+        return None
+
+    names = {line_data['name'], *line_data.get('aliases', [])}
+    for family in profile.get('families', {}).values():
+        if names & set(family['conductors']):
+            return family['numerical_setup']
+    return None
+
+
 def write_request_to_protobuffer(pbd_file, request):
     pbd_file = pathlib.Path(pbd_file)
     pbd_file.write_text(
@@ -27,59 +60,11 @@ def write_request_to_protobuffer(pbd_file, request):
     )
 
 
-def generate_simulation_request(
-    line_data,
-    measurements_data,
-    presimulation_time=0,
-    discrete_time_step=10,
-):
-
-    '''    '''
-    # Create simulation request
-    simulation_request = dtr_pb2.SimulationRequest()
-
-    # 1. Parameters
-    # 1.1 Constants of nature
-    nature_constants = simulation_request.parameters.constants_of_nature
-
-    water_constants = nature_constants.water
-    water_constants.density = 1000  # water density [kg / m^3]
-    water_constants.latent_heat_fusion = 336000  # latent heat of fusion (freezing) [J / kg]
-    water_constants.latent_heat_evaporation = 2500000  # latent heat of evaporation [J / kg]
-    water_constants.latent_heat_sublimation = 2834000  # latent heat of sublimation [J / kg]
-    water_constants.specific_heat_ice = 2050  # specific heat of ice (cp) [J / kg K]
-    water_constants.specific_heat_water = 4210  # specific heat of water [J / kg K]
-
-    air_constants = nature_constants.air
-    air_constants.specific_heat = 1005  # specific heat of air [J / kg K]
-    # air_constants.density = ?  # density of air -- if not present, computed during simulation [kg / m^3]
-    # air_constants.viscosity = ?  # kinematic viscosity of air -- as above [m^2 / s]
-    # air_constants.thermal_conductivity = ?  # thermal conductivity of air -- as above [W / m K]
-
-    nature_constants.stefan_constant = 5.67e-8  # Stefan constant [W / m^2 K^4]
-    nature_constants.molar_mass_ratio = 0.62  # ratio of molar masses of water vapor and dry air
-    nature_constants.gas_constant = 461  # gas constant [J / K mol]
-    nature_constants.kelvin_celsius_diff = 273.15  # difference between Celsius and Kelvin unit (positive number) [deg C]
-
-    # 1.2 Numerical setup
-    numerical_setup = simulation_request.parameters.numerical_setup
-
-    numerical_setup.num_nodes = 100  # number of nodes in discretization
-    numerical_setup.time_step = discrete_time_step  # time step of the implicit Euler [s]
-    numerical_setup.steady_state_crit = -1  # finish when temperature changes less than this (negative value disables it) [deg C]; NOTE: must be disabled, because we want main simulation to go through all steps!
-    # numerical_setup.start time = ?  # start simulation at this time, not the first one in the data [s]
-    # numerical_setup.set_end time = ?  # not required // end simulation at this time, not the last one in the data [s]
-    numerical_setup.initial_skin_temperature = 0  # initial temperature of line skin [deg C]
-    numerical_setup.initial_electrical_current = 0  # initial current flowing through the line [A]
-    numerical_setup.radial_distribution = 1  # do we use radial distribution of lambda or not
-    numerical_setup.output_rate = -1  # write data every "output_rate" time steps, if 0, don't write at all, if -1, write only at measurement points
-    numerical_setup.presimulation_time = presimulation_time  # start running the model this many seconds early so that we mitigate the error caused by model response [s]
-    numerical_setup.debug_level = 2  # how verbose do you want the output to be (0 = no output, 2 = error, 5 = info, 7 = full trace)
-    # numerical_setup.initial_temperature_distribution = ?  #initial radial temperature distribution [deg C]. If not given, ait is constructed from `initial_skin_temperature`.
-
-    # 1.3 Line properties
-    line_properties = simulation_request.parameters.line_properties
-
+def set_line_properties(line_properties, line_data):
+    '''
+    Fill the line properties message of a simulation request from the
+    conductor definition (and line altitude / orientation) in `line_data`.
+    '''
     # 1.3.1 Inner material
     inner_material = line_properties.inner_material
     inner_material.density = line_data['inner_part_specific_weight']  # density of the material [kg / m^3]
@@ -141,33 +126,126 @@ def generate_simulation_request(
     line_properties.nusselt_exponent.append(line_data['nusselt_exp_2'])
     line_properties.nusselt_exponent.append(line_data['nusselt_exp_3'])
 
+
+def replace_line_properties(simulation_request, line_data):
+    '''
+    Copy of the simulation request with the line properties replaced by
+    those of `line_data`; measurements and numerical setup are kept. This
+    allows building the (possibly large) measurement block once and
+    reusing it for several conductors.
+    '''
+    request = dtr_pb2.SimulationRequest()
+    request.CopyFrom(simulation_request)
+    request.parameters.line_properties.Clear()
+    set_line_properties(request.parameters.line_properties, line_data)
+    return request
+
+
+def generate_simulation_request(
+    line_data,
+    measurements_data,
+    presimulation_time=0,
+    discrete_time_step=None,
+    inner_simulation_duration=None,
+    numerical_setup=None,
+    current_bracket=None,
+    initial_state=None,
+):
+
+    '''
+    Generate DiTeR simulation request. `numerical_setup` optionally
+    overrides entries of DEFAULT_NUMERICAL_SETUP (e.g., a tuned setup
+    from the numerical profile); an explicitly given
+    `discrete_time_step` or `inner_simulation_duration` takes precedence
+    over it.
+    `current_bracket` optionally narrows the bisection range of the
+    thermal current (see simulation.bracket). `initial_state` starts
+    the simulation from a given thermal state instead of the ambient
+    temperature (see simulation.ensemble.thermal_state()).
+    '''
+    setup = {**DEFAULT_NUMERICAL_SETUP, **(numerical_setup or {})}
+    if discrete_time_step is not None:
+        setup['time_step'] = discrete_time_step
+    if inner_simulation_duration is not None:
+        setup['inner_simulation_duration'] = inner_simulation_duration
+
+    # Create simulation request
+    simulation_request = dtr_pb2.SimulationRequest()
+
+    # 1. Parameters
+    # 1.1 Constants of nature
+    nature_constants = simulation_request.parameters.constants_of_nature
+
+    water_constants = nature_constants.water
+    water_constants.density = 1000  # water density [kg / m^3]
+    water_constants.latent_heat_fusion = 336000  # latent heat of fusion (freezing) [J / kg]
+    water_constants.latent_heat_evaporation = 2500000  # latent heat of evaporation [J / kg]
+    water_constants.latent_heat_sublimation = 2834000  # latent heat of sublimation [J / kg]
+    water_constants.specific_heat_ice = 2050  # specific heat of ice (cp) [J / kg K]
+    water_constants.specific_heat_water = 4210  # specific heat of water [J / kg K]
+
+    air_constants = nature_constants.air
+    air_constants.specific_heat = 1005  # specific heat of air [J / kg K]
+    # air_constants.density = ?  # density of air -- if not present, computed during simulation [kg / m^3]
+    # air_constants.viscosity = ?  # kinematic viscosity of air -- as above [m^2 / s]
+    # air_constants.thermal_conductivity = ?  # thermal conductivity of air -- as above [W / m K]
+
+    nature_constants.stefan_constant = 5.67e-8  # Stefan constant [W / m^2 K^4]
+    nature_constants.molar_mass_ratio = 0.62  # ratio of molar masses of water vapor and dry air
+    nature_constants.gas_constant = 461  # gas constant [J / K mol]
+    nature_constants.kelvin_celsius_diff = 273.15  # difference between Celsius and Kelvin unit (positive number) [deg C]
+
+    # 1.2 Numerical setup
+    numerical_setup = simulation_request.parameters.numerical_setup
+
+    numerical_setup.num_nodes = setup['num_nodes']  # number of nodes in discretization
+    numerical_setup.time_step = setup['time_step']  # time step of the implicit Euler [s]
+    numerical_setup.steady_state_crit = -1  # finish when temperature changes less than this (negative value disables it) [deg C]; NOTE: must be disabled, because we want main simulation to go through all steps!
+    # numerical_setup.start time = ?  # start simulation at this time, not the first one in the data [s]
+    # numerical_setup.set_end time = ?  # not required // end simulation at this time, not the last one in the data [s]
+    numerical_setup.initial_skin_temperature = 0  # initial temperature of line skin [deg C]
+    numerical_setup.initial_electrical_current = 0  # initial current flowing through the line [A]
+    numerical_setup.radial_distribution = 1  # do we use radial distribution of lambda or not
+    numerical_setup.output_rate = -1  # write data every "output_rate" time steps, if 0, don't write at all, if -1, write only at measurement points
+    numerical_setup.presimulation_time = presimulation_time  # start running the model this many seconds early so that we mitigate the error caused by model response [s]
+    numerical_setup.debug_level = 2  # how verbose do you want the output to be (0 = no output, 2 = error, 5 = info, 7 = full trace)
+    # numerical_setup.initial_temperature_distribution = ?  #initial radial temperature distribution [deg C]. If not given, ait is constructed from `initial_skin_temperature`.
+
+    # 1.3 Line properties
+    set_line_properties(simulation_request.parameters.line_properties, line_data)
+
     # 2. Numerical setup: inner simulations for time-to-overheat
     time_to_overheat_setup = simulation_request.time_to_overheat_setup
-    # time_to_overheat_setup.num_nodes = ?  # number of nodes in discretization
-    # time_to_overheat_setup.time_step = ?  # time step of the implicit Euler [s]
+    if setup['inner_num_nodes'] is not None:
+        time_to_overheat_setup.num_nodes = setup['inner_num_nodes']  # number of nodes in discretization
+    if setup['inner_time_step'] is not None:
+        time_to_overheat_setup.time_step = setup['inner_time_step']  # time step of the implicit Euler [s]
     # time_to_overheat_setup.steady_state_crit = 1e-6  # finish when temperature changes less than this (negative value disables it) [deg C]; NOTE: we override value from main simulation setup!
-    time_to_overheat_setup.duration = 3600  # run simulation for at most this long [s]
+    time_to_overheat_setup.duration = setup['time_to_overheat_duration']  # run simulation for at most this long [s]
     # time_to_overheat_setup.radial_distribution = ?  # do we use radial distribution of temperature or not
     # time_to_overheat_setup.debug_level = ?  # how verbose do you want the output to be (0 = no output, 2 = error, 5 = info, 7 = full trace)
 
     # 3. Numerical setup: non-linear solver for radial model
     nonlinear_solver_parameters = simulation_request.nonlinear_solver_parameters
-    nonlinear_solver_parameters.min_current = 0  # bisection min current [A]
-    nonlinear_solver_parameters.max_current = 2500  # bisection max current [A]
-    nonlinear_solver_parameters.current_precision = 1  # how precisely to determine the current [A]
+    min_current, max_current = current_bracket or DEFAULT_CURRENT_BRACKET
+    nonlinear_solver_parameters.min_current = min_current  # bisection min current [A]
+    nonlinear_solver_parameters.max_current = max_current  # bisection max current [A]
+    nonlinear_solver_parameters.current_precision = setup['current_precision']  # how precisely to determine the current [A]
     nonlinear_solver_parameters.temperature_precision = 1e-4  # how precisely to determine the temperature [deg C]
 
     inner_simulation_setup = nonlinear_solver_parameters.inner_simulation_setup  # numerical setup for simulations performed by the nonlinear_solver
-    # inner_simulation_setup.num_nodes = ?  # number of nodes in discretization
-    # inner_simulation_setup.time_step = ?  # time step of the implicit Euler [s]
+    if setup['inner_num_nodes'] is not None:
+        inner_simulation_setup.num_nodes = setup['inner_num_nodes']  # number of nodes in discretization
+    if setup['inner_time_step'] is not None:
+        inner_simulation_setup.time_step = setup['inner_time_step']  # time step of the implicit Euler [s]
     # inner_simulation_setup.steady_state_crit = 1e-6  # finish when temperature changes less than this (negative value disables it) [deg C]; NOTE: we override value from main simulation setup!
-    inner_simulation_setup.duration = 3600  # run simulation for at most this long [s]
+    inner_simulation_setup.duration = setup['inner_simulation_duration']  # run simulation for at most this long [s]; this is the time horizon of the thermal current
     # inner_simulation_setup.radial_distribution = ?  # do we use radial distribution of temperature or not
     # inner_simulation_setup.debug_level = ?  # how verbose do you want the output to be (0 = no output, 2 = error, 5 = info, 7 = full trace)
     inner_simulation_setup.initial_skin_temperature = 0  # initial temperature of line skin [deg C]. If not given, ambient temperature of the first measurement is used
     inner_simulation_setup.initial_electrical_current = 0  # initial current flowing through the line [A]. If not given it defaults to 0
 
-    nonlinear_solver_parameters.max_iterations = 30  # maximal number of iterations of bisection, this implies the precision of the current
+    nonlinear_solver_parameters.max_iterations = setup['max_iterations']  # maximal number of iterations of bisection, this implies the precision of the current
     nonlinear_solver_parameters.debug_level = 2  # how verbose do you want the bisection output to be (0 = no output, 2 = error, 5 = info, 7 = full trace)
 
     # 4. Computation mode
@@ -209,4 +287,19 @@ def generate_simulation_request(
         # the libdtr-diter wrapper (where this is necessary and to ensure
         # that incremental online computations work as expected).
 
+    # Start from the given thermal state: radial temperature distribution over the nodes (from the core to the
+    # surface), interpolated from the core and surface temperatures with a parabolic profile.
+    if initial_state is not None:
+        numerical_setup = simulation_request.parameters.numerical_setup
+        core_temperature = initial_state['core_temperature']
+        surface_temperature = initial_state['surface_temperature']
+        num_nodes = setup['num_nodes']
+        for node in range(num_nodes):
+            position = node / max(num_nodes - 1, 1)
+            numerical_setup.initial_temperature_distribution.append(
+                core_temperature - (core_temperature - surface_temperature) * position ** 2
+            )
+        numerical_setup.initial_skin_temperature = surface_temperature
+        numerical_setup.initial_electrical_current = initial_state['current']
+
     return simulation_request
@@ -0,0 +1,204 @@
+import logging
+
+import numpy as np
+
+from . import utils
+from .simulation import batch
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # brute-force neighbor search; fine for the usual number of stations
+    cKDTree = None
+
+
+logger = logging.getLogger(__name__)
+
+
+# Standard atmosphere temperature lapse rate [deg C / m]
+LAPSE_RATE = -0.0065
+
+# Weather keys that are interpolated as plain scalars (wind and the altitude-dependent keys are treated separately)
+SCALAR_KEYS = (
+    'rain_rate',
+    'relative_humidity',
+    'solar_irradiance',
+)
+
+
+def _neighbors(station_xy, span_xy, k):
+    # Indices of and distances to the k nearest stations of each span
+    if cKDTree is not None:
+        distances, indices = cKDTree(station_xy).query(span_xy, k=k)
+        return indices.reshape(len(span_xy), k), distances.reshape(len(span_xy), k)
+
+    distances = np.linalg.norm(span_xy[:, np.newaxis, :] - station_xy[np.newaxis, :, :], axis=2)
+    indices = np.argsort(distances, axis=1)[:, :k]
+    return indices, np.take_along_axis(distances, indices, axis=1)
+
+
+def idw_weights(distances, power=2.0):
+    """Inverse-distance weights (rows sum to 1); a station at zero distance gets the full weight."""
+    with np.errstate(divide='ignore'):
+        weights = 1.0 / distances ** power
+    exact = np.isinf(weights)
+    weights = np.where(np.any(exact, axis=1, keepdims=True), exact.astype(float), weights)
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def kriging_weights(station_xy, indices, span_xy, variogram_range, sill=1.0, nugget=0.0):
+    """
+    Ordinary kriging weights with an exponential variogram, for each span
+    from its neighboring stations (solved as one batch of small systems).
+    """
+    def variogram(h):
+        return np.where(h > 0, nugget + (sill - nugget) * (1 - np.exp(-3 * h / variogram_range)), 0.0)
+
+    neighbors = station_xy[indices]  # (M, k, 2)
+    num_spans, k = indices.shape
+
+    system = np.ones((num_spans, k + 1, k + 1))
+    system[:, :k, :k] = variogram(np.linalg.norm(neighbors[:, :, np.newaxis] - neighbors[:, np.newaxis], axis=3))
+    system[:, k, k] = 0.0
+
+    rhs = np.ones((num_spans, k + 1))
+    rhs[:, :k] = variogram(np.linalg.norm(neighbors - span_xy[:, np.newaxis], axis=2))
+
+    return np.linalg.solve(system, rhs[..., np.newaxis])[:, :k, 0]
+
+
+class SpanWeatherInterpolator:
+    """
+    Interpolates weather station series to line spans.
+
+    The neighbor stations and interpolation weights of each span depend
+    only on the geometry and are computed once; interpolating a block of
+    time steps is then a single gather and weighted sum over arrays of
+    shape (time, stations). Station coordinates and span coordinates are
+    (x, y) positions in a common projected system [m].
+
+    Ambient temperature and air pressure are reduced to sea level before
+    the interpolation and brought to the span altitude afterwards (lapse
+    rate and standard atmosphere, respectively). Wind is interpolated as
+    a vector for its direction and as a scalar for its speed (vector
+    averaging would underestimate the speed when the directions differ).
+    """
+
+    def __init__(
+        self,
+        station_xy,
+        station_altitude,
+        span_xy,
+        span_altitude,
+        span_orientation,
+        num_neighbors=4,
+        method='idw',
+        power=2.0,
+        variogram_range=50000.0,
+        lapse_rate=LAPSE_RATE,
+    ):
+        self.station_xy = np.asarray(station_xy, dtype=float)
+        self.station_altitude = np.asarray(station_altitude, dtype=float)
+        self.span_xy = np.asarray(span_xy, dtype=float)
+        self.span_altitude = np.asarray(span_altitude, dtype=float)
+        self.span_orientation = np.asarray(span_orientation, dtype=float)
+        self.lapse_rate = lapse_rate
+
+        k = min(num_neighbors, len(self.station_xy))
+        self.indices, distances = _neighbors(self.station_xy, self.span_xy, k)
+        if method == 'idw':
+            self.weights = idw_weights(distances, power)
+        elif method == 'kriging':
+            self.weights = kriging_weights(self.station_xy, self.indices, self.span_xy, variogram_range)
+        else:
+            raise ValueError(f"Unsupported interpolation method: {method!r}!")
+
+        # Pressure ratio to sea level, per station and per span
+        self._station_pressure_ratio = utils.barometric_pressure(self.station_altitude) / utils.barometric_pressure(0)
+        self._span_pressure_ratio = utils.barometric_pressure(self.span_altitude) / utils.barometric_pressure(0)
+
+    @property
+    def num_spans(self):
+        return len(self.span_xy)
+
+    def _interpolate(self, values, spans):
+        # values: (time, stations) -> (time, spans)
+        return np.einsum('tsk,sk->ts', values[:, self.indices[spans]], self.weights[spans])
+
+    def interpolate(self, station_weather, spans=slice(None)):
+        """
+        Interpolate station weather (dictionary of arrays of shape
+        (time, stations), with the time axis also given under 'time') to
+        the selected spans. Returns a dictionary of arrays of shape
+        (time, spans) with the weather keys of the data series, plus
+        'relative_wind_direction' (wind direction relative to the span).
+        """
+        result = {'time': np.asarray(station_weather['time'], dtype=float)}
+
+        temperature = np.asarray(station_weather['ambient_temperature'], dtype=float)
+        result['ambient_temperature'] = (
+            self._interpolate(temperature - self.lapse_rate * self.station_altitude, spans)
+            + self.lapse_rate * self.span_altitude[spans]
+        )
+
+        if 'air_pressure' in station_weather:
+            pressure = np.asarray(station_weather['air_pressure'], dtype=float)
+            result['air_pressure'] = (
+                self._interpolate(pressure / self._station_pressure_ratio, spans) * self._span_pressure_ratio[spans]
+            )
+        else:
+            result['air_pressure'] = np.broadcast_to(
+                utils.barometric_pressure(self.span_altitude[spans]),
+                result['ambient_temperature'].shape,
+            )
+
+        # Wind: direction from the interpolated vector, speed interpolated as scalar
+        speed = np.asarray(station_weather['wind_speed'], dtype=float)
+        direction = np.radians(np.asarray(station_weather['wind_direction'], dtype=float))
+        u = self._interpolate(speed * np.sin(direction), spans)
+        v = self._interpolate(speed * np.cos(direction), spans)
+        result['wind_speed'] = np.maximum(self._interpolate(speed, spans), 0.0)
+        result['wind_direction'] = np.degrees(np.arctan2(u, v)) % 360
+        result['relative_wind_direction'] = (result['wind_direction'] - self.span_orientation[spans]) % 360
+
+        for key in SCALAR_KEYS:
+            if key in station_weather:
+                result[key] = self._interpolate(np.asarray(station_weather[key], dtype=float), spans)
+            else:
+                result[key] = np.full(result['ambient_temperature'].shape, batch.STANDARD_WEATHER[key])
+
+        return result
+
+    def stream(self, station_chunks, spans=slice(None)):
+        """Interpolate an iterable of station weather blocks (consecutive time chunks), yielding span blocks."""
+        for station_weather in station_chunks:
+            yield self.interpolate(station_weather, spans)
+
+
+def span_samples(interpolator, station_weather, spans, line_load, chunk_size=1000, request_options=None):
+    """
+    Generate simulation samples for the spans (list of line_data, in the
+    order of the interpolator's spans) in chunks of `chunk_size` spans,
+    so that only one chunk of span series is held in memory at a time.
+    `line_load` is the load (constant, a series shared by all spans, or
+    one column per span). Yields (span offset, list of SimulationSample); feed each list
+    to batch.run_batch().
+    """
+    line_load = np.asarray(line_load, dtype=float)
+    for offset in range(0, len(spans), chunk_size):
+        selection = slice(offset, min(offset + chunk_size, len(spans)))
+        weather = interpolator.interpolate(station_weather, selection)
+
+        samples = []
+        for column, line_data in enumerate(spans[selection]):
+            data_series = {key: weather[key][:, column] for key in batch.DATA_SERIES_KEYS[1:-1]}
+            data_series['time'] = weather['time']
+            if line_load.ndim == 2:
+                data_series['line_load'] = line_load[:, offset + column]
+            else:
+                data_series['line_load'] = np.broadcast_to(line_load, weather['time'].shape)
+            samples.append(batch.SimulationSample(
+                line_data=line_data,
+                data_series=data_series,
+                request_options=dict(request_options or {}),
+            ))
+        yield offset, samples
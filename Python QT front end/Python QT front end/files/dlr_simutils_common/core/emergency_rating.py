@@ -0,0 +1,313 @@
+import sys
+import json
+import pathlib
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+from . import rating_table, static_rating, utils
+from .heat_balance import ConductorThermalModel
+from .simulation import batch
+import dlr_simutils_common.core.logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Emergency durations [s]
+DEFAULT_DURATIONS = (300, 600, 900, 1800)
+
+# Pre-loads, as fractions of the steady-state ampacity of the heat balance model
+DEFAULT_PRE_LOADS = (0.0, 0.5, 0.75, 0.9)
+
+DEFAULT_WEATHER_CLASSES = {
+    'standard': batch.STANDARD_WEATHER,
+}
+
+# Range of the fitted thermal time constant [s]
+TIME_CONSTANT_RANGE = (60.0, 4 * 3600.0)
+
+
+def complete_weather(line_data, weather):
+    # Fill missing weather keys with standard values (air pressure from the line altitude)
+    completed = dict(batch.STANDARD_WEATHER)
+    completed['air_pressure'] = utils.barometric_pressure(line_data['line_altitude'])
+    completed.update(weather)
+    return {key: float(completed[key]) for key in batch.DATA_SERIES_KEYS[1:-1]}
+
+
+def duration_column(duration):
+    # Table column of the emergency rating for a duration [s]
+    return f"{duration / 60:g}min"
+
+
+def equilibrium_state(model, weather, current):
+    """
+    Steady thermal state at constant current and weather, for use as
+    `initial_state` of diter.generate_simulation_request().
+    """
+    surface, core = model.steady_state_temperature(current, weather)
+    return {
+        'core_temperature': float(core),
+        'surface_temperature': float(surface),
+        'current': float(current),
+    }
+
+
+def step_load_sample(line_data, weather, state, duration, time_step=30):
+    """
+    Simulation sample for the emergency rating: the line starts in the
+    given (pre-load) state; the thermal current at the first row is the
+    current that heats the core to the critical temperature within
+    `duration` seconds.
+    """
+    return batch.SimulationSample(
+        line_data=line_data,
+        data_series=batch.constant_data_series(weather, state['current'], duration=time_step, time_step=time_step),
+        request_options={'inner_simulation_duration': int(duration), 'initial_state': state},
+    )
+
+
+def emergency_rating(continuous_rating, time_constant, duration, pre_load):
+    """
+    Emergency rating of the first-order thermal model: the temperature
+    rise is proportional to the square of the current and approaches its
+    steady state with the given time constant, so that
+
+        I_e^2 = I_p^2 + (I_c^2 - I_p^2) / (1 - exp(-t / tau))
+
+    for continuous rating I_c, pre-load I_p and duration t. Inputs are
+    broadcast together.
+    """
+    continuous_rating, time_constant, duration, pre_load = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (continuous_rating, time_constant, duration, pre_load))
+    )
+    pre_load = np.minimum(pre_load, continuous_rating)
+    response = -np.expm1(-duration / time_constant)
+    return np.sqrt(np.square(pre_load) + (np.square(continuous_rating) - np.square(pre_load)) / response)
+
+
+def fit_time_constant(continuous_rating, durations, pre_loads, ratings, num_candidates=400):
+    """
+    Least-squares fit (relative error of the rating) of the time constant
+    of emergency_rating() to simulated ratings. Returns the time constant
+    and the RMS relative error of the fit.
+    """
+    valid = np.isfinite(ratings)
+    if not valid.any() or not np.isfinite(continuous_rating):
+        return np.nan, np.nan
+    durations, pre_loads, ratings = (
+        np.asarray(values, dtype=float)[valid] for values in (durations, pre_loads, ratings)
+    )
+
+    candidates = np.geomspace(*TIME_CONSTANT_RANGE, num_candidates)
+    fitted = emergency_rating(continuous_rating, candidates[:, None], durations[None, :], pre_loads[None, :])
+    errors = np.sqrt(np.mean(np.square(fitted / ratings - 1), axis=1))
+    best = int(np.argmin(errors))
+    return float(candidates[best]), float(errors[best])
+
+
+def generate_emergency_table(
+    line_data,
+    output_dir=None,
+    durations=DEFAULT_DURATIONS,
+    pre_loads=DEFAULT_PRE_LOADS,
+    weather_classes=None,
+    num_workers=None,
+):
+    """
+    Compute the emergency ratings of a conductor (line data with line
+    altitude, orientation and critical temperature) for all durations,
+    pre-loads and weather classes (dictionary name -> weather) in one
+    parallel batch, and fit the thermal time constant per weather class.
+
+    The pre-load equilibrium states are computed once per weather class
+    and pre-load (heat balance model) and shared by the samples of all
+    durations; the continuous ratings are computed by the same batch.
+
+    Returns (table, metadata): the table has one row per weather class and
+    pre-load, with the simulated ratings [A] per duration and the
+    continuous rating; the metadata holds the fitted time constants for
+    interpolation (see EmergencyRatingTable). If `output_dir` is given,
+    both are written to it (CSV and JSON).
+    """
+    weather_classes = weather_classes or DEFAULT_WEATHER_CLASSES
+    durations = sorted(int(duration) for duration in durations)
+    pre_loads = sorted(float(pre_load) for pre_load in pre_loads)
+
+    model = ConductorThermalModel(line_data)
+    weathers = {name: complete_weather(line_data, weather) for name, weather in weather_classes.items()}
+
+    # Continuous ratings of all weather classes, packed into a single sample
+    continuousWeather = {
+        key: np.array([weather[key] for weather in weathers.values()])
+        for key in batch.DATA_SERIES_KEYS[1:-1]
+    }
+    samples = [
+        batch.weather_points_sample(
+            line_data,
+            continuousWeather,
+            request_options={'inner_simulation_duration': static_rating.STEADY_STATE_HORIZON},
+        )
+    ]
+
+    # Step-load samples from the cached pre-load equilibrium states
+    rows = []  # (weather class, pre-load fraction, pre-load state)
+    for name, weather in weathers.items():
+        steadyState = float(model.steady_state_ampacity(weather))
+        for pre_load in pre_loads:
+            state = equilibrium_state(model, weather, pre_load * steadyState)
+            rows.append((name, pre_load, state))
+            samples += [step_load_sample(line_data, weather, state, duration) for duration in durations]
+
+    logger.info(
+        "Emergency ratings of %s: %d weather classes x %d pre-loads x %d durations.",
+        line_data['name'], len(weathers), len(pre_loads), len(durations),
+    )
+    results = batch.run_batch(samples, num_workers)
+
+    def first_value(result, index=0):
+        if result is None or not result.succeeded:
+            return np.nan
+        return float(result.ampacity[index])
+
+    continuous = {name: first_value(results[0], index) for index, name in enumerate(weathers)}
+
+    records = []
+    for row, (name, pre_load, state) in enumerate(rows):
+        rowResults = results[1 + row * len(durations):1 + (row + 1) * len(durations)]
+        record = {
+            'weather_class': name,
+            'pre_load': pre_load,
+            'pre_load_current': round(state['current'], 1),
+            'pre_load_temperature': round(state['core_temperature'], 2),
+        }
+        for duration, result in zip(durations, rowResults):
+            record[duration_column(duration)] = first_value(result)
+        record['continuous'] = continuous[name]
+        records.append(record)
+    table = pd.DataFrame(records)
+
+    durationColumns = [duration_column(duration) for duration in durations]
+    timeConstants = {}
+    for name in weathers:
+        classTable = table[table['weather_class'] == name]
+        ratings = classTable[durationColumns].to_numpy(dtype=float)
+        timeConstant, fitError = fit_time_constant(
+            continuous[name],
+            np.broadcast_to(np.asarray(durations, dtype=float), ratings.shape).reshape(-1),
+            np.repeat(classTable['pre_load_current'].to_numpy(dtype=float), len(durations)),
+            ratings.reshape(-1),
+        )
+        timeConstants[name] = {'time_constant': timeConstant, 'fit_error': fitError}
+        if np.isnan(timeConstant):
+            logger.warning("Emergency ratings of %s (%s) failed!", line_data['name'], name)
+
+    metadata = {
+        'conductor': line_data['name'],
+        'unit': 'A',
+        'critical_temperature': line_data['critical_temperature'],
+        'line_altitude': line_data['line_altitude'],
+        'durations': durations,
+        'pre_loads': pre_loads,
+        'weather_classes': {
+            name: {'weather': weather, 'continuous_rating': continuous[name], **timeConstants[name]}
+            for name, weather in weathers.items()
+        },
+    }
+
+    if output_dir is not None:
+        table_file, metadata_file = table_paths(output_dir, line_data['name'])
+        table_file.parent.mkdir(parents=True, exist_ok=True)
+        table.round(1).to_csv(table_file, index=False)
+        with open(metadata_file, 'w') as fp:
+            json.dump(metadata, fp, indent=4)
+
+    return table, metadata
+
+
+def table_paths(output_dir, conductor_name):
+    # Table (CSV) and metadata (JSON) files of a conductor
+    output_dir = pathlib.Path(output_dir)
+    name = rating_table.table_name(conductor_name)
+    return output_dir / f"{name}.emergency.csv", output_dir / f"{name}.emergency.json"
+
+
+class EmergencyRatingTable:
+    """
+    Emergency ratings of a conductor generated by
+    generate_emergency_table(); ratings for arbitrary durations and
+    pre-loads are interpolated with the fitted first-order model.
+    """
+
+    def __init__(self, table, metadata):
+        self.table = table
+        self.metadata = metadata
+
+    @classmethod
+    def open_for_conductor(cls, tables_dir, conductor_name):
+        table_file, metadata_file = table_paths(tables_dir, conductor_name)
+        with open(metadata_file, 'r') as fp:
+            metadata = json.load(fp)
+        return cls(pd.read_csv(table_file), metadata)
+
+    def query(self, duration, pre_load, weather_class='standard'):
+        """Emergency rating [A] for duration(s) [s] and pre-load current(s) [A] (broadcast together)."""
+        if weather_class not in self.metadata['weather_classes']:
+            raise ValueError(f"Unknown weather class: {weather_class!r}!")
+        entry = self.metadata['weather_classes'][weather_class]
+        return emergency_rating(entry['continuous_rating'], entry['time_constant'], duration, pre_load)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate short-term emergency rating tables of conductors.")
+    dlr_simutils_common.core.logging.parser_add_logging_arguments(parser)
+    parser.add_argument('conductor', type=pathlib.Path, nargs='+', help="Conductor definition (JSON) file(s).")
+    parser.add_argument('--output-dir', '-o', type=pathlib.Path, default=pathlib.Path('emergency-ratings'),
+                        help="Output directory.")
+    parser.add_argument('--durations', type=lambda text: [int(value) for value in text.split(',')],
+                        default=DEFAULT_DURATIONS, help="Comma-separated emergency durations [s].")
+    parser.add_argument('--pre-loads', type=lambda text: [float(value) for value in text.split(',')],
+                        default=DEFAULT_PRE_LOADS,
+                        help="Comma-separated pre-loads, as fractions of the steady-state ampacity.")
+    parser.add_argument('--weather-classes', type=pathlib.Path, default=None,
+                        help="JSON file with weather classes (dictionary name -> weather); default: standard weather.")
+    parser.add_argument('--line-altitude', type=float, default=static_rating.STANDARD_LINE_ALTITUDE,
+                        help="Line altitude [m].")
+    parser.add_argument('--workers', type=int, default=None, help="Number of parallel simulations.")
+    args = parser.parse_args()
+
+    dlr_simutils_common.core.logging.setup_logging(args, default_level='INFO')
+
+    weather_classes = None
+    if args.weather_classes is not None:
+        with open(args.weather_classes, 'r') as fp:
+            weather_classes = json.load(fp)
+
+    for filename in args.conductor:
+        with open(filename, 'r') as fp:
+            line_data = json.load(fp)
+        line_data['line_altitude'] = args.line_altitude
+        line_data['line_orientation'] = 0.0  # wind directions of the weather classes are relative to the line
+
+        _, metadata = generate_emergency_table(
+            line_data,
+            args.output_dir,
+            durations=args.durations,
+            pre_loads=args.pre_loads,
+            weather_classes=weather_classes,
+            num_workers=args.workers,
+        )
+        for name, entry in metadata['weather_classes'].items():
+            logger.info(
+                "%s (%s): continuous rating %.1f A, time constant %.0f s (fit error %.1f %%)",
+                line_data['name'], name, entry['continuous_rating'], entry['time_constant'], 100 * entry['fit_error'],
+            )
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,239 @@
+import numpy as np
+
+
+# Physical constants
+STEFAN_BOLTZMANN = 5.67e-8  # [W / m^2 K^4]
+GRAVITY = 9.807  # [m / s^2]
+KELVIN = 273.15
+
+# Reynolds number boundaries between the three ranges of the Nusselt correlation (nusselt_base_N, nusselt_exp_N)
+REYNOLDS_RANGES = (100.0, 2650.0)
+
+
+def _field(line_data, key):
+    # Field of one or more conductor definitions, as array
+    if isinstance(line_data, dict):
+        return np.asarray(line_data[key], dtype=float)
+    return np.array([entry[key] for entry in line_data], dtype=float)
+
+
+class ConductorThermalModel:
+    """
+    Vectorized steady-state and lumped transient heat balance of a bare
+    overhead conductor (CIGRE TB 601 formulation: Joule and solar heating,
+    forced/natural convection and radiative cooling; rain and evaporative
+    cooling are neglected, which is conservative).
+
+    This is the cheap approximation of the radial DiTeR model, used for
+    screening, solver brackets, and real-time state propagation. The model
+    can be created for a single conductor definition or for a list of them;
+    in the latter case, the leading axis of all inputs indexes the
+    conductors and the remaining axes broadcast against it.
+    """
+
+    def __init__(self, line_data):
+        def field(key):
+            return _field(line_data, key)
+
+        self.diameter = field('outer_part_diameter') / 1000  # [m]
+        self.inner_diameter = field('inner_part_diameter') / 1000  # [m]
+
+        inner_area = field('inner_part_cross_section') / 1e6  # [m^2]
+        outer_area = field('outer_part_cross_section') / 1e6  # [m^2]
+
+        # DC resistance at 20 deg C; computed from material properties if not given
+        conductance = (
+            field('inner_part_specific_conductivity') * inner_area
+            + field('outer_part_specific_conductivity') * outer_area
+        )
+        dc_resistance = field('dc_resistance') / 1000  # [ohm / m]
+        self.resistance = np.where(dc_resistance > 0, dc_resistance, 1 / conductance) * field('skin_effect_factor')
+        self.resistance_alpha = field('outer_part_resistivity_coefficient')
+
+        self.absorptivity = field('absorptivity')
+        self.emissivity = field('emissivity')
+        self.thermal_conductivity = field('effective_radial_thermal_conductivity')
+
+        self.nusselt_base = [field(f'nusselt_base_{idx}') for idx in (1, 2, 3)]
+        self.nusselt_exp = [field(f'nusselt_exp_{idx}') for idx in (1, 2, 3)]
+
+        # Heat capacity per unit length (at 20 deg C) and its temperature coefficient
+        inner_capacity = field('inner_part_specific_weight') * inner_area * field('inner_part_specific_heat')
+        outer_capacity = field('outer_part_specific_weight') * outer_area * field('outer_part_specific_heat')
+        self.heat_capacity_20 = inner_capacity + outer_capacity  # [J / m K]
+        self.heat_capacity_beta = (
+            inner_capacity * field('inner_part_specific_heat_coefficient')
+            + outer_capacity * field('outer_part_specific_heat_coefficient')
+        ) / self.heat_capacity_20
+
+        self.altitude = field('line_altitude')
+        self.critical_temperature = field('critical_temperature')
+
+    def _expand(self, value, ndim):
+        # Append trailing axes to per-conductor parameters so they broadcast against inputs of given dimensionality
+        value = np.asarray(value)
+        if value.ndim == 0:
+            return value
+        return value.reshape(value.shape + (1,) * (ndim - value.ndim))
+
+    def _params(self, *inputs, names):
+        ndim = max(np.ndim(value) for value in inputs)
+        return [self._expand(getattr(self, name), ndim) for name in names]
+
+    def resistance_at(self, temperature):
+        resistance, alpha = self._params(temperature, names=('resistance', 'resistance_alpha'))
+        return resistance * (1 + alpha * (temperature - 20))
+
+    def heat_capacity(self, temperature):
+        capacity, beta = self._params(temperature, names=('heat_capacity_20', 'heat_capacity_beta'))
+        return capacity * (1 + beta * (temperature - 20))
+
+    def joule_heating(self, current, temperature):
+        return np.square(current) * self.resistance_at(temperature)
+
+    def solar_heating(self, solar_irradiance):
+        absorptivity, diameter = self._params(solar_irradiance, names=('absorptivity', 'diameter'))
+        return absorptivity * solar_irradiance * diameter
+
+    def radiative_cooling(self, temperature, ambient_temperature):
+        emissivity, diameter = self._params(temperature, ambient_temperature, names=('emissivity', 'diameter'))
+        return np.pi * diameter * STEFAN_BOLTZMANN * emissivity * (
+            (temperature + KELVIN) ** 4 - (ambient_temperature + KELVIN) ** 4
+        )
+
+    def convective_cooling(self, temperature, ambient_temperature, wind_speed, wind_direction):
+        ndim = max(np.ndim(value) for value in (temperature, ambient_temperature, wind_speed, wind_direction))
+        diameter, altitude = (self._expand(value, ndim) for value in (self.diameter, self.altitude))
+        nusselt_base = [self._expand(value, ndim) for value in self.nusselt_base]
+        nusselt_exp = [self._expand(value, ndim) for value in self.nusselt_exp]
+
+        film_temperature = 0.5 * (temperature + ambient_temperature)
+        temperature_difference = np.maximum(temperature - ambient_temperature, 0)
+
+        # Air properties at film temperature and line altitude
+        air_conductivity = 2.368e-2 + 7.23e-5 * film_temperature - 2.763e-8 * film_temperature ** 2
+        relative_density = np.exp(-1.16e-4 * altitude)
+        kinematic_viscosity = (1.32e-5 + 9.5e-8 * film_temperature) / relative_density
+
+        # Forced convection: Nu = B * Re^n, with coefficients depending on the Reynolds number range
+        reynolds = np.maximum(wind_speed, 0) * diameter / kinematic_viscosity
+        reynolds_range = [reynolds < REYNOLDS_RANGES[0], reynolds < REYNOLDS_RANGES[1]]
+        base = np.select(reynolds_range, nusselt_base[:2], nusselt_base[2])
+        exponent = np.select(reynolds_range, nusselt_exp[:2], nusselt_exp[2])
+        nusselt_perpendicular = base * reynolds ** exponent
+
+        # Attack angle correction
+        attack = np.abs(np.sin(np.radians(wind_direction)))
+        angle_factor = np.where(
+            attack <= np.sin(np.radians(24.0)),
+            0.42 + 0.68 * attack ** 1.08,
+            0.42 + 0.58 * attack ** 0.90,
+        )
+        nusselt_forced = nusselt_perpendicular * angle_factor
+
+        # Low wind speeds: direction is unreliable, use 45 deg attack angle lower bound
+        nusselt_forced = np.where(
+            wind_speed < 0.5,
+            np.maximum(nusselt_forced, 0.55 * nusselt_perpendicular),
+            nusselt_forced,
+        )
+
+        # Natural convection
+        prandtl = 0.715 - 2.5e-4 * film_temperature
+        grashof = diameter ** 3 * temperature_difference * GRAVITY / (
+            (film_temperature + KELVIN) * kinematic_viscosity ** 2
+        )
+        rayleigh = np.maximum(grashof * prandtl, 1e-12)
+        nusselt_natural = np.where(rayleigh < 1e4, 0.850 * rayleigh ** 0.188, 0.480 * rayleigh ** 0.250)
+
+        nusselt = np.maximum(nusselt_forced, nusselt_natural)
+        return np.pi * air_conductivity * temperature_difference * nusselt
+
+    def net_heating(self, temperature, current, weather):
+        """Net heat gain per unit length [W / m] at given conductor temperature and current."""
+        return (
+            self.joule_heating(current, temperature)
+            + self.solar_heating(weather['solar_irradiance'])
+            - self.convective_cooling(
+                temperature,
+                weather['ambient_temperature'],
+                weather['wind_speed'],
+                weather['wind_direction'],
+            )
+            - self.radiative_cooling(temperature, weather['ambient_temperature'])
+        )
+
+    def core_surface_difference(self, current, temperature):
+        """
+        Radial temperature difference between the core and the surface
+        (CIGRE TB 601, eq. 41) for the given current and mean temperature.
+        """
+        diameter, inner_diameter, conductivity = self._params(
+            current, temperature,
+            names=('diameter', 'inner_diameter', 'thermal_conductivity'),
+        )
+        joule = self.joule_heating(current, temperature)
+        inner_ratio = np.square(inner_diameter) / np.maximum(np.square(diameter) - np.square(inner_diameter), 1e-12)
+        shape_factor = 0.5 - inner_ratio * np.log(np.maximum(diameter / np.maximum(inner_diameter, 1e-9), 1.0))
+        return joule / (2 * np.pi * conductivity) * shape_factor
+
+    def steady_state_ampacity(self, weather, max_temperature=None, iterations=40):
+        """
+        Steady-state current at which the core reaches `max_temperature`
+        (defaults to the critical temperature of the conductor). Weather
+        is a dictionary of (broadcastable) arrays.
+        """
+        ambient = np.asarray(weather['ambient_temperature'], dtype=float)
+        if max_temperature is None:
+            max_temperature = self._params(ambient, *weather.values(), names=('critical_temperature',))[0]
+
+        # Full broadcast shape of conductor parameters and inputs
+        shape = np.broadcast_shapes(self.net_heating(ambient, 0.0, weather).shape, np.shape(max_temperature))
+
+        def ampacity_at_surface(surface_temperature):
+            zero_current_balance = self.net_heating(surface_temperature, 0.0, weather)
+            current = np.sqrt(np.maximum(-zero_current_balance, 0) / self.resistance_at(surface_temperature))
+            return current
+
+        # Bisection on the surface temperature: core temperature (surface + radial difference) increases with it
+        lower = np.broadcast_to(ambient, shape).astype(float)
+        upper = np.broadcast_to(max_temperature, shape).astype(float).copy()
+        lower = np.minimum(lower, upper)
+        for _ in range(iterations):
+            middle = 0.5 * (lower + upper)
+            current = ampacity_at_surface(middle)
+            core = middle + self.core_surface_difference(current, middle)
+            too_hot = core > max_temperature
+            upper = np.where(too_hot, middle, upper)
+            lower = np.where(too_hot, lower, middle)
+
+        return ampacity_at_surface(lower)
+
+    def steady_state_temperature(self, current, weather, iterations=40, max_rise=500.0):
+        """Steady-state (surface, core) temperatures for the given current."""
+        ambient = np.asarray(weather['ambient_temperature'], dtype=float)
+        shape = self.net_heating(ambient, current, weather).shape
+
+        lower = np.broadcast_to(ambient - 1.0, shape).astype(float)
+        upper = lower + max_rise
+        for _ in range(iterations):
+            middle = 0.5 * (lower + upper)
+            heating = self.net_heating(middle, current, weather) > 0
+            lower = np.where(heating, middle, lower)
+            upper = np.where(heating, upper, middle)
+
+        surface = 0.5 * (lower + upper)
+        return surface, surface + self.core_surface_difference(current, surface)
+
+    def temperature_step(self, temperature, current, weather, dt):
+        """
+        Advance the lumped conductor temperature by `dt` seconds (explicit
+        Euler, sub-stepped for stability).
+        """
+        num_steps = max(1, int(np.ceil(dt / 60.0)))
+        step = dt / num_steps
+        for _ in range(num_steps):
+            temperature = temperature + step * self.net_heating(temperature, current, weather) / self.heat_capacity(
+                temperature
+            )
+        return temperature
@@ -0,0 +1,162 @@
+import math
+import statistics
+
+import numpy as np
+
+from . import utils
+from .simulation.batch import STANDARD_WEATHER, SimulationSample, constant_data_series
+
+
+# Default tilts towards the conditions that cause overheating: low wind, high
+# irradiance and high ambient temperature. Positive values shift the samples
+# towards the upper end of the distribution, negative towards the lower end.
+DEFAULT_TAIL_SHIFTS = {
+    'wind_speed': -6.0,
+    'solar_irradiance': 4.0,
+    'ambient_temperature': 4.0,
+}
+
+
+class WeatherVariableDistribution:
+    """
+    Distribution of a single weather variable, given by its histogram.
+
+    The nominal distribution is sampled by inverse transform of the CDF
+    from utils.cdf_from_histogram(). The biasing distribution applies an
+    exponential tilt with parameter `shift` to the uniform variate u:
+    q(u) = shift * exp(shift * u) / (exp(shift) - 1). Since the nominal
+    density of u is 1, the likelihood ratio of a sample is 1 / q(u). The
+    tilt keeps the ratio bounded, so the estimator variance is finite for
+    any shift.
+    """
+
+    def __init__(self, hist, bins, shift=0.0):
+        self.bins = np.asarray(bins, dtype=float)
+        self.cdf = utils.cdf_from_histogram(np.asarray(hist, dtype=float), self.bins)
+        self.shift = shift
+
+    def sample(self, rng, size):
+        """Return (values, likelihood_ratios) arrays."""
+        v = rng.random(size)
+        theta = self.shift
+        if abs(theta) < 1e-9:
+            u = v
+            ratios = np.ones(size)
+        else:
+            scale = math.expm1(theta)
+            u = np.log1p(v * scale) / theta
+            ratios = scale / (theta * np.exp(theta * u))
+
+        return np.interp(u, self.cdf, self.bins), ratios
+
+
+class ImportanceWeatherSampler:
+    """
+    Samples joint weather conditions from independent per-variable
+    distributions, with optional tilting towards the tail of interest.
+
+    `distributions` maps weather keys to WeatherVariableDistribution
+    instances; `fixed_values` provides constant values for the remaining
+    weather keys (see create_samples() for keys that are not given at all).
+    """
+
+    def __init__(self, distributions, fixed_values=None, seed=None):
+        self.distributions = distributions
+        self.fixed_values = dict(fixed_values or {})
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_histograms(cls, histograms, shifts=DEFAULT_TAIL_SHIFTS, **kwargs):
+        """Create sampler from dictionary mapping weather keys to (hist, bins) tuples."""
+        distributions = {
+            key: WeatherVariableDistribution(hist, bins, shift=shifts.get(key, 0.0))
+            for key, (hist, bins) in histograms.items()
+        }
+        return cls(distributions, **kwargs)
+
+    def sample(self, num_samples):
+        """Return (weather, weights); weather is a dictionary of arrays."""
+        weather = {}
+        weights = np.ones(num_samples)
+        for key, distribution in self.distributions.items():
+            weather[key], ratios = distribution.sample(self.rng, num_samples)
+            weights *= ratios
+
+        for key, value in self.fixed_values.items():
+            weather.setdefault(key, np.full(num_samples, value, dtype=float))
+
+        return weather, weights
+
+    def create_samples(self, line_data, line_load, num_samples, duration=3600, time_step=30, request_options=None):
+        """
+        Create simulation samples with constant sampled weather and line
+        load over the given duration; each sample carries its likelihood
+        ratio as weight. Weather keys that are neither sampled nor fixed
+        are filled with standard values (air pressure from the line
+        altitude), as in batch.weather_points_sample().
+        """
+        weather, weights = self.sample(num_samples)
+
+        defaults = {**STANDARD_WEATHER, 'air_pressure': utils.barometric_pressure(line_data['line_altitude'])}
+        for key, value in defaults.items():
+            weather.setdefault(key, np.full(num_samples, value, dtype=float))
+
+        samples = []
+        for index in range(num_samples):
+            samples.append(SimulationSample(
+                line_data=line_data,
+                data_series=constant_data_series(
+                    {key: values[index] for key, values in weather.items()},
+                    line_load,
+                    duration,
+                    time_step,
+                ),
+                request_options=dict(request_options or {}),
+                weight=float(weights[index]),
+            ))
+        return samples
+
+
+def weighted_exceedance(values, weights, threshold, confidence=0.95):
+    """
+    Estimate the probability that `values` exceed `threshold` from
+    importance-sampled values and their likelihood-ratio weights.
+
+    Returns a dictionary with the estimate and variance diagnostics:
+    standard error, confidence interval, relative error, effective sample
+    size (Kish) and the largest share of a single weight among the
+    exceeding samples (values close to 1 indicate that the estimate is
+    dominated by a single sample and that the biasing is poorly tuned).
+    """
+    values = np.asarray(values, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    n = len(values)
+
+    weighted_indicators = weights * (values > threshold)
+    probability = weighted_indicators.mean()
+    standard_error = weighted_indicators.std(ddof=1) / math.sqrt(n) if n > 1 else math.inf
+
+    z = statistics.NormalDist().inv_cdf(0.5 + 0.5 * confidence)
+    exceeding_weight = weighted_indicators.sum()
+
+    return {
+        'probability': float(probability),
+        'standard_error': float(standard_error),
+        'confidence_interval': (
+            float(max(probability - z * standard_error, 0.0)),
+            float(probability + z * standard_error),
+        ),
+        'relative_error': float(standard_error / probability) if probability > 0 else math.inf,
+        'effective_sample_size': float(weights.sum() ** 2 / (weights ** 2).sum()) if n else 0.0,
+        'max_weight_share': float(weighted_indicators.max() / exceeding_weight) if exceeding_weight > 0 else math.nan,
+        'num_samples': n,
+        'num_exceeding': int(np.count_nonzero(values > threshold)),
+    }
+
+
+def weighted_exceedance_from_results(results, value_func, threshold, **kwargs):
+    """Same as weighted_exceedance(), but for a list of simulation results."""
+    results = [result for result in results if result is not None and result.succeeded]
+    values = [value_func(result) for result in results]
+    weights = [result.weight for result in results]
+    return weighted_exceedance(values, weights, threshold, **kwargs)
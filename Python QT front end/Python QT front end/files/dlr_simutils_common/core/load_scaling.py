@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import pathlib
+import argparse
+import logging
+import dataclasses
+
+import numpy as np
+
+from . import time_series
+from .heat_balance import ConductorThermalModel
+from .simulation import batch
+import dlr_simutils_common.core.logging
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class ScalingResult:
+    # Largest admissible scale factor found (lower end of the final bracket)
+    scale: float
+
+    # Final bracket: the lower end is admissible, the upper one is not
+    bracket: tuple
+
+    # Maximum core temperature at the admissible scale factor [deg C]
+    max_temperature: float
+
+    # Search statistics
+    rounds: int
+    evaluations: int
+
+
+class LoadScalingSearch:
+    """
+    Parallel k-ary search for the largest factor by which the line load of
+    a data series can be scaled before the core temperature exceeds the
+    critical temperature.
+
+    Each round evaluates k scale factors, evenly spaced within the current
+    bracket, as one parallel batch; the bracket then shrinks to the
+    interval between the largest admissible and the smallest inadmissible
+    candidate, i.e., by a factor of k + 1 per round (a bisection with
+    k = 1). With k = 16 (e.g., one candidate per worker on 16 cores),
+    three rounds narrow the bracket more than twelve bisection steps.
+
+    Each run starts from the thermal state at the end of the warm-up
+    series (by default, the data series itself, i.e., a periodic profile
+    such as a daily load profile), with the line load scaled by the same
+    factor. The warm-up states are propagated with the heat balance model
+    (see core.heat_balance) and cached per scale factor, as are the
+    maximum core temperatures of the evaluated factors.
+    """
+
+    def __init__(
+        self,
+        line_data,
+        data_series,
+        warmup_series=None,
+        num_workers=None,
+        request_options=None,
+        rating_schedule=None,
+    ):
+        self.line_data = line_data
+        self.data_series = {key: np.asarray(data_series[key], dtype=float) for key in batch.DATA_SERIES_KEYS}
+        self.warmup_series = (
+            self.data_series if warmup_series is None
+            else {key: np.asarray(warmup_series[key], dtype=float) for key in batch.DATA_SERIES_KEYS}
+        )
+        self.num_workers = num_workers or os.cpu_count()
+        self.request_options = dict(request_options or {})
+        self.rating_schedule = rating_schedule
+
+        self.critical_temperature = float(line_data['critical_temperature'])
+        self.model = ConductorThermalModel(line_data)
+
+        self._warmupStates = {}  # scale factor -> thermal state
+        self._maxTemperatures = {}  # scale factor -> maximum core temperature (NaN if the simulation failed)
+
+    def _weather(self, data_series):
+        weather = {
+            key: data_series[key]
+            for key in ('ambient_temperature', 'wind_speed', 'solar_irradiance')
+        }
+        weather['wind_direction'] = data_series['wind_direction'] - self.line_data.get('line_orientation', 0.0)
+        return weather
+
+    def warmup_states(self, scales):
+        """Thermal states at the end of the warm-up series for the scale factors (cached)."""
+        pending = np.array([scale for scale in scales if scale not in self._warmupStates], dtype=float)
+        if len(pending):
+            weather = self._weather(self.warmup_series)
+            load = self.warmup_series['line_load']
+            time = self.warmup_series['time']
+
+            # Start in equilibrium with the first row, then follow the series; all factors at once
+            rowWeather = {key: values[0] for key, values in weather.items()}
+            temperature, _ = self.model.steady_state_temperature(pending * load[0], rowWeather)
+            for row in range(len(time) - 1):
+                rowWeather = {key: values[row] for key, values in weather.items()}
+                temperature = self.model.temperature_step(
+                    temperature, pending * load[row], rowWeather, time[row + 1] - time[row],
+                )
+
+            current = pending * load[-1]
+            difference = self.model.core_surface_difference(current, temperature)
+            for scale, surface, core, end_current in zip(pending, temperature, temperature + difference, current):
+                self._warmupStates[scale] = {
+                    'core_temperature': float(core),
+                    'surface_temperature': float(surface),
+                    'current': float(end_current),
+                }
+        return [self._warmupStates[scale] for scale in scales]
+
+    def sample(self, scale, state):
+        data_series = dict(self.data_series)
+        data_series['line_load'] = scale * self.data_series['line_load']
+        return batch.SimulationSample(
+            line_data=self.line_data,
+            data_series=data_series,
+            request_options={**self.request_options, 'initial_state': state},
+            rating_schedule=self.rating_schedule,
+        )
+
+    def evaluate(self, scales):
+        """Maximum core temperatures for the scale factors; new factors are simulated as one parallel batch."""
+        scales = [float(scale) for scale in scales]
+        pending = [scale for scale in dict.fromkeys(scales) if scale not in self._maxTemperatures]
+        if pending:
+            states = self.warmup_states(pending)
+            results = batch.run_batch(
+                [self.sample(scale, state) for scale, state in zip(pending, states)],
+                self.num_workers,
+            )
+            for scale, result in zip(pending, results):
+                if result is None or not result.succeeded:
+                    logger.warning("Simulation at scale factor %g failed!", scale)
+                    self._maxTemperatures[scale] = np.nan
+                else:
+                    self._maxTemperatures[scale] = float(np.nanmax(result.conductor_core_temperature))
+        return np.array([self._maxTemperatures[scale] for scale in scales])
+
+    def initial_upper_bound(self):
+        """
+        Upper bound estimate of the scale factor: twice the factor at which
+        the load reaches the steady-state ampacity (heat balance model).
+        """
+        load = self.data_series['line_load']
+        ampacity = self.model.steady_state_ampacity(self._weather(self.data_series))
+        loaded = load > 0
+        if not loaded.any():
+            raise ValueError("The line load of the data series is zero!")
+        return 2.0 * float(np.min(ampacity[loaded] / load[loaded]))
+
+    def solve(self, precision=1e-3, candidates_per_round=None, bracket=None, max_rounds=20):
+        """
+        Search the largest admissible scale factor to the given (absolute)
+        precision. `candidates_per_round` defaults to the number of
+        workers; `bracket` (lower, upper) defaults to 0 and
+        initial_upper_bound(). If the upper end turns out to be admissible,
+        the bracket is extended upwards.
+
+        Failed simulations count as inadmissible.
+        """
+        k = max(1, candidates_per_round or self.num_workers)
+        lower, upper = bracket if bracket is not None else (0.0, self.initial_upper_bound())
+        lower, upper = float(lower), float(upper)
+        if not upper > lower:
+            raise ValueError(f"Invalid bracket of the scale factor: ({lower}, {upper})!")
+
+        # Rounds after an extension of the bracket (and the first one) include the upper end, to verify that it is
+        # inadmissible
+        verifyUpper = True
+        rounds = 0
+        while True:
+            rounds += 1
+            candidates = lower + (upper - lower) * np.arange(1, k + 1) / (k if verifyUpper else k + 1)
+            temperatures = self.evaluate(candidates)
+            admissible = temperatures <= self.critical_temperature  # NaN (failure) is inadmissible
+
+            # Admissibility is monotonic in the scale factor; the bracket is bounded by the first inadmissible one
+            firstInadmissible = len(candidates) if admissible.all() else int(np.argmin(admissible))
+            width = upper - lower
+            if firstInadmissible > 0:
+                lower = float(candidates[firstInadmissible - 1])
+            if firstInadmissible < len(candidates):
+                upper = float(candidates[firstInadmissible])
+                verifyUpper = False
+            elif verifyUpper:
+                # Even the upper end is admissible: extend the bracket (the upper end is otherwise known to be
+                # inadmissible)
+                upper = lower + max(width, precision)
+                logger.info("Scale factor %g is admissible; extending the bracket to %g.", lower, upper)
+
+            logger.info("Round %d: %d candidates, bracket (%g, %g).", rounds, len(candidates), lower, upper)
+            if (not verifyUpper and upper - lower <= precision) or rounds >= max_rounds:
+                break
+
+        if upper - lower > precision:
+            logger.warning("Search stopped after %d rounds at bracket (%g, %g)!", rounds, lower, upper)
+
+        maxTemperature = self._maxTemperatures.get(lower, np.nan)
+        return ScalingResult(
+            scale=lower,
+            bracket=(lower, upper),
+            max_temperature=maxTemperature,
+            rounds=rounds,
+            evaluations=len(self._maxTemperatures),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find the largest factor by which a load profile can be scaled without overheating the line.",
+    )
+    dlr_simutils_common.core.logging.parser_add_logging_arguments(parser)
+    parser.add_argument('conductor', type=pathlib.Path, help="Conductor definition (JSON) file.")
+    parser.add_argument('data_series', type=pathlib.Path,
+                        help="Weather and load time series (CSV, Parquet or Excel) with columns named after the "
+                             "data series keys; missing weather is taken from the standard weather.")
+    parser.add_argument('--line-altitude', type=float, default=300.0, help="Line altitude [m].")
+    parser.add_argument('--line-orientation', type=float, default=0.0, help="Line orientation [deg].")
+    parser.add_argument('--critical-temperature', type=float, default=None,
+                        help="Critical temperature [deg C]; default: from the conductor definition.")
+    parser.add_argument('--time-step', type=float, default=30, help="Time step of the data series [s].")
+    parser.add_argument('--precision', type=float, default=1e-3, help="Precision of the scale factor.")
+    parser.add_argument('--candidates', type=int, default=None,
+                        help="Scale factors per round (default: number of workers).")
+    parser.add_argument('--workers', type=int, default=None, help="Number of parallel simulations.")
+    args = parser.parse_args()
+
+    dlr_simutils_common.core.logging.setup_logging(args, default_level='INFO')
+
+    with open(args.conductor, 'r') as fp:
+        line_data = json.load(fp)
+    line_data['line_altitude'] = args.line_altitude
+    line_data['line_orientation'] = args.line_orientation
+    if args.critical_temperature is not None:
+        line_data['critical_temperature'] = args.critical_temperature
+
+    data_series = time_series.load_time_series(
+        args.data_series,
+        {key: key for key in batch.DATA_SERIES_KEYS[1:] if key in time_series.column_names(args.data_series)},
+        time_step=args.time_step,
+        defaults=batch.STANDARD_WEATHER,
+    )
+
+    search = LoadScalingSearch(line_data, data_series, num_workers=args.workers)
+    result = search.solve(precision=args.precision, candidates_per_round=args.candidates)
+    logger.info(
+        "Largest admissible scale factor: %.4f (bracket %.4f - %.4f, max. core temperature %.1f deg C); "
+        "%d rounds, %d simulations.",
+        result.scale, *result.bracket, result.max_temperature, result.rounds, result.evaluations,
+    )
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,266 @@
+import sys
+import json
+import pathlib
+import argparse
+import logging
+
+import numpy as np
+
+from . import diter, static_rating
+from .simulation import batch
+import dlr_simutils_common.core.logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Fine setup that the coarsened setups are compared against
+REFERENCE_SETUP = {
+    'num_nodes': 200,
+    'time_step': 5,
+    'inner_num_nodes': 200,
+    'inner_time_step': 5,
+    'max_iterations': 50,
+    'current_precision': 0.25,
+}
+
+# Candidate values of each setup entry, from the finest to the coarsest; entries are coarsened in this order. The
+# first candidate of each entry is the initial (default) value. The durations of the inner simulations are not
+# tuned: they define the quantities (the time horizon of the thermal current, the cap of the time to overheat) rather
+# than their discretization.
+COARSENING_STEPS = (
+    ('num_nodes', (100, 70, 50, 35, 25, 15, 10)),
+    ('time_step', (10, 20, 30, 60)),
+    ('inner_num_nodes', (100, 70, 50, 35, 25, 15, 10)),
+    ('inner_time_step', (10, 20, 30, 60, 120)),
+    ('current_precision', (1, 2, 5)),
+    ('max_iterations', (30, 20, 15, 12)),
+)
+
+# Numerical profile file of a conductor catalog (see profile_path())
+PROFILE_FILENAME = "numerical-profile.json"
+
+DEFAULT_TOLERANCES = {
+    'ampacity': 5.0,  # [A]
+    'conductor_core_temperature': 0.5,  # [deg C]
+    'time_to_overheat': 60.0,  # [s]
+}
+
+
+def max_deviation(values, reference):
+    # Maximal absolute deviation; entries equal on both sides (also infinite or missing) do not deviate
+    values, reference = np.asarray(values, dtype=float), np.asarray(reference, dtype=float)
+    same = (values == reference) | (np.isnan(values) & np.isnan(reference))
+    return float(np.max(np.where(same, 0.0, np.abs(values - reference)), initial=0.0))
+
+
+def tuning_data_series(line_data, time_step=300):
+    """
+    Test scenarios for the convergence study of a conductor: two hours
+    with a load step from 50 % to 100 % of the static thermal limit,
+    under standard weather and under cool, windy weather. Conductors
+    without a static thermal limit use the heat balance estimate.
+    """
+    static_limit = line_data.get('static_thermal_limit')
+    if static_limit is None:
+        static_limit = static_rating.estimated_static_thermal_limit(line_data)
+    cool_weather = {
+        **batch.STANDARD_WEATHER,
+        'ambient_temperature': 10.0,
+        'wind_speed': 3.0,
+        'solar_irradiance': 200.0,
+    }
+
+    scenarios = []
+    for weather in (batch.STANDARD_WEATHER, cool_weather):
+        first = batch.constant_data_series(weather, 0.5 * static_limit, 3600, time_step)
+        second = batch.constant_data_series(weather, static_limit, 3600, time_step)
+        scenarios.append({
+            key: np.concatenate((first[key], second[key][1:] + (3600 if key == 'time' else 0)))
+            for key in batch.DATA_SERIES_KEYS
+        })
+    return scenarios
+
+
+class NumericalSetupTuner:
+    """
+    Convergence study of the numerical setup for a family of conductors.
+
+    Starting from the default setup, the entries are coarsened one after
+    another (see COARSENING_STEPS). For each entry, all candidate values
+    are simulated in one parallel batch (all conductors x all scenarios),
+    and the coarsest value for which it and all finer values stay within
+    the tolerances of the reference results is kept.
+    """
+
+    def __init__(self, conductors, tolerances=None, scenarios=None, num_workers=None):
+        self.conductors = conductors
+        self.tolerances = {**DEFAULT_TOLERANCES, **(tolerances or {})}
+        self.scenarios = scenarios or tuning_data_series
+        self.num_workers = num_workers
+
+        self._cache = {}  # sample key -> result
+
+    def _samples(self, setup):
+        return [
+            batch.SimulationSample(
+                line_data=line_data,
+                data_series=data_series,
+                request_options={'numerical_setup': setup},
+            )
+            for line_data in self.conductors
+            for data_series in self.scenarios(line_data)
+        ]
+
+    def evaluate(self, setups):
+        """Simulate all setups (in one batch); returns list of result lists."""
+        samples = [self._samples(setup) for setup in setups]
+        pending = {}
+        for sample in (sample for setup_samples in samples for sample in setup_samples):
+            key = batch.sample_key(sample)
+            if key not in self._cache:
+                pending.setdefault(key, sample)
+
+        results = batch.run_batch(list(pending.values()), self.num_workers)
+        self._cache.update(zip(pending.keys(), results))
+
+        return [[self._cache[batch.sample_key(sample)] for sample in setup_samples] for setup_samples in samples]
+
+    def errors(self, results, reference):
+        """Maximal absolute deviation of each compared quantity from the reference results."""
+        errors = {}
+        for key in self.tolerances:
+            deviations = []
+            for result, reference_result in zip(results, reference):
+                if result is None or not result.succeeded:
+                    return {key: np.inf for key in self.tolerances}
+                deviations.append(max_deviation(getattr(result, key), getattr(reference_result, key)))
+            errors[key] = float(max(deviations))
+        return errors
+
+    def within_tolerance(self, errors):
+        return all(errors[key] <= tolerance for key, tolerance in self.tolerances.items())
+
+    @staticmethod
+    def elapsed_time(results):
+        return sum(result.elapsed_time for result in results if result is not None)
+
+    def tune(self):
+        """Run the convergence study; returns dictionary with the tuned setup and its diagnostics."""
+        reference, = self.evaluate([REFERENCE_SETUP])
+        if not all(result is not None and result.succeeded for result in reference):
+            raise RuntimeError("Reference simulations failed!")
+
+        # Only the tuned entries go into the profile; the others keep their defaults
+        initial_setup = dict(diter.DEFAULT_NUMERICAL_SETUP)
+        setup = {key: values[0] for key, values in COARSENING_STEPS}
+
+        for key, values in COARSENING_STEPS:
+            candidates = [{**setup, key: value} for value in values]
+            candidate_results = self.evaluate(candidates)
+
+            accepted = None
+            for value, results in zip(values, candidate_results):
+                errors = self.errors(results, reference)
+                if not self.within_tolerance(errors):
+                    break
+                accepted = value
+                logger.debug("%s = %s: errors %r", key, value, errors)
+
+            if accepted is None:
+                logger.warning("Default value of %s exceeds the tolerances; keeping it.", key)
+                accepted = values[0]
+            setup[key] = accepted
+            logger.info("Tuned %s: %s", key, accepted)
+
+        initial_results, tuned_results = self.evaluate([initial_setup, setup])
+        errors = self.errors(tuned_results, reference)
+        speedup = self.elapsed_time(initial_results) / max(self.elapsed_time(tuned_results), 1e-9)
+        logger.info("Tuned setup: %r; errors: %r; speedup: %.1fx", setup, errors, speedup)
+
+        return {
+            'numerical_setup': setup,
+            'errors': errors,
+            'tolerances': self.tolerances,
+            'speedup': speedup,
+        }
+
+
+def profile_path(conductor_dir):
+    # Numerical profile of a catalog: next to the directory with the conductor definitions
+    return pathlib.Path(conductor_dir).parent / PROFILE_FILENAME
+
+
+def load_profile(filename):
+    """
+    Load numerical profile (JSON) that maps conductor families to their
+    tuned setups (see diter.numerical_setup_for_conductor()). Returns an
+    empty profile if the file does not exist.
+    """
+    filename = pathlib.Path(filename)
+    if not filename.is_file():
+        return {'families': {}}
+    try:
+        with open(filename, 'r') as fp:
+            return json.load(fp)
+    except Exception as e:
+        raise RuntimeError(f"Failed to load numerical profile from '{filename}': {e}!")
+
+
+def save_profile(filename, profile):
+    with open(filename, 'w') as fp:
+        json.dump(profile, fp, indent=4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the numerical setup of simulations for a conductor family.")
+    dlr_simutils_common.core.logging.parser_add_logging_arguments(parser)
+    parser.add_argument('family', help="Name of the conductor family.")
+    parser.add_argument('conductor', type=pathlib.Path, nargs='+', help="Conductor definition (JSON) files.")
+    parser.add_argument('--profile', type=pathlib.Path, default=None,
+                        help=f"Numerical profile file to update (defaults to {PROFILE_FILENAME} next to the directory "
+                             f"of the conductor definitions, where the editor looks for it).")
+    parser.add_argument('--ampacity-tolerance', type=float, default=DEFAULT_TOLERANCES['ampacity'],
+                        help="Tolerance of ampacity [A].")
+    parser.add_argument('--temperature-tolerance', type=float,
+                        default=DEFAULT_TOLERANCES['conductor_core_temperature'],
+                        help="Tolerance of the core temperature [deg C].")
+    parser.add_argument('--overheat-tolerance', type=float, default=DEFAULT_TOLERANCES['time_to_overheat'],
+                        help="Tolerance of the time to overheat [s].")
+    parser.add_argument('--altitude', type=float, default=300, help="Line altitude [m].")
+    parser.add_argument('--workers', type=int, default=None, help="Number of parallel simulations.")
+    args = parser.parse_args()
+
+    dlr_simutils_common.core.logging.setup_logging(args, default_level='INFO')
+
+    conductors = []
+    for filename in args.conductor:
+        with open(filename, 'r') as fp:
+            line_data = json.load(fp)
+        line_data.setdefault('line_altitude', args.altitude)
+        line_data.setdefault('line_orientation', 0.0)
+        conductors.append(line_data)
+
+    tuner = NumericalSetupTuner(
+        conductors,
+        tolerances={
+            'ampacity': args.ampacity_tolerance,
+            'conductor_core_temperature': args.temperature_tolerance,
+            'time_to_overheat': args.overheat_tolerance,
+        },
+        num_workers=args.workers,
+    )
+    family = tuner.tune()
+    family['conductors'] = [line_data['name'] for line_data in conductors]
+
+    profileFile = args.profile or profile_path(args.conductor[0].parent)
+    profile = load_profile(profileFile)
+    profile.setdefault('families', {})[args.family] = family
+    save_profile(profileFile, profile)
+    logger.info("Numerical profile written to %s", profileFile)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
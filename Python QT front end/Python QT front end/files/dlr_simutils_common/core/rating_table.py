@@ -0,0 +1,355 @@
+import sys
+import json
+import hashlib
+import pathlib
+import argparse
+import logging
+import itertools
+
+import numpy as np
+
+from .simulation import batch
+import dlr_simutils_common.core.logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Weather axes of the rating table, in order (the leading axes are the line altitude and critical temperature)
+WEATHER_AXES = (
+    'ambient_temperature',  # [deg C]
+    'wind_speed',  # [m/s]
+    'wind_direction',  # [deg], relative to the line (line orientation is 0)
+    'solar_irradiance',  # [W/m^2]
+)
+LINE_AXES = (
+    'line_altitude',  # [m]
+    'critical_temperature',  # [deg C]
+)
+AXES = LINE_AXES + WEATHER_AXES
+
+DEFAULT_AXIS_VALUES = {
+    'line_altitude': [300.0],
+    'critical_temperature': [80.0],
+    'ambient_temperature': list(np.arange(-20, 50, 5.0)),
+    'wind_speed': [0.0, 0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 4.0, 6.0, 8.0, 10.0],
+    'wind_direction': list(np.arange(0, 105, 15.0)),
+    'solar_irradiance': list(np.arange(0, 1100, 100.0)),
+}
+
+# Weather inputs that are not table axes
+DEFAULT_FIXED_WEATHER = {
+    'rain_rate': 0.0,
+    'relative_humidity': batch.STANDARD_WEATHER['relative_humidity'],
+}
+
+
+def table_paths(output_dir, name):
+    # Data array (raw .npy, so that it can be memory-mapped), metadata, and checkpoint files (data, progress, key)
+    output_dir = pathlib.Path(output_dir)
+    return (
+        output_dir / f"{name}.npy",
+        output_dir / f"{name}.json",
+        output_dir / f"{name}.partial.npy",
+        output_dir / f"{name}.progress.npy",
+        output_dir / f"{name}.partial.json",
+    )
+
+
+def checkpoint_key(line_data, axis_values, fixed_weather, points_per_request, request_options):
+    # Content hash of everything the checkpointed values depend on
+    content = json.dumps(
+        {
+            'line_data': line_data,
+            'axis_values': axis_values,
+            'fixed_weather': fixed_weather,
+            'points_per_request': points_per_request,
+            'request_options': request_options or {},
+        },
+        sort_keys=True,
+        default=batch._json_default,
+    )
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def table_name(conductor_name):
+    # Conductor names may contain path separators (e.g., "131-AL1/31-ST1A")
+    return conductor_name.replace('/', '_').replace('\\', '_')
+
+
+def generate_rating_table(
+    line_data,
+    output_dir,
+    axis_values=None,
+    fixed_weather=None,
+    points_per_request=200,
+    batch_size=None,
+    num_workers=None,
+    request_options=None,
+):
+    """
+    Compute ampacity over the grid of line altitude x critical temperature
+    x ambient temperature x wind speed x wind direction x irradiance, and
+    write it as float32 N-D array (.npy) with axis metadata (.json).
+
+    The weather grid points are packed into simulation requests of
+    `points_per_request` entries each (see batch.weather_points_sample()).
+    Requests run in parallel in batches of
+    `batch_size` requests; after each batch, progress is checkpointed so
+    that an interrupted generation resumes where it left off. A
+    checkpoint of a different conductor definition or grid is not
+    resumed. Failed requests are retried by the next run; as long as any
+    remain, the checkpoint is kept and RuntimeError is raised.
+    """
+    axis_values = {**DEFAULT_AXIS_VALUES, **(axis_values or {})}
+    axis_values = {key: np.asarray(sorted(axis_values[key]), dtype=float) for key in AXES}
+    fixed_weather = {**DEFAULT_FIXED_WEATHER, **(fixed_weather or {})}
+
+    name = table_name(line_data['name'])
+    data_file, metadata_file, partial_file, progress_file, key_file = table_paths(output_dir, name)
+    data_file.parent.mkdir(parents=True, exist_ok=True)
+
+    shape = tuple(len(axis_values[key]) for key in AXES)
+    line_shape = shape[:len(LINE_AXES)]
+    num_weather_points = int(np.prod(shape[len(LINE_AXES):]))
+    num_chunks = -(-num_weather_points // points_per_request)
+
+    key = checkpoint_key(line_data, axis_values, fixed_weather, points_per_request, request_options)
+
+    # Open or resume checkpoint
+    if partial_file.is_file() and progress_file.is_file():
+        stored_key = None
+        if key_file.is_file():
+            with open(key_file, 'r') as fp:
+                stored_key = json.load(fp).get('key')
+        if stored_key != key:
+            raise ValueError(
+                f"Checkpoint {partial_file} was generated for a different conductor definition or table setup; "
+                f"remove it to start over!"
+            )
+        table = np.lib.format.open_memmap(partial_file, mode='r+')
+        progress = np.lib.format.open_memmap(progress_file, mode='r+')
+        if table.shape != shape or progress.shape != line_shape + (num_chunks,):
+            raise ValueError(f"Checkpoint {partial_file} does not match the requested table axes!")
+        logger.info("Resuming from checkpoint: %d out of %d requests done.", progress.sum(), progress.size)
+    else:
+        table = np.lib.format.open_memmap(partial_file, mode='w+', dtype=np.float32, shape=shape)
+        table[...] = np.nan
+        progress = np.lib.format.open_memmap(progress_file, mode='w+', dtype=bool, shape=line_shape + (num_chunks,))
+        progress[...] = False
+        with open(key_file, 'w') as fp:
+            json.dump({'key': key}, fp)
+
+    # Weather grid, flattened in C order of the weather axes
+    weather_grid = np.meshgrid(*(axis_values[key] for key in WEATHER_AXES), indexing='ij')
+    weather_grid = {key: values.reshape(-1) for key, values in zip(WEATHER_AXES, weather_grid)}
+
+    # Collect pending requests
+    pending = []
+    samples = []
+    for line_index in itertools.product(*(range(size) for size in line_shape)):
+        altitude, critical_temperature = (axis_values[key][idx] for key, idx in zip(LINE_AXES, line_index))
+
+        sample_line_data = dict(line_data)
+        sample_line_data['line_altitude'] = float(altitude)
+        sample_line_data['line_orientation'] = 0.0  # wind direction axis is relative to the line
+        sample_line_data['critical_temperature'] = float(critical_temperature)
+
+        for chunk in range(num_chunks):
+            if progress[line_index + (chunk,)]:
+                continue
+
+            points = slice(chunk * points_per_request, (chunk + 1) * points_per_request)
+            weather = {key: values[points] for key, values in weather_grid.items()}
+            weather.update(fixed_weather)
+
+            pending.append((line_index, chunk, points))
+            samples.append(batch.weather_points_sample(sample_line_data, weather, request_options))
+
+    logger.info("Rating table %s: %d requests to process.", name, len(samples))
+
+    def store_results(offset, results):
+        for (line_index, chunk, points), result in zip(pending[offset:], results):
+            if result is not None and result.succeeded:
+                table[line_index].reshape(-1)[points] = result.ampacity
+                progress[line_index + (chunk,)] = True
+        table.flush()
+        progress.flush()
+        logger.info("Rating table %s: %d out of %d requests done.", name, progress.sum(), progress.size)
+
+    batch.run_batch_in_chunks(samples, batch_size or len(samples) or 1, num_workers, callback=store_results)
+
+    num_failed = int(progress.size - progress.sum())
+    if num_failed:
+        del table, progress
+        raise RuntimeError(f"Rating table {name}: {num_failed} requests failed; run again to retry them!")
+
+    num_missing = int(np.count_nonzero(np.isnan(table)))
+    if num_missing:
+        logger.warning("Rating table %s: %d grid points failed and are stored as NaN!", name, num_missing)
+
+    # Finalize: move data into place, write metadata, remove checkpoint
+    del table, progress
+    partial_file.replace(data_file)
+    progress_file.unlink()
+    key_file.unlink()
+
+    metadata = {
+        'conductor': line_data['name'],
+        'quantity': 'ampacity',
+        'unit': 'A',
+        'axes': [{'name': key, 'values': axis_values[key].tolist()} for key in AXES],
+        'fixed_weather': fixed_weather,
+    }
+    with open(metadata_file, 'w') as fp:
+        json.dump(metadata, fp, indent=4)
+
+    return data_file
+
+
+def fold_wind_direction(wind_direction):
+    """
+    Fold wind direction relative to the line into the [0, 90] deg range;
+    cooling depends only on the (unsigned) attack angle between the wind
+    and the conductor axis.
+    """
+    return np.degrees(np.arcsin(np.abs(np.sin(np.radians(wind_direction)))))
+
+
+class RatingTable:
+    """
+    Read-only access to a rating table generated by generate_rating_table().
+
+    The data array is memory-mapped, so opening a table is cheap and the
+    pages are shared between all processes that use the same table.
+    Queries are answered by vectorized multilinear interpolation.
+    """
+
+    def __init__(self, data, metadata):
+        self.data = data
+        self.metadata = metadata
+
+        self.axes = [axis['name'] for axis in metadata['axes']]
+        self.axis_values = [np.asarray(axis['values'], dtype=float) for axis in metadata['axes']]
+
+        if tuple(len(values) for values in self.axis_values) != data.shape:
+            raise ValueError("Rating table data does not match its axes!")
+
+        self._flat_data = data.reshape(-1)
+        self._strides = np.array([int(np.prod(data.shape[dim + 1:])) for dim in range(data.ndim)])
+
+    @classmethod
+    def open(cls, data_file):
+        data_file = pathlib.Path(data_file)
+        with open(data_file.with_suffix('.json'), 'r') as fp:
+            metadata = json.load(fp)
+        return cls(np.load(data_file, mmap_mode='r'), metadata)
+
+    @classmethod
+    def open_for_conductor(cls, tables_dir, conductor_name):
+        return cls.open(pathlib.Path(tables_dir) / f"{table_name(conductor_name)}.npy")
+
+    @staticmethod
+    def _locate(axis, values):
+        # Lower cell index and fractional position within the cell along a single axis
+        if len(axis) == 1:
+            index = np.zeros(values.shape, dtype=np.intp)
+            return index, np.zeros(values.shape), values != axis[0]
+
+        index = np.clip(np.searchsorted(axis, values, side='right') - 1, 0, len(axis) - 2)
+        lower = axis[index]
+        fraction = (values - lower) / (axis[index + 1] - lower)
+        out_of_range = ~((fraction >= 0) & (fraction <= 1))  # also catches NaN
+        return index, np.clip(fraction, 0, 1), out_of_range
+
+    def query(self, **values):
+        """
+        Interpolate ampacity for a batch of conditions, given as keyword
+        arguments named after the table axes (scalars or arrays, broadcast
+        together). Line axes with a single value may be omitted.
+
+        Returns (ampacity, out_of_range) arrays; values outside the table
+        range are clamped to its boundary and flagged.
+        """
+        for name, axis in zip(self.axes, self.axis_values):
+            if name not in values:
+                if len(axis) > 1:
+                    raise ValueError(f"Missing value for rating table axis {name!r}!")
+                values[name] = axis[0]
+        if 'wind_direction' in values:
+            values['wind_direction'] = fold_wind_direction(values['wind_direction'])
+
+        arrays = np.broadcast_arrays(*(np.asarray(values[name], dtype=float) for name in self.axes))
+        shape = arrays[0].shape
+
+        base = np.zeros(arrays[0].size, dtype=np.intp)
+        out_of_range = np.zeros(arrays[0].size, dtype=bool)
+        interpolated_dims = []
+        for dim, (axis, array) in enumerate(zip(self.axis_values, arrays)):
+            index, fraction, dim_out_of_range = self._locate(axis, array.reshape(-1))
+            base += index * self._strides[dim]
+            out_of_range |= dim_out_of_range
+            if len(axis) > 1:
+                interpolated_dims.append((self._strides[dim], fraction))
+
+        # Sum over the 2^N corners of the enclosing cell
+        result = np.zeros(base.shape)
+        for corner in itertools.product((0, 1), repeat=len(interpolated_dims)):
+            weight = np.ones(base.shape)
+            offset = 0
+            for bit, (stride, fraction) in zip(corner, interpolated_dims):
+                if bit:
+                    weight *= fraction
+                    offset += stride
+                else:
+                    weight *= 1 - fraction
+            result += weight * self._flat_data[base + offset]
+
+        return result.reshape(shape), out_of_range.reshape(shape)
+
+
+def _parse_axis(text):
+    # Either comma-separated list of values, or start:stop:step range (inclusive)
+    if ':' in text:
+        start, stop, step = (float(value) for value in text.split(':'))
+        return list(np.arange(start, stop + 0.5 * step, step))
+    return [float(value) for value in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate multi-dimensional ampacity rating table for a conductor.")
+    dlr_simutils_common.core.logging.parser_add_logging_arguments(parser)
+    parser.add_argument('conductor', type=pathlib.Path, nargs='+', help="Conductor definition (JSON) file(s).")
+    parser.add_argument('--output-dir', '-o', type=pathlib.Path, default=pathlib.Path('rating-tables'),
+                        help="Output directory.")
+    for key in AXES:
+        parser.add_argument(f"--{key.replace('_', '-')}", type=_parse_axis, default=None, metavar='values',
+                            help=f"Values of the {key} axis (comma-separated list or start:stop:step).")
+    parser.add_argument('--points-per-request', type=int, default=200, help="Grid points per simulation request.")
+    parser.add_argument('--batch-size', type=int, default=None, help="Requests per checkpointed batch.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of parallel simulations.")
+    args = parser.parse_args()
+
+    dlr_simutils_common.core.logging.setup_logging(args, default_level='INFO')
+
+    axis_values = {key: getattr(args, key) for key in AXES if getattr(args, key) is not None}
+
+    for filename in args.conductor:
+        with open(filename, 'r') as fp:
+            line_data = json.load(fp)
+
+        data_file = generate_rating_table(
+            line_data,
+            args.output_dir,
+            axis_values=axis_values,
+            points_per_request=args.points_per_request,
+            batch_size=args.batch_size,
+            num_workers=args.workers,
+        )
+        logger.info("Rating table for %s written to %s", line_data['name'], data_file)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
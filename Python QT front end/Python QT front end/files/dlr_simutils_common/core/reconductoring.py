@@ -0,0 +1,200 @@
+import os
+import sys
+import pathlib
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+from . import conductor_definition, diter
+from .simulation import batch, schedule
+import dlr_simutils_common.core.logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Ranking criteria (column of the comparison table, descending order)
+RANKING_KEYS = ('min_ampacity', 'mean_ampacity', 'static_thermal_limit')
+
+
+class ReconductoringWorker(batch.BatchSimulationWorker):
+    def _createDiterSimulationRequest(self, sample, pbd_file):
+        # Reuse the processor's template request; only the line properties (and the current bracket) differ
+        _, simulationSample = sample
+        self._ratingIndices = self.processor.templateIndices
+
+        request = diter.replace_line_properties(self.processor.templateRequest, simulationSample.line_data)
+
+        currentBracket = self._currentBracket(simulationSample.line_data, self.processor.templateDataSeries)
+        if currentBracket is not None:
+            request.nonlinear_solver_parameters.min_current, request.nonlinear_solver_parameters.max_current = (
+                currentBracket
+            )
+
+        diter.write_request_to_protobuffer(pbd_file, request)
+
+
+class ReconductoringProcessor(batch.BatchSimulationProcessor):
+    """
+    Simulates one data series for a list of conductors. The simulation
+    request (with its measurement block) is generated once, from the first
+    sample; the requests of all samples are copies of it with their own
+    line properties. All samples must therefore share data series, request
+    options and rating schedule; in particular, the numerical setup is
+    the same for all conductors (as is desired for a comparison).
+    """
+
+    def _initializeProcessing(self, samples, numWorkers, deduplicate=True):
+        super()._initializeProcessing(samples, numWorkers, deduplicate)
+
+        self.templateRequest = None
+        if not self.samples:
+            return
+
+        first = self.samples[0]
+        self.templateDataSeries = first.data_series
+        self.templateIndices = None
+        if first.rating_schedule is not None:
+            self.templateDataSeries, self.templateIndices = schedule.compact_data_series(
+                first.data_series,
+                first.rating_schedule,
+            )
+
+        self.templateRequest = diter.generate_simulation_request(
+            first.line_data,
+            batch.data_series_to_measurements(self.templateDataSeries),
+            **first.request_options,
+        )
+
+    def _createWorker(self, index):
+        return ReconductoringWorker(index, self)
+
+
+def unique_definitions(definitions):
+    # Definitions loaded by load_conductor_definitions() are repeated under their aliases
+    return list({definition['name']: definition for definition in definitions.values()}.values())
+
+
+def compare_conductors(
+    definitions,
+    data_series,
+    line_altitude=300.0,
+    line_orientation=0.0,
+    num_workers=None,
+    request_options=None,
+    rating_schedule=None,
+    adaptive_brackets=True,
+    rank_by='min_ampacity',
+):
+    """
+    Rate every conductor (list of definitions, or dictionary as returned
+    by load_conductor_definitions()) under the same data series, in one
+    parallel batch, and return the comparison table (DataFrame) ranked by
+    the `rank_by` column (descending).
+    """
+    if isinstance(definitions, dict):
+        definitions = unique_definitions(definitions)
+    if rank_by not in RANKING_KEYS:
+        raise ValueError(f"Invalid ranking criterion: {rank_by!r}!")
+
+    samples = []
+    for definition in definitions:
+        line_data = dict(definition)
+        line_data['line_altitude'] = line_altitude
+        line_data['line_orientation'] = line_orientation
+        samples.append(batch.SimulationSample(
+            line_data=line_data,
+            data_series=data_series,
+            request_options=dict(request_options or {}),
+            rating_schedule=rating_schedule,
+        ))
+
+    processor = ReconductoringProcessor()
+    processor.adaptiveBrackets = adaptive_brackets
+    logger.info("Rating %d conductors...", len(samples))
+    batch.run_processor(processor, samples, num_workers or os.cpu_count(), False)
+
+    time = np.asarray(data_series['time'], dtype=float)
+    rows = []
+    for sample, result in zip(samples, processor.sampleResults):
+        line_data = sample.line_data
+        row = {
+            'conductor': line_data['name'],
+            'critical_temperature': line_data.get('critical_temperature', np.nan),
+            'static_thermal_limit': line_data.get('static_thermal_limit', np.nan),
+            'min_ampacity': np.nan,
+            'mean_ampacity': np.nan,
+            'max_core_temperature': np.nan,
+            'time_over_critical': np.nan,
+        }
+        if result is not None and result.succeeded:
+            overheated = result.conductor_core_temperature > row['critical_temperature']
+            row.update({
+                'min_ampacity': float(np.min(result.ampacity)),
+                'mean_ampacity': float(np.mean(result.ampacity)),
+                'max_core_temperature': float(np.max(result.conductor_core_temperature)),
+                'time_over_critical': float(np.sum(np.diff(time, append=time[-1])[overheated])),
+            })
+        else:
+            logger.warning("Simulation of conductor %s failed!", line_data['name'])
+        rows.append(row)
+
+    table = pd.DataFrame(rows)
+    table = table.sort_values(rank_by, ascending=False, na_position='last', ignore_index=True)
+    table.insert(0, 'rank', np.arange(1, len(table) + 1))
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare all conductors of a catalog under the same scenario.")
+    dlr_simutils_common.core.logging.parser_add_logging_arguments(parser)
+    parser.add_argument('conductor_dir', type=pathlib.Path, help="Directory with conductor definition (JSON) files.")
+    parser.add_argument('--data-series', type=pathlib.Path, default=None,
+                        help=f"CSV file with the scenario (columns: {', '.join(batch.DATA_SERIES_KEYS)}); "
+                             "if not given, standard weather at constant line load is used.")
+    parser.add_argument('--line-load', type=float, default=500.0,
+                        help="Line load of the standard-weather scenario [A].")
+    parser.add_argument('--duration', type=float, default=3 * 3600,
+                        help="Duration of the standard-weather scenario [s].")
+    parser.add_argument('--altitude', type=float, default=300, help="Line altitude [m].")
+    parser.add_argument('--orientation', type=float, default=0, help="Line orientation [deg].")
+    parser.add_argument('--rank-by', choices=RANKING_KEYS, default='min_ampacity', help="Ranking criterion.")
+    parser.add_argument('--output', '-o', type=pathlib.Path, default=pathlib.Path('reconductoring.csv'),
+                        help="Output (CSV) file.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of parallel simulations.")
+    args = parser.parse_args()
+
+    dlr_simutils_common.core.logging.setup_logging(args, default_level='INFO')
+
+    definitions = conductor_definition.load_conductor_definitions(args.conductor_dir, skip_duplicates=True)
+
+    if args.data_series is not None:
+        data = pd.read_csv(args.data_series)
+        data_series = {key: data[key].to_numpy(dtype=float) for key in batch.DATA_SERIES_KEYS}
+    else:
+        data_series = batch.constant_data_series(
+            batch.STANDARD_WEATHER,
+            args.line_load,
+            duration=args.duration,
+            time_step=60,
+        )
+
+    table = compare_conductors(
+        definitions,
+        data_series,
+        line_altitude=args.altitude,
+        line_orientation=args.orientation,
+        num_workers=args.workers,
+        rating_schedule='changes',
+        rank_by=args.rank_by,
+    )
+    table.to_csv(args.output, index=False)
+    logger.info("Comparison of %d conductors written to %s", len(table), args.output)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import numpy as np
+
+from .simulation import batch
+
+
+def timeline(duration, step=30, start=0):
+    # Time points [s] from `start` to `start + duration` (inclusive), `step` seconds apart
+    return start + np.arange(0, duration + step / 2, step, dtype=float)
+
+
+def step(time, before, after, at=0):
+    # Step from `before` to `after`; the new value applies to the time points after `at`
+    return np.where(np.asarray(time) > at, float(after), float(before))
+
+
+def ramp(time, start_value, end_value, start, end):
+    # Linear ramp between (start, start_value) and (end, end_value), constant outside
+    return np.interp(time, [start, end], [start_value, end_value])
+
+
+def profile(time, times, values, hold=False):
+    """
+    Arbitrary profile given at `times`: linearly interpolated, or held
+    constant from each point to the next (`hold`); constant outside.
+    """
+    times = np.asarray(times, dtype=float)
+    values = np.asarray(values, dtype=float)
+    if not hold:
+        return np.interp(time, times, values)
+    indices = np.clip(np.searchsorted(times, time, side='right') - 1, 0, len(times) - 1)
+    return values[indices]
+
+
+def daily_profile(time, values, start_hour=0.0):
+    """
+    Periodic daily profile (e.g., a load profile), given as equally spaced
+    values over the day (24 hourly values, 96 quarter-hourly values, ...)
+    and linearly interpolated. Time 0 corresponds to `start_hour`.
+    """
+    values = np.asarray(values, dtype=float)
+    interval = 86400.0 / len(values)
+    position = ((np.asarray(time, dtype=float) + start_hour * 3600) % 86400) / interval
+    lower = np.floor(position).astype(int) % len(values)
+    upper = (lower + 1) % len(values)
+    fraction = position - np.floor(position)
+    return (1 - fraction) * values[lower] + fraction * values[upper]
+
+
+class ScenarioBuilder:
+    """
+    Composes a columnar data series (see batch.DATA_SERIES_KEYS) on a
+    common timeline. Columns are assigned from scalars or from arrays
+    built with the functions of this module (which can be added or scaled
+    to compose them); unassigned weather columns are filled from the base
+    weather (standard weather by default), and the line load defaults to 0.
+    """
+
+    def __init__(self, duration=3600, step=30, start=0, base_weather=None):
+        self.time = timeline(duration, step, start)
+        self.base_weather = {**batch.STANDARD_WEATHER, **(base_weather or {})}
+        self.columns = {}
+
+    def set(self, key, values):
+        if key not in batch.DATA_SERIES_KEYS[1:]:
+            raise ValueError(f"Invalid data series key: {key!r}!")
+        self.columns[key] = np.broadcast_to(np.asarray(values, dtype=float), self.time.shape)
+        return self
+
+    def set_weather(self, weather):
+        for key, values in weather.items():
+            self.set(key, values)
+        return self
+
+    def data_series(self):
+        data_series = {'time': self.time}
+        for key in batch.DATA_SERIES_KEYS[1:-1]:
+            data_series[key] = self.columns.get(key, np.full(self.time.shape, float(self.base_weather[key])))
+        data_series['line_load'] = self.columns.get('line_load', np.zeros(self.time.shape))
+        return data_series
+
+
+def step_change_data_series(
+    initial_weather,
+    initial_line_load,
+    changed_weather,
+    changed_line_load,
+    duration=3600,
+    pre_duration=300,
+    time_step=30,
+):
+    """
+    Data series of a step-change scenario: initial weather and line load
+    from -`pre_duration` to 0, changed ones from the next time point on.
+    """
+    builder = ScenarioBuilder(duration + pre_duration, time_step, start=-pre_duration)
+    for key in batch.DATA_SERIES_KEYS[1:-1]:
+        builder.set(key, step(builder.time, initial_weather[key], changed_weather[key]))
+    builder.set('line_load', step(builder.time, initial_line_load, changed_line_load))
+    return builder.data_series()
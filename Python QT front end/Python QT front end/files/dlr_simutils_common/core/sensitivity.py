@@ -0,0 +1,286 @@
+import sys
+import json
+import pathlib
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+from . import conductor_definition
+from .simulation import batch
+import dlr_simutils_common.core.logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Conductor parameters varied by default: material and surface properties that are not determined by the geometry of
+# the conductor (geometry-related fields are fixed by the conductor type).
+DEFAULT_PARAMETERS = (
+    'inner_part_specific_weight',
+    'inner_part_specific_heat',
+    'inner_part_specific_heat_coefficient',
+    'inner_part_resistivity_coefficient',
+    'inner_part_specific_conductivity',
+    'outer_part_specific_weight',
+    'outer_part_specific_heat',
+    'outer_part_specific_heat_coefficient',
+    'outer_part_resistivity_coefficient',
+    'outer_part_specific_conductivity',
+    'emissivity',
+    'absorptivity',
+    'effective_radial_thermal_conductivity',
+    'skin_effect_factor',
+    'wetted_factor',
+    'impinging_factor',
+    'recovery_factor',
+    'rough_surface_correction',
+    'nusselt_base_1',
+    'nusselt_base_2',
+    'nusselt_base_3',
+    'nusselt_exp_1',
+    'nusselt_exp_2',
+    'nusselt_exp_3',
+)
+
+
+def morris_design(num_parameters, num_trajectories, num_levels=4, rng=None):
+    """
+    Generate Morris one-at-a-time design on the unit hypercube.
+
+    Returns (points, order, signs, delta): `points` has the shape
+    (num_trajectories, num_parameters + 1, num_parameters), `order[t]`
+    gives the parameter changed in each step of trajectory t, and
+    `signs[t]` the direction of the change.
+    """
+    rng = rng or np.random.default_rng()
+    delta = num_levels / (2 * (num_levels - 1))
+
+    # Base levels from which a step of +delta stays within the unit interval
+    levels = np.arange(num_levels // 2) / (num_levels - 1)
+
+    points = np.empty((num_trajectories, num_parameters + 1, num_parameters))
+    order = np.empty((num_trajectories, num_parameters), dtype=int)
+    signs = np.empty((num_trajectories, num_parameters))
+    for trajectory in range(num_trajectories):
+        base = rng.choice(levels, num_parameters)
+        order[trajectory] = rng.permutation(num_parameters)
+        signs[trajectory] = rng.choice((-1.0, 1.0), num_parameters)
+
+        point = np.where(signs[trajectory] < 0, base + delta, base)
+        points[trajectory, 0] = point
+        for step, parameter in enumerate(order[trajectory]):
+            point = point.copy()
+            point[parameter] += signs[trajectory, parameter] * delta
+            points[trajectory, step + 1] = point
+
+    return points, order, signs, delta
+
+
+def morris_indices(outputs, order, signs, delta):
+    """
+    Compute Morris elementary-effect statistics from the outputs of
+    shape (num_trajectories, num_parameters + 1). Returns (mu, mu_star,
+    sigma) arrays, in units of output per full parameter range.
+    """
+    num_trajectories, num_parameters = order.shape
+    effects = np.empty((num_trajectories, num_parameters))
+    steps = np.diff(outputs, axis=1)
+    for trajectory in range(num_trajectories):
+        parameters = order[trajectory]
+        effects[trajectory, parameters] = steps[trajectory] / (signs[trajectory, parameters] * delta)
+
+    return (
+        np.nanmean(effects, axis=0),
+        np.nanmean(np.abs(effects), axis=0),
+        np.nanstd(effects, axis=0, ddof=1) if num_trajectories > 1 else np.full(num_parameters, np.nan),
+    )
+
+
+def saltelli_design(num_parameters, num_base_samples, rng=None):
+    """
+    Generate Saltelli design on the unit hypercube: matrices A, B and
+    AB_i (A with i-th column taken from B), stacked into array of shape
+    (num_parameters + 2, num_base_samples, num_parameters).
+    """
+    rng = rng or np.random.default_rng()
+    a = rng.random((num_base_samples, num_parameters))
+    b = rng.random((num_base_samples, num_parameters))
+
+    points = np.empty((num_parameters + 2, num_base_samples, num_parameters))
+    points[0] = a
+    points[1] = b
+    for parameter in range(num_parameters):
+        points[parameter + 2] = a
+        points[parameter + 2, :, parameter] = b[:, parameter]
+
+    return points
+
+
+def sobol_indices(outputs):
+    """
+    Compute first-order (Saltelli 2010) and total (Jansen) Sobol indices
+    from outputs of shape (num_parameters + 2, num_base_samples), as
+    evaluated over saltelli_design(). Returns (first_order, total) arrays.
+    """
+    f_a = outputs[0]
+    f_b = outputs[1]
+    f_ab = outputs[2:]
+
+    variance = np.nanvar(np.concatenate((f_a, f_b)), ddof=1)
+    first_order = np.nanmean(f_b * (f_ab - f_a), axis=1) / variance
+    total = 0.5 * np.nanmean((f_a - f_ab) ** 2, axis=1) / variance
+
+    return first_order, total
+
+
+def mean_ampacity(result):
+    return float(np.nanmean(result.ampacity))
+
+
+class SensitivityAnalysis:
+    """
+    Global sensitivity analysis of a simulation output (by default, the
+    mean ampacity) with respect to conductor parameters.
+
+    Design points on the unit hypercube are scaled to the parameter
+    bounds (intersected with the physically plausible ranges, see
+    conductor_definition.physical_parameter_bounds()), deduplicated, and
+    evaluated in batches of `batch_size` simulations that run in
+    parallel.
+    """
+
+    def __init__(
+        self,
+        line_data,
+        bounds,
+        parameters=DEFAULT_PARAMETERS,
+        data_series=None,
+        metric=mean_ampacity,
+        batch_size=1000,
+        num_workers=None,
+        request_options=None,
+    ):
+        self.line_data = line_data
+        bounds = conductor_definition.physical_parameter_bounds(bounds)
+        self.parameters = [parameter for parameter in parameters if parameter in bounds]
+        self.lower_bounds = np.array([bounds[parameter][0] for parameter in self.parameters])
+        self.upper_bounds = np.array([bounds[parameter][1] for parameter in self.parameters])
+        self.data_series = data_series or batch.constant_data_series(
+            batch.STANDARD_WEATHER,
+            line_load=0,
+            duration=600,
+        )
+        self.metric = metric
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self.request_options = request_options or {}
+
+        skipped = set(parameters) - set(self.parameters)
+        if skipped:
+            logger.warning("No bounds for parameters %s; skipping them!", ', '.join(sorted(skipped)))
+
+    def evaluate(self, unit_points):
+        """Evaluate metric for design points given on the unit hypercube (any leading shape)."""
+        unit_points = np.asarray(unit_points)
+        shape = unit_points.shape[:-1]
+        points = self.lower_bounds + unit_points.reshape(-1, len(self.parameters)) * (
+            self.upper_bounds - self.lower_bounds
+        )
+
+        # Designs (especially Morris trajectories) revisit the same points; evaluate each distinct point once.
+        unique_points, inverse = np.unique(points, axis=0, return_inverse=True)
+        logger.info("Evaluating %d distinct points (out of %d)...", len(unique_points), len(points))
+
+        samples = []
+        for point in unique_points:
+            line_data = dict(self.line_data)
+            line_data.update(zip(self.parameters, point.tolist()))
+            samples.append(batch.SimulationSample(
+                line_data=line_data,
+                data_series=self.data_series,
+                request_options=self.request_options,
+            ))
+
+        results = batch.run_batch_in_chunks(samples, self.batch_size, self.num_workers)
+        values = np.array([
+            self.metric(result) if result is not None and result.succeeded else np.nan
+            for result in results
+        ])
+
+        num_failures = np.count_nonzero(np.isnan(values))
+        if num_failures:
+            logger.warning("%d out of %d evaluations failed and are ignored!", num_failures, len(values))
+
+        return values[inverse.reshape(-1)].reshape(shape)
+
+    def run_morris(self, num_trajectories=20, num_levels=4, seed=None):
+        points, order, signs, delta = morris_design(
+            len(self.parameters),
+            num_trajectories,
+            num_levels,
+            np.random.default_rng(seed),
+        )
+        outputs = self.evaluate(points)
+        mu, mu_star, sigma = morris_indices(outputs, order, signs, delta)
+
+        report = pd.DataFrame({'mu': mu, 'mu_star': mu_star, 'sigma': sigma}, index=self.parameters)
+        return report.sort_values('mu_star', ascending=False)
+
+    def run_sobol(self, num_base_samples=256, seed=None):
+        points = saltelli_design(len(self.parameters), num_base_samples, np.random.default_rng(seed))
+        outputs = self.evaluate(points)
+        first_order, total = sobol_indices(outputs)
+
+        report = pd.DataFrame({'S1': first_order, 'ST': total}, index=self.parameters)
+        return report.sort_values('ST', ascending=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Global sensitivity analysis of ampacity over conductor parameters.")
+    dlr_simutils_common.core.logging.parser_add_logging_arguments(parser)
+    parser.add_argument('conductor', type=pathlib.Path, help="Conductor definition (JSON) file.")
+    parser.add_argument('--bounds', type=pathlib.Path, default=None, help="Parameter bounds file (defaults to "
+                        f"{conductor_definition.PARAMETER_BOUNDS_FILENAME} next to the conductor definition).")
+    parser.add_argument('--range', type=conductor_definition.parse_parameter_range, action='append', default=None,
+                        help="Study range of a parameter, e.g., emissivity=0.5:0.9 (repeatable; narrows the bounds).")
+    parser.add_argument('--method', choices=('morris', 'sobol'), default='morris', help="Analysis method.")
+    parser.add_argument('--num-samples', type=int, default=None, help="Number of Morris trajectories (default: 20) "
+                        "or Saltelli base samples (default: 256).")
+    parser.add_argument('--altitude', type=float, default=300, help="Line altitude [m].")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Number of simulations per batch.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of parallel simulations.")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed.")
+    parser.add_argument('--output', '-o', type=pathlib.Path, default=None, help="Output CSV file.")
+    args = parser.parse_args()
+
+    dlr_simutils_common.core.logging.setup_logging(args, default_level='INFO')
+
+    with open(args.conductor, 'r') as fp:
+        line_data = json.load(fp)
+    line_data.setdefault('line_altitude', args.altitude)
+    line_data.setdefault('line_orientation', 0)
+
+    bounds = conductor_definition.physical_parameter_bounds(
+        conductor_definition.load_parameter_bounds(
+            args.bounds or args.conductor.parent / conductor_definition.PARAMETER_BOUNDS_FILENAME
+        ),
+        dict(args.range or []),
+    )
+
+    analysis = SensitivityAnalysis(line_data, bounds, batch_size=args.batch_size, num_workers=args.workers)
+    if args.method == 'morris':
+        report = analysis.run_morris(args.num_samples or 20, seed=args.seed)
+    else:
+        report = analysis.run_sobol(args.num_samples or 256, seed=args.seed)
+
+    print(report.to_string())
+    if args.output:
+        report.to_csv(args.output, index_label='parameter')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,360 @@
+import os
+import json
+import math
+import hashlib
+import logging
+import dataclasses
+
+from qtpy import QtCore
+import numpy as np
+
+from .. import diter
+from .. import utils
+from . import schedule
+from .processor import SimulationProcessor
+from .result import SimulationResult
+from .worker import SimulationWorker
+
+
+logger = logging.getLogger(__name__)
+
+
+# Keys of the columnar data series block (see diter.generate_simulation_request() for the meaning of each key)
+DATA_SERIES_KEYS = (
+    'time',
+    'ambient_temperature',
+    'wind_speed',
+    'wind_direction',
+    'air_pressure',
+    'rain_rate',
+    'relative_humidity',
+    'solar_irradiance',
+    'line_load',
+)
+
+# Standard weather conditions for static ratings (matches the defaults of the weather parameters widget)
+STANDARD_WEATHER = {
+    'ambient_temperature': 35.0,  # [deg C]
+    'wind_speed': 0.6,  # [m/s]
+    'wind_direction': 90.0,  # [deg]
+    'air_pressure': 981.8,  # [mbar]
+    'rain_rate': 0.0,  # [mm/h]
+    'relative_humidity': 90.0,  # [%]
+    'solar_irradiance': 900.0,  # [W/m^2]
+}
+
+
+@dataclasses.dataclass
+class SimulationSample:
+    # Conductor definition, with line-specific fields (altitude, orientation, critical temperature) filled in
+    line_data: dict
+
+    # Columnar input data; dictionary of equally long lists/arrays, indexed by DATA_SERIES_KEYS
+    data_series: dict
+
+    # Additional keyword arguments for diter.generate_simulation_request()
+    request_options: dict = dataclasses.field(default_factory=dict)
+
+    # Likelihood-ratio weight (see core.importance_sampling)
+    weight: float = 1.0
+
+    # Rows at which ratings are evaluated (see schedule.rating_mask()); the outputs at the remaining rows are
+    # interpolated
+    rating_schedule: object = None
+
+
+@dataclasses.dataclass
+class BatchSimulationResult(SimulationResult):
+    # Index of the sample in the batch
+    sample_index: int = None
+
+    # Timestamps and inputs
+    time: np.ndarray = None
+    line_load: np.ndarray = None
+
+    # Results
+    ampacity: np.ndarray = None
+    time_to_overheat: np.ndarray = None
+    conductor_core_temperature: np.ndarray = None
+
+    # Mask of rows with evaluated (as opposed to interpolated) outputs; None if all rows were evaluated
+    evaluated: np.ndarray = None
+
+    # Model that produced the results ('diter', or the screening model; see multi_fidelity)
+    fidelity: str = 'diter'
+
+
+def _json_default(value):
+    # numpy arrays and scalars
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def sample_key(sample):
+    """
+    Compute content hash of the simulation sample; samples with identical
+    keys yield identical simulation requests (apart from their weight).
+    """
+    content = json.dumps(
+        (sample.line_data, sample.data_series, sample.request_options, sample.rating_schedule),
+        sort_keys=True,
+        default=_json_default,
+    )
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def data_series_to_measurements(data_series):
+    # Convert columnar data into list of measurement entries, as expected by diter.generate_simulation_request()
+    columns = {key: np.asarray(data_series[key], dtype=float).tolist() for key in DATA_SERIES_KEYS}
+    return [
+        dict(zip(columns.keys(), values))
+        for values in zip(*columns.values())
+    ]
+
+
+def constant_data_series(weather, line_load, duration=3600, time_step=30):
+    # Data series with constant weather and line load over the given duration
+    time = np.arange(0, duration + time_step, time_step, dtype=float)
+    data_series = {key: np.full(time.shape, float(weather[key])) for key in DATA_SERIES_KEYS[1:-1]}
+    data_series['time'] = time
+    data_series['line_load'] = np.full(time.shape, float(line_load))
+    return data_series
+
+
+def weather_points_sample(line_data, weather, request_options=None):
+    """
+    Pack independent weather points (dictionary of equally long arrays)
+    into a single simulation sample with zero line load, one measurement
+    point per weather point. Missing weather keys are filled with standard
+    values (air pressure from the line altitude).
+
+    The thermal current at each measurement point is computed by separate
+    inner simulations that start from the same initial state, so it only
+    depends on the weather at that point; this allows evaluating many
+    weather points with a single solver run.
+    """
+    num_points = max(np.size(value) for value in weather.values())
+
+    data_series = {}
+    for key in DATA_SERIES_KEYS[1:-1]:
+        if key in weather:
+            value = weather[key]
+        elif key == 'air_pressure':
+            value = utils.barometric_pressure(line_data['line_altitude'])
+        else:
+            value = STANDARD_WEATHER[key]
+        data_series[key] = np.broadcast_to(np.asarray(value, dtype=float), (num_points,)).copy()
+
+    data_series['time'] = np.arange(num_points) * 10.0
+    data_series['line_load'] = np.zeros(num_points)
+
+    return SimulationSample(
+        line_data=line_data,
+        data_series=data_series,
+        request_options=dict(request_options or {}),
+    )
+
+
+class BatchSimulationWorker(SimulationWorker):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._currentSampleIndex = None
+        self._ratingIndices = None
+
+    def _processSample(self, sample):
+        # Keep track of the sample index, so that even results for failed samples can be mapped back
+        self._currentSampleIndex, _ = sample
+        return super()._processSample(sample)
+
+    def _createResultForErrorMessage(self, error_message):
+        return BatchSimulationResult(
+            succeeded=False,
+            error_message=error_message,
+            sample_index=self._currentSampleIndex,
+        )
+
+    def _initializeSimulationResult(self, sample):
+        index, simulationSample = sample
+        return BatchSimulationResult(
+            sample_index=index,
+            weight=simulationSample.weight,
+            time=np.asarray(simulationSample.data_series['time'], dtype=float),
+            line_load=np.asarray(simulationSample.data_series['line_load'], dtype=float),
+        )
+
+    def _createDiterSimulationRequest(self, sample, pbd_file):
+        _, simulationSample = sample
+
+        # Only rows at which ratings are needed (and input breakpoints) are passed to the solver
+        dataSeries = simulationSample.data_series
+        self._ratingIndices = None
+        if simulationSample.rating_schedule is not None:
+            dataSeries, self._ratingIndices = schedule.compact_data_series(
+                dataSeries,
+                simulationSample.rating_schedule,
+            )
+
+        # Explicitly requested numerical setup takes precedence over the profile
+        options = dict(simulationSample.request_options)
+        if 'numerical_setup' not in options:
+            options['numerical_setup'] = diter.numerical_setup_for_conductor(
+                self.processor.numericalProfile,
+                simulationSample.line_data,
+            )
+        if 'current_bracket' not in options:
+            options['current_bracket'] = self._currentBracket(simulationSample.line_data, dataSeries)
+
+        request = diter.generate_simulation_request(
+            simulationSample.line_data,
+            data_series_to_measurements(dataSeries),
+            **options,
+        )
+        diter.write_request_to_protobuffer(pbd_file, request)
+
+    def _finalizeSimulationResult(self, result, csv_data):
+        result.ampacity = csv_data[' I_th [A]'].to_numpy(dtype=float)
+        result.conductor_core_temperature = csv_data[' T_core [deg C]'].to_numpy(dtype=float)
+        result.time_to_overheat = csv_data[' time_to_overheat [s]'].to_numpy(dtype=float)
+
+        # Map outputs of compacted input back to the original timeline
+        indices = self._ratingIndices
+        if indices is not None and len(indices) < len(result.time):
+            for key in ('ampacity', 'conductor_core_temperature', 'time_to_overheat'):
+                setattr(result, key, schedule.expand_output(getattr(result, key), indices, result.time))
+            result.evaluated = np.zeros(len(result.time), dtype=bool)
+            result.evaluated[indices] = True
+
+
+class BatchSimulationProcessor(SimulationProcessor):
+    """
+    Processes a fixed list of simulation samples (see SimulationSample).
+
+    Identical samples are simulated only once; `sampleResults` holds one
+    result per input sample, in the order of input samples.
+    """
+
+    def _initializeProcessing(self, samples, numWorkers, deduplicate=True):
+        self.samples = list(samples)
+
+        # Group identical samples
+        self.sampleGroups = []  # list of lists of indices into self.samples
+        if deduplicate:
+            groups = {}
+            for index, sample in enumerate(self.samples):
+                groups.setdefault(sample_key(sample), []).append(index)
+            self.sampleGroups = list(groups.values())
+        else:
+            self.sampleGroups = [[index] for index in range(len(self.samples))]
+
+        if len(self.sampleGroups) < len(self.samples):
+            logger.info(
+                "Batch of %d samples contains %d distinct samples.",
+                len(self.samples), len(self.sampleGroups),
+            )
+
+        self.sampleResults = [None] * len(self.samples)
+
+        # Initialize numSamples and numWorkers - required by parent! Always keep at least one worker, so that the
+        # processing finishes (and signals so) even for an empty batch.
+        self.numSamples = len(self.sampleGroups)
+        self.numWorkers = max(1, min(self.numSamples, numWorkers))
+
+        self.numGeneratedSamples = 0
+
+    def _createWorker(self, index):
+        return BatchSimulationWorker(index, self)
+
+    def _createSimulationSample(self):
+        # Called with synchronization lock
+        if self.numGeneratedSamples >= self.numSamples:
+            return None
+
+        group = self.sampleGroups[self.numGeneratedSamples]
+        self.numGeneratedSamples += 1
+
+        # The group's first sample is representative
+        return self.numGeneratedSamples - 1, self.samples[group[0]]
+
+    def onWorkerResultReady(self, result):
+        # Map the result to all samples of the group; duplicates receive a copy with their own weight
+        if result.sample_index is not None:
+            for index in self.sampleGroups[result.sample_index]:
+                self.sampleResults[index] = dataclasses.replace(
+                    result,
+                    sample_index=index,
+                    weight=self.samples[index].weight,
+                )
+            result = self.sampleResults[self.sampleGroups[result.sample_index][0]]
+
+        super().onWorkerResultReady(result)
+
+
+def run_processor(processor, *args, **kwargs):
+    """
+    Run the processor with the given processing arguments and block until
+    it finishes.
+
+    Intended for command-line tools and analysis engines; if there is no
+    Qt application instance yet, a core application is created.
+    """
+    app = QtCore.QCoreApplication.instance()
+    if app is None:
+        app = QtCore.QCoreApplication([])  # noqa: F841 - must be kept alive while the event loop runs
+
+    loop = QtCore.QEventLoop()
+    processor.processingFinished.connect(loop.quit)
+
+    processor.processData(*args, **kwargs)
+    if processor.isActive:
+        loop.exec_()
+
+    processor.processingFinished.disconnect(loop.quit)
+
+
+def run_batch(
+    samples,
+    numWorkers=None,
+    convergenceMonitor=None,
+    deduplicate=True,
+    numericalProfile=None,
+    adaptiveBrackets=False,
+):
+    """
+    Run the simulation samples in parallel and block until done. Returns
+    the list of BatchSimulationResult, one per input sample (None for
+    samples that were never processed, e.g., due to early stopping).
+    """
+    if numWorkers is None:
+        numWorkers = os.cpu_count()
+
+    processor = BatchSimulationProcessor()
+    processor.convergenceMonitor = convergenceMonitor
+    processor.numericalProfile = numericalProfile
+    processor.adaptiveBrackets = adaptiveBrackets
+
+    run_processor(processor, samples, numWorkers, deduplicate)
+
+    numFailures = sum(1 for result in processor.sampleResults if result is not None and not result.succeeded)
+    if numFailures:
+        logger.warning("%d out of %d samples failed to process!", numFailures, len(processor.sampleResults))
+
+    return processor.sampleResults
+
+
+def run_batch_in_chunks(samples, chunkSize, numWorkers=None, deduplicate=True, callback=None):
+    """
+    Run a long list of samples as a sequence of batches of at most
+    `chunkSize` samples (to bound memory use and to allow for intermediate
+    checkpoints via the optional `callback(offset, results)`).
+    """
+    samples = list(samples)
+    results = []
+    numChunks = math.ceil(len(samples) / chunkSize) if samples else 0
+    for chunk in range(numChunks):
+        offset = chunk * chunkSize
+        chunkResults = run_batch(samples[offset:offset + chunkSize], numWorkers, deduplicate=deduplicate)
+        if callback is not None:
+            callback(offset, chunkResults)
+        results += chunkResults
+    return results
@@ -0,0 +1,84 @@
+import numpy as np
+
+from .. import diter
+from ..heat_balance import ConductorThermalModel
+
+
+class CurrentBracketEstimator:
+    """
+    Per-request bisection brackets for the thermal current of a conductor.
+
+    The bracket is centered on the steady-state heat balance ampacity
+    (see core.heat_balance) at the request's measurement points, scaled
+    by a correction factor for the difference between the heat balance
+    and the DiTeR model. Initially, the factor is obtained from the
+    conductor's static thermal limit; after each successful simulation,
+    it is updated from the last thermal current, and the bracket margin
+    is narrowed.
+    """
+
+    def __init__(self, line_data, margin=0.3, adaptive_margin=0.15, min_width=20.0):
+        self.model = ConductorThermalModel(line_data)
+        self.orientation = line_data.get('line_orientation', 0.0)
+        self.margin = margin
+        self.adaptive_margin = adaptive_margin
+        self.min_width = min_width
+
+        self.correction = 1.0
+        self.calibrated = False
+
+        # Static thermal limit is the ampacity at standard weather; placeholder values (e.g., from a definition that
+        # was never rated) would yield an implausible correction and are ignored.
+        static_limit = line_data.get('static_thermal_limit')
+        if static_limit:
+            # Imported here, since batch imports the worker, which imports this module
+            from .batch import STANDARD_WEATHER
+            estimate = float(self.model.steady_state_ampacity(STANDARD_WEATHER))
+            if estimate > 0 and 0.5 <= static_limit / estimate <= 2.0:
+                self.correction = static_limit / estimate
+
+    def estimate(self, data_series):
+        """Heat balance ampacity at the measurement points of the data series."""
+        weather = {
+            key: np.asarray(data_series[key], dtype=float)
+            for key in ('ambient_temperature', 'wind_speed', 'solar_irradiance')
+        }
+        weather['wind_direction'] = np.asarray(data_series['wind_direction'], dtype=float) - self.orientation
+        return self.model.steady_state_ampacity(weather)
+
+    def bracket(self, data_series):
+        """Return (min_current, max_current) for the request, and the heat balance estimates."""
+        estimates = self.estimate(data_series)
+        margin = self.adaptive_margin if self.calibrated else self.margin
+
+        low = (1 - margin) * self.correction * np.min(estimates)
+        high = (1 + margin) * self.correction * np.max(estimates)
+
+        wide_low, wide_high = diter.DEFAULT_CURRENT_BRACKET
+        low = max(wide_low, float(low))
+        high = min(wide_high, max(float(high), low + self.min_width))
+        return (low, high), estimates
+
+    def update(self, ampacity, estimates):
+        """Update the correction factor from the thermal currents of a successful simulation."""
+        ampacity = np.asarray(ampacity, dtype=float)
+        valid = np.isfinite(ampacity) & (estimates > 0)
+        if np.any(valid):
+            index = np.flatnonzero(valid)[-1]
+            self.correction = ampacity[index] / estimates[index]
+            self.calibrated = True
+
+
+def bracket_failed(ampacity, bracket, precision=1.0):
+    """
+    Check whether the thermal currents indicate that the true value lies
+    outside the bracket, i.e., the bisection ended at one of its ends.
+    """
+    ampacity = np.asarray(ampacity, dtype=float)
+    low, high = bracket
+    wide_low, _ = diter.DEFAULT_CURRENT_BRACKET
+    if ampacity.size == 0 or not np.all(np.isfinite(ampacity)):
+        return True
+    if low > wide_low and np.any(ampacity <= low + precision):
+        return True
+    return bool(np.any(ampacity >= high - precision))
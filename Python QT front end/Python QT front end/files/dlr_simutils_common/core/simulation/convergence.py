@@ -0,0 +1,191 @@
+import logging
+import math
+import statistics
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+def _normal_quantile(confidence):
+    # Two-sided critical value of the standard normal distribution
+    return statistics.NormalDist().inv_cdf(0.5 + 0.5 * confidence)
+
+
+class ConvergenceStatistic:
+    """
+    Base class for statistics whose confidence interval is tracked while
+    the simulation results are coming in.
+
+    The `value_func` maps a simulation result into a scalar or an array
+    (e.g., one value per time step); the statistic is converged when the
+    half-width of its confidence interval drops below `tolerance` for all
+    elements. If `relative` is set, the tolerance is relative to the
+    magnitude of the estimate.
+    """
+
+    def __init__(self, name, value_func, tolerance, confidence=0.95, relative=False):
+        self.name = name
+        self.value_func = value_func
+        self.tolerance = tolerance
+        self.confidence = confidence
+        self.relative = relative
+
+        self.reset()
+
+    def reset(self):
+        self._values = []
+        self._weights = []
+
+    @property
+    def num_values(self):
+        return len(self._values)
+
+    def add_result(self, result):
+        value = self.value_func(result)
+        if value is None:
+            return
+        self._values.append(np.asarray(value, dtype=float))
+        self._weights.append(result.weight)
+
+    def _values_array(self):
+        # Stack into (num_samples, ...) array
+        return np.stack(self._values)
+
+    def estimate(self):
+        """Return (estimate, half_width) arrays."""
+        raise NotImplementedError()
+
+    def is_converged(self):
+        if not self._values:
+            return False
+
+        estimate, half_width = self.estimate()
+        tolerance = self.tolerance
+        if self.relative:
+            tolerance = tolerance * np.abs(estimate)
+
+        return bool(np.all(np.isfinite(half_width) & (half_width <= tolerance)))
+
+
+class MeanStatistic(ConvergenceStatistic):
+    def estimate(self):
+        values = self._values_array()
+        n = values.shape[0]
+        mean = values.mean(axis=0)
+        if n < 2:
+            return mean, np.full_like(mean, math.inf)
+        z = _normal_quantile(self.confidence)
+        return mean, z * values.std(axis=0, ddof=1) / math.sqrt(n)
+
+
+class QuantileStatistic(ConvergenceStatistic):
+    """
+    Quantile (e.g., P1 or P5 ampacity) with a distribution-free confidence
+    interval obtained from order statistics.
+    """
+
+    def __init__(self, name, value_func, quantile, tolerance, **kwargs):
+        self.quantile = quantile
+        super().__init__(name, value_func, tolerance, **kwargs)
+
+    def estimate(self):
+        values = self._values_array()
+        n = values.shape[0]
+        p = self.quantile
+        z = _normal_quantile(self.confidence)
+
+        # Ranks of order statistics that bound the quantile (normal
+        # approximation of the binomial distribution)
+        spread = z * math.sqrt(n * p * (1 - p))
+        lower_rank = math.floor(n * p - spread)
+        upper_rank = math.ceil(n * p + spread)
+
+        estimate = np.quantile(values, p, axis=0)
+        if lower_rank < 0 or upper_rank > n - 1:
+            # Not enough samples to bound the quantile
+            return estimate, np.full_like(estimate, math.inf)
+
+        bounds = np.partition(values, (lower_rank, upper_rank), axis=0)
+        half_width = 0.5 * (bounds[upper_rank] - bounds[lower_rank])
+        return estimate, half_width
+
+
+class ExceedanceProbabilityStatistic(ConvergenceStatistic):
+    """
+    Probability that the value exceeds the given threshold (e.g., that the
+    core temperature exceeds the critical temperature).
+
+    Results carrying a likelihood-ratio `weight` (importance sampling) are
+    accounted for by averaging the weighted indicators.
+    """
+
+    def __init__(self, name, value_func, threshold, tolerance, **kwargs):
+        self.threshold = threshold
+        super().__init__(name, value_func, tolerance, **kwargs)
+
+    def estimate(self):
+        indicators = (self._values_array() > self.threshold).astype(float)
+        n = indicators.shape[0]
+
+        weights = np.asarray(self._weights, dtype=float)
+        weighted_indicators = weights.reshape((n,) + (1,) * (indicators.ndim - 1)) * indicators
+
+        probability = weighted_indicators.mean(axis=0)
+        if n < 2:
+            return probability, np.full_like(probability, math.inf)
+
+        # For unit weights, this is the binomial standard error
+        z = _normal_quantile(self.confidence)
+        return probability, z * weighted_indicators.std(axis=0, ddof=1) / math.sqrt(n)
+
+
+class ConvergenceMonitor:
+    """
+    Tracks a set of convergence statistics and decides when the simulation
+    processor may stop issuing new samples.
+
+    The statistics are only evaluated every `check_interval` successful
+    results, and never before `min_samples` results have been collected.
+    """
+
+    def __init__(self, statistics, min_samples=30, check_interval=10):
+        self.statistics = list(statistics)
+        self.min_samples = min_samples
+        self.check_interval = check_interval
+
+        self.reset()
+
+    def reset(self):
+        self.num_results = 0
+        self.converged = False
+        for statistic in self.statistics:
+            statistic.reset()
+
+    def add_result(self, result):
+        if not result.succeeded:
+            return self.converged
+
+        self.num_results += 1
+        for statistic in self.statistics:
+            statistic.add_result(result)
+
+        if self.num_results >= self.min_samples and self.num_results % self.check_interval == 0:
+            self.converged = all(statistic.is_converged() for statistic in self.statistics)
+
+        return self.converged
+
+    def precision(self):
+        """
+        Return the achieved precision as dictionary mapping statistic name
+        to the largest confidence interval half-width.
+        """
+        report = {}
+        for statistic in self.statistics:
+            if not statistic.num_values:
+                report[statistic.name] = math.nan
+                continue
+            _, half_width = statistic.estimate()
+            report[statistic.name] = float(np.max(half_width))
+        return report
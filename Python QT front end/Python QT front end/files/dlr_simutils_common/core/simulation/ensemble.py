@@ -0,0 +1,96 @@
+import logging
+
+import numpy as np
+
+from . import batch
+from ..heat_balance import ConductorThermalModel
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def thermal_state(line_data, result, index=-1):
+    """
+    Thermal state at a row of a simulation result, for use as
+    `initial_state` of diter.generate_simulation_request(). The surface
+    temperature is obtained from the core temperature and the current by
+    the radial temperature difference of the heat balance model.
+    """
+    core_temperature = float(result.conductor_core_temperature[index])
+    current = float(result.line_load[index])
+    difference = float(ConductorThermalModel(line_data).core_surface_difference(current, core_temperature))
+    return {
+        'core_temperature': core_temperature,
+        'surface_temperature': core_temperature - difference,
+        'current': current,
+    }
+
+
+def ensemble_quantiles(results, key, quantiles=DEFAULT_QUANTILES):
+    """Quantiles of an output across ensemble members, at each time point (dictionary quantile -> array)."""
+    values = np.stack([getattr(result, key) for result in results if result is not None and result.succeeded])
+    return dict(zip(quantiles, np.nanquantile(values, quantiles, axis=0)))
+
+
+def run_forecast_ensemble(
+    line_data,
+    history,
+    members,
+    quantiles=DEFAULT_QUANTILES,
+    num_workers=None,
+    request_options=None,
+    rating_schedule=None,
+):
+    """
+    Simulate a weather forecast ensemble that branches off a shared
+    history.
+
+    The `history` data series (observations up to now) is simulated once,
+    without rating evaluations except at input changes, and its end state
+    is captured. Each of the `members` data series (forecasts that start
+    at the end of the history, all on the same timeline) is then
+    simulated from that state in one parallel batch.
+
+    Returns (member_results, statistics); `statistics` maps output keys
+    (ampacity, core temperature) to dictionaries of quantile arrays, and
+    'time' to the common timeline.
+    """
+    request_options = dict(request_options or {})
+
+    historySample = batch.SimulationSample(
+        line_data=line_data,
+        data_series=history,
+        request_options=request_options,
+        rating_schedule='changes',
+    )
+    historyResult, = batch.run_batch([historySample], 1)
+    if historyResult is None or not historyResult.succeeded:
+        raise RuntimeError("Simulation of the shared history failed!")
+
+    state = thermal_state(line_data, historyResult)
+    logger.info("Shared history simulated; end state: %r", state)
+
+    samples = [
+        batch.SimulationSample(
+            line_data=line_data,
+            data_series=member,
+            request_options={**request_options, 'initial_state': state},
+            rating_schedule=rating_schedule,
+        )
+        for member in members
+    ]
+    results = batch.run_batch(samples, num_workers)
+
+    numFailures = sum(1 for result in results if result is None or not result.succeeded)
+    if numFailures == len(results):
+        raise RuntimeError("Simulation of all ensemble members failed!")
+
+    statistics = {
+        key: ensemble_quantiles(results, key, quantiles)
+        for key in ('ampacity', 'conductor_core_temperature')
+    }
+    statistics['time'] = np.asarray(members[0]['time'], dtype=float)
+    return results, statistics
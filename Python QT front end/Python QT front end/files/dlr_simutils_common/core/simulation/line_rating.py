@@ -0,0 +1,130 @@
+import json
+import logging
+import dataclasses
+
+import numpy as np
+
+from . import batch
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class LineRating:
+    time: np.ndarray
+
+    # Minimum ampacity across all spans and the index of the limiting span, at each time point
+    ampacity: np.ndarray
+    limiting_span: np.ndarray
+
+    # Core temperature of the limiting span
+    conductor_core_temperature: np.ndarray
+
+    # Span groups (lists of span indices) that were simulated as one, and the ampacity of each group
+    groups: list
+    group_ampacity: np.ndarray
+
+
+def canonical_sample(sample):
+    """
+    Equivalent sample with line orientation 0 and the wind direction
+    replaced by the attack angle (0 to 90 deg), so that spans which only
+    differ in orientation, but see the same wind relative to the
+    conductor, yield identical samples.
+    """
+    line_data = dict(sample.line_data)
+    orientation = float(line_data.get('line_orientation', 0.0))
+    line_data['line_orientation'] = 0.0
+
+    data_series = dict(sample.data_series)
+    relative = np.radians(np.asarray(data_series['wind_direction'], dtype=float) - orientation)
+    data_series['wind_direction'] = np.degrees(np.arcsin(np.abs(np.sin(relative))))
+
+    return dataclasses.replace(sample, line_data=line_data, data_series=data_series)
+
+
+def group_spans(samples, tolerances=None):
+    """
+    Group span samples whose canonical inputs (see canonical_sample())
+    agree within `tolerances` (dictionary data series key -> maximal
+    absolute difference; keys without tolerance must match exactly) at all
+    time points. Conductor data, request options, rating schedule and the
+    timeline must always be identical.
+
+    Grouping is greedy: each sample joins the first group whose first
+    sample (the representative) it matches. Returns the canonical samples
+    and the list of groups (lists of sample indices).
+    """
+    tolerances = tolerances or {}
+    canonical = [canonical_sample(sample) for sample in samples]
+
+    buckets = {}  # exact key -> list of groups
+    groups = []
+    for index, sample in enumerate(canonical):
+        key = json.dumps(
+            (sample.line_data, sample.request_options, sample.rating_schedule, sample.data_series['time']),
+            sort_keys=True,
+            default=batch._json_default,
+        )
+        series = {
+            name: np.asarray(sample.data_series[name], dtype=float)
+            for name in batch.DATA_SERIES_KEYS[1:]
+        }
+
+        for group in buckets.setdefault(key, []):
+            representative = canonical[group[0]].data_series
+            if all(
+                np.all(np.abs(values - np.asarray(representative[name], dtype=float)) <= tolerances.get(name, 0.0))
+                for name, values in series.items()
+            ):
+                group.append(index)
+                break
+        else:
+            group = [index]
+            buckets[key].append(group)
+            groups.append(group)
+
+    return canonical, groups
+
+
+def run_line_rating(samples, tolerances=None, num_workers=None, adaptive_brackets=False):
+    """
+    Rate a whole line from the samples of its spans (one per span, on a
+    common timeline). Spans are grouped (see group_spans()); one
+    representative per group is simulated, all groups in one parallel
+    batch. The line rating at each time point is the minimum ampacity
+    across the groups.
+
+    With non-zero tolerances, members of a group are rated by their
+    representative; choose the tolerances small compared to the rating
+    margin.
+    """
+    samples = list(samples)
+    canonical, groups = group_spans(samples, tolerances)
+    logger.info("Rating line of %d spans as %d span groups...", len(samples), len(groups))
+
+    results = batch.run_batch(
+        [canonical[group[0]] for group in groups],
+        num_workers,
+        deduplicate=False,
+        adaptiveBrackets=adaptive_brackets,
+    )
+
+    failed = [group[0] for group, result in zip(groups, results) if result is None or not result.succeeded]
+    if failed:
+        raise RuntimeError(f"Simulation of span(s) {failed} failed; the line rating is incomplete!")
+
+    groupAmpacity = np.stack([result.ampacity for result in results])
+    limitingGroup = np.argmin(groupAmpacity, axis=0)
+    columns = np.arange(groupAmpacity.shape[1])
+    coreTemperature = np.stack([result.conductor_core_temperature for result in results])
+
+    return LineRating(
+        time=np.asarray(samples[0].data_series['time'], dtype=float),
+        ampacity=groupAmpacity[limitingGroup, columns],
+        limiting_span=np.array([group[0] for group in groups])[limitingGroup],
+        conductor_core_temperature=coreTemperature[limitingGroup, columns],
+        groups=groups,
+        group_ampacity=groupAmpacity,
+    )
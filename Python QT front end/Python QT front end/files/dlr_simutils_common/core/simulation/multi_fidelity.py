@@ -0,0 +1,150 @@
+import os
+import logging
+
+import numpy as np
+
+from ..heat_balance import ConductorThermalModel
+from .batch import BatchSimulationProcessor, BatchSimulationResult, run_processor
+
+
+logger = logging.getLogger(__name__)
+
+
+def _sample_weather(sample):
+    # Weather inputs of the sample as arrays, with wind direction relative to the line
+    data_series = sample.data_series
+    weather = {
+        key: np.asarray(data_series[key], dtype=float)
+        for key in ('ambient_temperature', 'wind_speed', 'solar_irradiance')
+    }
+    weather['wind_direction'] = (
+        np.asarray(data_series['wind_direction'], dtype=float) - sample.line_data.get('line_orientation', 0.0)
+    )
+    return weather
+
+
+class HeatBalanceScreening:
+    """
+    Screening by the steady-state heat balance (see core.heat_balance):
+    ampacity and the steady-state core temperature at the line load, at
+    each time point of the sample.
+    """
+
+    fidelity = 'heat_balance'
+
+    def evaluate(self, sample):
+        """Return (ampacity, core_temperature, valid) arrays for the sample."""
+        model = ConductorThermalModel(sample.line_data)
+        weather = _sample_weather(sample)
+        line_load = np.asarray(sample.data_series['line_load'], dtype=float)
+
+        ampacity = model.steady_state_ampacity(weather)
+        _, core_temperature = model.steady_state_temperature(line_load, weather)
+        return ampacity, core_temperature, np.ones(ampacity.shape, dtype=bool)
+
+
+class SurrogateScreening:
+    """
+    Screening by a trained surrogate model of a single conductor (see
+    core.surrogate). Only ampacity is predicted; points outside the
+    training range are marked invalid.
+    """
+
+    fidelity = 'surrogate'
+
+    def __init__(self, surrogate):
+        self.surrogate = surrogate
+
+    def evaluate(self, sample):
+        metadata = self.surrogate.metadata
+        for key in ('line_altitude', 'critical_temperature'):
+            if sample.line_data[key] != metadata[key]:
+                raise ValueError(f"Surrogate model was trained for a different {key} than that of the sample!")
+
+        predictions, out_of_range = self.surrogate.predict(**_sample_weather(sample))
+        ampacity = predictions['steady_ampacity']
+        return ampacity, np.full(ampacity.shape, np.nan), ~out_of_range
+
+
+class MultiFidelityProcessor(BatchSimulationProcessor):
+    """
+    Two-stage batch processor: all samples are first evaluated by a cheap
+    screening model, and only the samples that come close to a limit are
+    simulated by DiTeR. A sample is passed on when, at any time point,
+
+    - the screened core temperature is within `temperatureMargin` of the
+      critical temperature,
+    - the line load is within `ratingMargin` of the screened ampacity,
+    - the screened ampacity is within `ratingMargin` of
+      `ratingThreshold` (if given), or
+    - the screening model is not valid (e.g., out of its range).
+
+    `sampleResults` holds results of both stages; the `fidelity` field
+    of each result tells which model produced it.
+    """
+
+    def _initializeProcessing(
+        self,
+        samples,
+        numWorkers,
+        screening,
+        temperatureMargin=10.0,
+        ratingThreshold=None,
+        ratingMargin=50.0,
+        deduplicate=True,
+    ):
+        super()._initializeProcessing(samples, numWorkers, deduplicate)
+
+        # Screen one representative per group; identical samples share the outcome
+        selectedGroups = []
+        for group in self.sampleGroups:
+            sample = self.samples[group[0]]
+            ampacity, coreTemperature, valid = screening.evaluate(sample)
+            lineLoad = np.asarray(sample.data_series['line_load'], dtype=float)
+
+            critical = (
+                ~valid
+                | ~np.isfinite(ampacity)
+                | (coreTemperature >= sample.line_data['critical_temperature'] - temperatureMargin)
+                | (lineLoad >= ampacity - ratingMargin)
+            )
+            if ratingThreshold is not None:
+                critical |= ampacity <= ratingThreshold + ratingMargin
+
+            if np.any(critical):
+                selectedGroups.append(group)
+                continue
+
+            for index in group:
+                self.sampleResults[index] = BatchSimulationResult(
+                    succeeded=True,
+                    elapsed_time=0.0,
+                    weight=self.samples[index].weight,
+                    sample_index=index,
+                    time=np.asarray(sample.data_series['time'], dtype=float),
+                    line_load=lineLoad,
+                    ampacity=ampacity,
+                    time_to_overheat=np.full(ampacity.shape, np.nan),
+                    conductor_core_temperature=coreTemperature,
+                    fidelity=screening.fidelity,
+                )
+
+        logger.info(
+            "Screening (%s): %d out of %d distinct samples passed on to full simulation.",
+            screening.fidelity, len(selectedGroups), len(self.sampleGroups),
+        )
+
+        self.sampleGroups = selectedGroups
+        self.numSamples = len(self.sampleGroups)
+        self.numWorkers = max(1, min(self.numSamples, numWorkers))
+
+
+def run_multi_fidelity(samples, screening, numWorkers=None, **kwargs):
+    """
+    Run the samples through MultiFidelityProcessor and block until done;
+    keyword arguments are passed on to its processing (margins and
+    threshold). Returns the list of results, one per input sample.
+    """
+    processor = MultiFidelityProcessor()
+    run_processor(processor, samples, numWorkers or os.cpu_count(), screening, **kwargs)
+    return processor.sampleResults
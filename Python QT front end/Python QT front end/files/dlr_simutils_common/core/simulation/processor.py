@@ -14,16 +14,32 @@ class SimulationProcessor(QtCore.QObject):
     processingStarted = QtCore.Signal(int, name="processingStarted")
     processingFinished = QtCore.Signal(name="processingFinished")
     processingProgress = QtCore.Signal(int, int, float, name="processingProgress")
+    processingConverged = QtCore.Signal(object, name="processingConverged")
+    processingPrecision = QtCore.Signal(object, name="processingPrecision")
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
         self.abortOnError = False
 
+        # Optional stopping rule (see convergence.ConvergenceMonitor); when set, no new samples are issued once all
+        # tracked statistics reach their tolerance.
+        self.convergenceMonitor = None
+
+        # Optional numerical profile (see core.numerical_setup); tuned setups are used for the conductors it covers
+        self.numericalProfile = None
+
+        # Narrow the bisection range of the thermal current per request (see bracket.CurrentBracketEstimator)
+        self.adaptiveBrackets = False
+
         # Status flags
         self.isActive = False
         self.wasCanceled = False
         self.wasAborted = False
+        self.hasConverged = False
+
+        # Achieved precision of the convergence statistics when processing finished (None without a monitor)
+        self.achievedPrecision = None
 
         self.workers = []
         self.syncLock = threading.Lock()
@@ -62,9 +78,14 @@ class SimulationProcessor(QtCore.QObject):
         self.isActive = True
         self.wasCanceled = False
         self.wasAborted = False
+        self.hasConverged = False
+        self.achievedPrecision = None
 
         self.results = []
 
+        if self.convergenceMonitor is not None:
+            self.convergenceMonitor.reset()
+
         # Create workers
         self.workers = set()
         for i in range(self.numWorkers):
@@ -98,12 +119,23 @@ class SimulationProcessor(QtCore.QObject):
         if not self.workers:
             self.isActive = False
 
+            # Report the achieved precision also if the stopping rule was never met (all samples processed, or
+            # canceled)
+            if self.convergenceMonitor is not None:
+                self.achievedPrecision = self.convergenceMonitor.precision()
+                if not self.hasConverged:
+                    logger.info(
+                        "Processing finished without converging after %d samples (out of %d); achieved precision: %r",
+                        len(self.results), self.numSamples, self.achievedPrecision,
+                    )
+                self.processingPrecision.emit(self.achievedPrecision)
+
             self.processingFinished.emit()
 
     def getNextSimulationSample(self):
         # Called by workers from their threads; synchronize via lock
         with self.syncLock:
-            if not self.isActive or self.wasCanceled or self.wasAborted:
+            if not self.isActive or self.wasCanceled or self.wasAborted or self.hasConverged:
                 return None
 
             # Sample creation is implementation-specific...
@@ -122,6 +154,18 @@ class SimulationProcessor(QtCore.QObject):
 
             return
 
+        # Stopping rule; samples that are already being processed are still collected.
+        if self.convergenceMonitor is not None and not self.hasConverged:
+            if self.convergenceMonitor.add_result(result):
+                self.hasConverged = True
+
+                precision = self.convergenceMonitor.precision()
+                logger.info(
+                    "Processing converged after %d samples (out of %d); achieved precision: %r",
+                    len(self.results), self.numSamples, precision,
+                )
+                self.processingConverged.emit(precision)
+
         # Signal update - use timer to collate results that arrive
         # shortly together
         if not self.progressUpdateTimer.isActive():
@@ -145,6 +189,8 @@ class SimulationProcessor(QtCore.QObject):
             elapsedTime = math.nan  # Cannot estimate
 
         remainingSamples = self.numSamples - len(self.results)
+        if self.hasConverged:
+            remainingSamples = min(remainingSamples, len(self.workers))  # Only the samples in flight
         estimatedTime = elapsedTime * remainingSamples / len(self.workers)
 
         # Update progresss
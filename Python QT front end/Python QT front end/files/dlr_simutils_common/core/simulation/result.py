@@ -8,3 +8,6 @@ class SimulationResult:
     succeeded: bool = False
     error_message: str = None
     elapsed_time: float = math.nan
+
+    # Likelihood-ratio weight of the sample (1 for plain Monte Carlo; see core.importance_sampling)
+    weight: float = 1.0
@@ -0,0 +1,95 @@
+import numpy as np
+
+
+# Input keys of the data series (all but time); see batch.DATA_SERIES_KEYS
+INPUT_KEYS = (
+    'ambient_temperature',
+    'wind_speed',
+    'wind_direction',
+    'air_pressure',
+    'rain_rate',
+    'relative_humidity',
+    'solar_irradiance',
+    'line_load',
+)
+
+
+def breakpoints(data_series, keys=INPUT_KEYS):
+    """
+    Mask of the rows that delimit stretches of constant input: first and
+    last row of each stretch (and of the series). The inputs at all other
+    rows are identical to those of the enclosing breakpoints, so the
+    series can be reduced to the breakpoints without changing the input
+    of the simulation, regardless of how the solver interpolates between
+    measurement points.
+    """
+    columns = np.stack([np.asarray(data_series[key], dtype=float) for key in keys], axis=1)
+    changes = np.any(columns[1:] != columns[:-1], axis=1)
+
+    mask = np.zeros(len(columns), dtype=bool)
+    if len(columns):
+        mask[[0, -1]] = True
+        mask[1:] |= changes  # first row after a change
+        mask[:-1] |= changes  # last row before a change
+    return mask
+
+
+def rating_mask(data_series, schedule=None):
+    """
+    Mask of the rows at which ratings are evaluated. `schedule` is one of:
+
+    - None or 'all': every row,
+    - 'changes': only at the breakpoints of the input (see breakpoints()),
+    - integer N: every N-th row,
+    - sequence of timestamps: rows at the given times (nearest row).
+
+    Breakpoints are always included, since they are needed to reproduce
+    the input.
+    """
+    time = np.asarray(data_series['time'], dtype=float)
+    mask = breakpoints(data_series)
+
+    if schedule is None:
+        mask[:] = True
+    elif isinstance(schedule, str):
+        if schedule == 'all':
+            mask[:] = True
+        elif schedule != 'changes':
+            raise ValueError(f"Invalid rating schedule: {schedule!r}!")
+    elif isinstance(schedule, (int, np.integer)):
+        if schedule < 1:
+            raise ValueError(f"Invalid rating schedule step: {schedule}!")
+        mask[::schedule] = True
+    else:
+        timestamps = np.asarray(schedule, dtype=float)
+        if len(time):
+            indices = np.clip(np.searchsorted(time, timestamps), 0, len(time) - 1)
+            previous = np.maximum(indices - 1, 0)
+            closer = np.abs(time[previous] - timestamps) < np.abs(time[indices] - timestamps)
+            nearest = np.where(closer, previous, indices)
+            mask[nearest] = True
+
+    return mask
+
+
+def compact_data_series(data_series, schedule=None):
+    """
+    Reduce the data series to the rows selected by rating_mask(). Returns
+    the compacted series and the indices of its rows in the original one.
+    """
+    indices = np.flatnonzero(rating_mask(data_series, schedule))
+    compacted = {key: np.asarray(values)[indices] for key, values in data_series.items()}
+    return compacted, indices
+
+
+def expand_output(values, indices, time):
+    """
+    Map output values at the compacted rows (`indices`) back to the
+    original timeline `time`, by linear interpolation in time between the
+    evaluated rows.
+    """
+    values = np.asarray(values, dtype=float)
+    time = np.asarray(time, dtype=float)
+    if len(indices) == len(time):
+        return values
+    return np.interp(time, time[indices], values)
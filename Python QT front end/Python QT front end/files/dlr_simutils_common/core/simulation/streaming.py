@@ -0,0 +1,249 @@
+import os
+import time
+import logging
+
+from qtpy import QtCore
+import numpy as np
+
+from .. import static_rating, utils
+from ..heat_balance import ConductorThermalModel
+from . import batch
+
+
+logger = logging.getLogger(__name__)
+
+
+# Weather keys used by the heat balance model; the remaining ones are only passed on to re-anchoring simulations
+HEAT_BALANCE_KEYS = ('ambient_temperature', 'wind_speed', 'wind_direction', 'solar_irradiance')
+
+
+class StreamingRatingEngine(QtCore.QObject):
+    """
+    Real-time rating of many line spans from live weather and load ticks.
+
+    The thermal state of all spans is kept as arrays (one entry per span)
+    and advanced together at each tick by the vectorized lumped heat
+    balance (see core.heat_balance). Each tick yields the steady-state
+    ampacity and, if the tick budget allows it, the transient ampacity
+    over `transientHorizon` seconds from the current state.
+
+    To bound the drift of the simplified model, the engine periodically
+    re-anchors a round-robin subset of spans against DiTeR: the recent
+    history of each span (kept in a ring buffer) is simulated in the
+    background, starting from the engine's state at the beginning of
+    the window. The deviation of the core temperature at the end of the
+    window corrects the state, and the ratio of the DiTeR thermal current
+    to the heat balance ampacity scales the span's subsequent ratings.
+    Re-anchoring requires a running Qt event loop.
+    """
+
+    ratingsReady = QtCore.Signal(float, object, name="ratingsReady")
+    reanchored = QtCore.Signal(object, name="reanchored")
+
+    def __init__(
+        self,
+        spans,
+        tickBudget=1.0,
+        transientHorizon=900,
+        historyLength=120,
+        reanchorInterval=3600,
+        reanchorSpans=None,
+        numWorkers=None,
+        *args,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+
+        self.spans = list(spans)
+        self.model = ConductorThermalModel(self.spans)
+        self.orientation = np.array([span.get('line_orientation', 0.0) for span in self.spans], dtype=float)
+        self.altitude = self.model.altitude
+
+        self.tickBudget = tickBudget
+        self.transientHorizon = transientHorizon
+        self.reanchorInterval = reanchorInterval
+        self.numWorkers = numWorkers or os.cpu_count()
+        self.reanchorSpans = reanchorSpans or 4 * self.numWorkers
+
+        numSpans = len(self.spans)
+
+        # Thermal state
+        self.time = None
+        self.temperature = None  # lumped conductor temperature [deg C]
+        self.correction = np.ones(numSpans)  # rating correction factor from re-anchoring
+
+        # Ring buffer of recent inputs and states
+        self.historyLength = historyLength
+        self._historyTime = np.zeros(historyLength)
+        self._history = {
+            key: np.zeros((historyLength, numSpans))
+            for key in batch.DATA_SERIES_KEYS[1:] + ('temperature',)
+        }
+        self._historyCount = 0
+
+        # Re-anchoring
+        self._processor = batch.BatchSimulationProcessor()
+        self._processor.processingFinished.connect(self.onReanchoringFinished)
+        self._lastReanchorTime = None
+        self._nextReanchorSpan = 0
+        self._anchorReference = None
+
+        self._transientCost = 0.0  # duration of the last transient rating evaluation [s]
+
+    def _spanWeather(self, weather):
+        # Broadcast weather inputs to spans and fill in the ones that are not measured
+        numSpans = len(self.spans)
+        weather = {key: np.broadcast_to(np.asarray(value, dtype=float), (numSpans,)) for key, value in weather.items()}
+        if 'air_pressure' not in weather:
+            weather['air_pressure'] = utils.barometric_pressure(self.altitude)
+        for key in ('rain_rate', 'relative_humidity'):
+            weather.setdefault(key, np.full(numSpans, batch.STANDARD_WEATHER[key]))
+        return weather
+
+    def _relativeWeather(self, weather):
+        # Heat balance inputs, with wind direction relative to the span
+        relative = {key: weather[key] for key in HEAT_BALANCE_KEYS}
+        relative['wind_direction'] = weather['wind_direction'] - self.orientation
+        return relative
+
+    def _record(self, timestamp, weather, lineLoad):
+        row = self._historyCount % self.historyLength
+        self._historyTime[row] = timestamp
+        for key in batch.DATA_SERIES_KEYS[1:-1]:
+            self._history[key][row] = weather[key]
+        self._history['line_load'][row] = lineLoad
+        self._history['temperature'][row] = self.temperature
+        self._historyCount += 1
+
+    def transientAmpacity(self, weather, iterations=12):
+        """
+        Current that brings the core to the critical temperature within
+        `transientHorizon` seconds from the current state (lumped model).
+        """
+        lower = np.zeros(len(self.spans))
+        upper = 3 * np.maximum(self.model.steady_state_ampacity(weather), 1.0)
+        for _ in range(iterations):
+            middle = 0.5 * (lower + upper)
+            temperature = self.model.temperature_step(self.temperature, middle, weather, self.transientHorizon)
+            core = temperature + self.model.core_surface_difference(middle, temperature)
+            tooHot = core > self.model.critical_temperature
+            upper = np.where(tooHot, middle, upper)
+            lower = np.where(tooHot, lower, middle)
+        return lower
+
+    def tick(self, timestamp, weather, lineLoad):
+        """
+        Advance all spans to `timestamp` with the given weather (dictionary
+        of per-span arrays or scalars; wind direction is absolute) and line
+        load, and return the ratings (dictionary of per-span arrays).
+        """
+        start = time.perf_counter()
+
+        weather = self._spanWeather(weather)
+        lineLoad = np.broadcast_to(np.asarray(lineLoad, dtype=float), (len(self.spans),))
+        relative = self._relativeWeather(weather)
+
+        if self.temperature is None:
+            self.temperature, _ = self.model.steady_state_temperature(lineLoad, relative)
+        elif timestamp > self.time:
+            self.temperature = self.model.temperature_step(
+                self.temperature, lineLoad, relative, timestamp - self.time
+            )
+        self.time = timestamp
+        self._record(timestamp, weather, lineLoad)
+
+        ratings = {
+            'ampacity': self.correction * self.model.steady_state_ampacity(relative),
+            'conductor_core_temperature': self.temperature + self.model.core_surface_difference(
+                lineLoad, self.temperature
+            ),
+            'transient_ampacity': np.full(len(self.spans), np.nan),
+        }
+
+        # Transient ratings only if they fit into the tick budget
+        elapsed = time.perf_counter() - start
+        if elapsed + self._transientCost <= self.tickBudget:
+            transientStart = time.perf_counter()
+            ratings['transient_ampacity'] = self.correction * self.transientAmpacity(relative)
+            self._transientCost = time.perf_counter() - transientStart
+        else:
+            logger.debug("Tick budget exceeded; skipping transient ratings.")
+            self._transientCost *= 0.5  # retry eventually, in case the last measurement was an outlier
+
+        self.ratingsReady.emit(timestamp, ratings)
+
+        if self._lastReanchorTime is None:
+            self._lastReanchorTime = timestamp
+        elif timestamp - self._lastReanchorTime >= self.reanchorInterval and not self._processor.isActive:
+            self._lastReanchorTime = timestamp
+            self.startReanchoring()
+
+        return ratings
+
+    def startReanchoring(self):
+        """Submit the recent history of the next subset of spans to DiTeR (in the background)."""
+        numRows = min(self._historyCount, self.historyLength)
+        if numRows < 2:
+            return
+
+        rows = (np.arange(numRows) + self._historyCount - numRows) % self.historyLength
+        spanIndices = (self._nextReanchorSpan + np.arange(min(self.reanchorSpans, len(self.spans)))) % len(self.spans)
+        self._nextReanchorSpan = int(spanIndices[-1] + 1) % len(self.spans)
+
+        timestamps = self._historyTime[rows]
+
+        # Simulations start from the engine's state at the beginning of the window
+        startTemperature = self._history['temperature'][rows[0]]
+        startLoad = self._history['line_load'][rows[0]]
+        startDifference = self.model.core_surface_difference(startLoad, startTemperature)
+
+        samples = []
+        for span in spanIndices:
+            dataSeries = {key: self._history[key][rows, span] for key in batch.DATA_SERIES_KEYS[1:]}
+            dataSeries['time'] = timestamps
+            initialState = {
+                'core_temperature': float(startTemperature[span] + startDifference[span]),
+                'surface_temperature': float(startTemperature[span]),
+                'current': float(startLoad[span]),
+            }
+            samples.append(batch.SimulationSample(
+                line_data=self.spans[span],
+                data_series=dataSeries,
+                # Steady-state horizon, so that the thermal current compares to the engine's steady-state ampacity
+                request_options={
+                    'initial_state': initialState,
+                    'inner_simulation_duration': static_rating.STEADY_STATE_HORIZON,
+                },
+                rating_schedule=timestamps[-1:],
+            ))
+
+        # Engine's core temperature and (uncorrected) ampacity at the end of the window, for comparison
+        lastRow = rows[-1]
+        lastWeather = self._relativeWeather({key: self._history[key][lastRow] for key in HEAT_BALANCE_KEYS})
+        lastTemperature = self._history['temperature'][lastRow]
+        lastLoad = self._history['line_load'][lastRow]
+        lastCore = lastTemperature + self.model.core_surface_difference(lastLoad, lastTemperature)
+        self._anchorReference = (
+            spanIndices,
+            lastCore[spanIndices],
+            self.model.steady_state_ampacity(lastWeather)[spanIndices],
+        )
+
+        logger.info("Re-anchoring %d spans against DiTeR...", len(samples))
+        self._processor.processData(samples, self.numWorkers, False)
+
+    def onReanchoringFinished(self):
+        spanIndices, referenceCore, referenceAmpacity = self._anchorReference
+        anchored = []
+        for span, result, core, ampacity in zip(
+            spanIndices, self._processor.sampleResults, referenceCore, referenceAmpacity
+        ):
+            if result is None or not result.succeeded:
+                continue
+            self.temperature[span] += result.conductor_core_temperature[-1] - core
+            if ampacity > 0 and np.isfinite(result.ampacity[-1]):
+                self.correction[span] = result.ampacity[-1] / ampacity
+            anchored.append(int(span))
+
+        logger.info("Re-anchored %d out of %d spans.", len(anchored), len(spanIndices))
+        self.reanchored.emit(anchored)
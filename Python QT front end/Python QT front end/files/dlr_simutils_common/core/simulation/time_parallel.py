@@ -0,0 +1,134 @@
+import os
+import logging
+import dataclasses
+
+import numpy as np
+
+from . import batch
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_OVERLAP_TOLERANCES = {
+    'conductor_core_temperature': 0.5,  # [deg C]
+    'ampacity': 5.0,  # [A]
+}
+
+
+@dataclasses.dataclass
+class Chunk:
+    # Rows of the original series covered by the chunk's data series: warm-up rows [start, own_start), followed by
+    # the chunk's own rows [own_start, stop)
+    start: int
+    own_start: int
+    stop: int
+
+    # First row of the overlap validation window (within the warm-up rows)
+    validation_start: int
+
+
+def split_series(time, num_chunks, warmup_duration, validation_duration):
+    """
+    Split the timeline into `num_chunks` consecutive chunks of (roughly)
+    equal length. Each chunk but the first is preceded by warm-up rows
+    covering `warmup_duration` seconds of the previous data; the last
+    `validation_duration` seconds of the warm-up are compared against
+    the previous chunk when stitching.
+    """
+    time = np.asarray(time, dtype=float)
+    num_chunks = max(1, min(num_chunks, len(time)))
+    bounds = np.linspace(0, len(time), num_chunks + 1).round().astype(int)
+
+    chunks = []
+    for own_start, stop in zip(bounds[:-1], bounds[1:]):
+        start = own_start
+        validation_start = own_start
+        if own_start > 0:
+            start = int(np.searchsorted(time, time[own_start] - warmup_duration))
+            validation_start = max(start, int(np.searchsorted(time, time[own_start] - validation_duration)))
+        chunks.append(Chunk(int(start), int(own_start), int(stop), int(validation_start)))
+    return chunks
+
+
+def run_time_parallel(
+    line_data,
+    data_series,
+    num_chunks=None,
+    warmup_duration=6 * 3600,
+    validation_duration=3600,
+    presimulation_time=7200,
+    tolerances=None,
+    num_workers=None,
+    request_options=None,
+):
+    """
+    Simulate a long data series as parallel chunks with overlapping
+    warm-up windows (see split_series()), and stitch the outputs.
+
+    Each chunk starts `presimulation_time` seconds early from the first
+    warm-up row, so that its thermal state has converged when its own
+    rows begin. Ratings are only evaluated at the chunk's own rows and in
+    the validation window. In the validation window, the outputs of each
+    chunk are compared with those of the previous chunk; deviations above
+    `tolerances` are reported (consider a longer warm-up).
+
+    Returns the stitched BatchSimulationResult and a list with the
+    maximal overlap deviations at each chunk boundary.
+    """
+    time = np.asarray(data_series['time'], dtype=float)
+    tolerances = {**DEFAULT_OVERLAP_TOLERANCES, **(tolerances or {})}
+    chunks = split_series(time, num_chunks or os.cpu_count(), warmup_duration, validation_duration)
+
+    samples = []
+    for chunk in chunks:
+        rows = slice(chunk.start, chunk.stop)
+        samples.append(batch.SimulationSample(
+            line_data=line_data,
+            data_series={key: np.asarray(values)[rows] for key, values in data_series.items()},
+            request_options={**(request_options or {}), 'presimulation_time': presimulation_time},
+            rating_schedule=time[chunk.validation_start:chunk.stop],
+        ))
+
+    logger.info("Simulating %d rows as %d parallel chunks...", len(time), len(chunks))
+    results = batch.run_batch(samples, num_workers, deduplicate=False)
+
+    failed = [idx for idx, result in enumerate(results) if result is None or not result.succeeded]
+    if failed:
+        raise RuntimeError(f"Simulation of chunk(s) {failed} failed!")
+
+    # Overlap validation
+    deviations = []
+    for index in range(1, len(chunks)):
+        chunk, previousChunk = chunks[index], chunks[index - 1]
+        deviation = {}
+        for key in tolerances:
+            values = getattr(results[index], key)[chunk.validation_start - chunk.start:chunk.own_start - chunk.start]
+            previousValues = getattr(results[index - 1], key)[
+                chunk.validation_start - previousChunk.start:chunk.own_start - previousChunk.start
+            ]
+            deviation[key] = float(np.max(np.abs(values - previousValues), initial=0.0))
+        deviations.append(deviation)
+
+        if any(deviation[key] > tolerance for key, tolerance in tolerances.items()):
+            logger.warning(
+                "Chunk boundary at t=%g: overlap deviation %r exceeds tolerances; the warm-up is too short!",
+                time[chunk.own_start], deviation,
+            )
+
+    # Stitch the own rows of the chunks
+    stitched = {
+        key: np.concatenate([
+            getattr(result, key)[chunk.own_start - chunk.start:]
+            for chunk, result in zip(chunks, results)
+        ])
+        for key in ('ampacity', 'conductor_core_temperature', 'time_to_overheat')
+    }
+    result = batch.BatchSimulationResult(
+        succeeded=True,
+        elapsed_time=sum(result.elapsed_time for result in results),
+        time=time,
+        line_load=np.asarray(data_series['line_load'], dtype=float),
+        **stitched,
+    )
+    return result, deviations
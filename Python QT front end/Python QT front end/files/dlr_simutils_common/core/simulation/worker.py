@@ -1,3 +1,4 @@
+import json
 import logging
 import threading
 import pathlib
@@ -6,9 +7,11 @@ import tempfile
 import time
 
 from qtpy import QtCore
+import numpy as np
 import pandas as pd
 
 from .. import diter
+from . import bracket
 
 
 logger = logging.getLogger(__name__)
@@ -25,6 +28,13 @@ class SimulationWorker(QtCore.QObject):
         self.processor = processor
 
         self.dtr_process = None
+
+        # Adaptive thermal current brackets (see bracket.CurrentBracketEstimator), per conductor
+        self._bracketEstimators = {}
+        self._bracket = None
+        self._bracketState = None
+        self._useWideBracket = False
+
         self.thread = threading.Thread(target=self._processingLoop, daemon=True)
         self.thread.name = f"Processing worker thread #{worker_id}"
 
@@ -75,7 +85,53 @@ class SimulationWorker(QtCore.QObject):
         logger.debug("Worker #%i exited its processing loop!", self.worker_id)
         self.workerFinished.emit()
 
+    def _currentBracket(self, lineData, dataSeries):
+        # Bisection bracket for the simulation request of the sample; called by implementation-specific
+        # _createDiterSimulationRequest(). None means the default (wide) range.
+        self._bracket = None
+        if not self.processor.adaptiveBrackets or self._useWideBracket:
+            return None
+
+        key = json.dumps(lineData, sort_keys=True)
+        estimator = self._bracketEstimators.get(key)
+        if estimator is None:
+            try:
+                estimator = bracket.CurrentBracketEstimator(lineData)
+            except KeyError as e:
+                logger.warning("Cannot estimate thermal current bracket (missing field %s); using default range!", e)
+                return None
+            self._bracketEstimators[key] = estimator
+
+        self._bracket, estimates = estimator.bracket(dataSeries)
+        self._bracketState = estimator, estimates
+        return self._bracket
+
     def _processSample(self, sample):
+        self._useWideBracket = False
+        self._bracket = None
+        result = self._simulateSample(sample)
+
+        if self._bracket is not None:
+            estimator, estimates = self._bracketState
+            if not result.succeeded or bracket.bracket_failed(result.ampacity, self._bracket):
+                logger.debug(
+                    "Worker #%i: thermal current bracket %r failed; repeating with default range...",
+                    self.worker_id, self._bracket,
+                )
+                elapsedTime = result.elapsed_time
+                self._useWideBracket = True
+                result = self._simulateSample(sample)
+                result.elapsed_time += elapsedTime
+            if result.succeeded:
+                # Estimates refer to the evaluated rows only (the outputs at the other rows are interpolated)
+                ampacity = np.asarray(result.ampacity, dtype=float)
+                if getattr(result, 'evaluated', None) is not None:
+                    ampacity = ampacity[np.asarray(result.evaluated, dtype=bool)]
+                estimator.update(ampacity, estimates)
+
+        return result
+
+    def _simulateSample(self, sample):
         # Process the sample
         start_time = time.time()
 
@@ -0,0 +1,110 @@
+import sys
+import json
+import pathlib
+import argparse
+import logging
+
+import numpy as np
+
+from . import conductor_definition
+from .heat_balance import ConductorThermalModel
+from .simulation import batch
+import dlr_simutils_common.core.logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Line altitude of the standard conditions [m] (the air pressure is given by STANDARD_WEATHER)
+STANDARD_LINE_ALTITUDE = 300.0
+
+# Horizon of the thermal current [s]; long enough for the conductor to reach its steady state
+STEADY_STATE_HORIZON = 6 * 3600
+
+
+def static_rating_sample(line_data, critical_temperature=None):
+    """
+    Simulation sample for the static thermal limit of a conductor: the
+    steady-state thermal current under standard weather (see
+    batch.STANDARD_WEATHER) at the conductor's critical temperature.
+    """
+    line_data = dict(line_data)
+    line_data['line_altitude'] = STANDARD_LINE_ALTITUDE
+    line_data['line_orientation'] = 0.0
+    if critical_temperature is not None:
+        line_data['critical_temperature'] = critical_temperature
+
+    return batch.weather_points_sample(
+        line_data,
+        batch.STANDARD_WEATHER,
+        request_options={'inner_simulation_duration': STEADY_STATE_HORIZON},
+    )
+
+
+def estimated_static_thermal_limit(line_data):
+    """
+    Heat balance estimate of the static thermal limit [A] (see
+    core.heat_balance), as a placeholder until the simulated limit is
+    available.
+    """
+    line_data = {**line_data, 'line_altitude': STANDARD_LINE_ALTITUDE}
+    return float(ConductorThermalModel(line_data).steady_state_ampacity(batch.STANDARD_WEATHER))
+
+
+def static_thermal_limit(result):
+    # Static thermal limit [A] from the result of the static rating sample; None if the simulation failed
+    if result is None or not result.succeeded or not np.isfinite(result.ampacity[0]):
+        return None
+    return float(result.ampacity[0])
+
+
+def compute_static_thermal_limits(definitions, num_workers=None):
+    """Compute the static thermal limits of the conductor definitions (list) in one parallel batch."""
+    results = batch.run_batch([static_rating_sample(definition) for definition in definitions], num_workers)
+    return [static_thermal_limit(result) for result in results]
+
+
+def update_catalog(data_dir, num_workers=None, dry_run=False):
+    """
+    Recompute the static thermal limits of all conductor definitions in
+    the directory and write them back into the definition files. Returns
+    a dictionary mapping conductor names to (old, new) limits.
+    """
+    files = conductor_definition.load_definition_files(pathlib.Path(data_dir))
+
+    logger.info("Computing static thermal limits of %d conductors...", len(files))
+    limits = compute_static_thermal_limits(list(files.values()), num_workers)
+
+    changes = {}
+    for (filename, definition), limit in zip(files.items(), limits):
+        if limit is None:
+            logger.warning("Failed to compute static thermal limit of %s!", definition['name'])
+            continue
+        changes[definition['name']] = (definition.get('static_thermal_limit'), limit)
+        if not dry_run:
+            definition['static_thermal_limit'] = round(limit, 1)
+            with open(filename, 'w') as fp:
+                json.dump(definition, fp, indent=4)
+
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute static thermal limits of a conductor catalog.")
+    dlr_simutils_common.core.logging.parser_add_logging_arguments(parser)
+    parser.add_argument('conductor_dir', type=pathlib.Path, help="Directory with conductor definition (JSON) files.")
+    parser.add_argument('--dry-run', action='store_true', help="Only report the limits; do not update the files.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of parallel simulations.")
+    args = parser.parse_args()
+
+    dlr_simutils_common.core.logging.setup_logging(args, default_level='INFO')
+
+    changes = update_catalog(args.conductor_dir, args.workers, args.dry_run)
+    for name, (old, new) in changes.items():
+        logger.info("%s: %s A -> %.1f A", name, old, new)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
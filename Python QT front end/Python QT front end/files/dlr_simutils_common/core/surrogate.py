@@ -0,0 +1,368 @@
+import sys
+import json
+import pathlib
+import argparse
+import logging
+import itertools
+
+import numpy as np
+
+from . import static_rating
+from .simulation import batch
+from .rating_table import fold_wind_direction, table_name
+import dlr_simutils_common.core.logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Weather inputs of the surrogate model, and their default training ranges
+INPUTS = (
+    'ambient_temperature',  # [deg C]
+    'wind_speed',  # [m/s]
+    'wind_direction',  # [deg], relative to the line; folded into [0, 90]
+    'solar_irradiance',  # [W/m^2]
+)
+DEFAULT_RANGES = {
+    'ambient_temperature': (-20.0, 45.0),
+    'wind_speed': (0.0, 10.0),
+    'wind_direction': (0.0, 90.0),
+    'solar_irradiance': (0.0, 1100.0),
+}
+
+# Model outputs: steady-state ampacity, and transient ampacity (current that reaches the critical temperature within
+# the given time horizon)
+TARGETS = (
+    'steady_ampacity',
+    'transient_ampacity',
+)
+
+# Query rows per block of RBF kernel evaluations; bounds the temporary (rows x centers x inputs) differences
+KERNEL_BLOCK_SIZE = 256
+
+
+def _features(inputs):
+    # Convective cooling scales roughly with the square root of wind speed; fitting in that space is more accurate.
+    features = np.array(inputs, dtype=float, copy=True)
+    features[:, 1] = np.sqrt(np.maximum(features[:, 1], 0))
+    features[:, 2] = fold_wind_direction(features[:, 2])
+    return features
+
+
+class PolynomialModel:
+    kind = 'polynomial'
+
+    def __init__(self, degree=3, regularization=1e-8):
+        self.degree = degree
+        self.regularization = regularization
+
+    def _design_matrix(self, x):
+        x = (x - self.mean) / self.scale
+        columns = [np.ones(len(x))]
+        for degree in range(1, self.degree + 1):
+            for terms in itertools.combinations_with_replacement(range(x.shape[1]), degree):
+                columns.append(np.prod(x[:, terms], axis=1))
+        return np.stack(columns, axis=1)
+
+    def fit(self, x, y):
+        self.mean = x.mean(axis=0)
+        self.scale = np.where(x.std(axis=0) > 0, x.std(axis=0), 1.0)
+
+        design = self._design_matrix(x)
+        gram = design.T @ design + self.regularization * len(x) * np.eye(design.shape[1])
+        self.coefficients = np.linalg.solve(gram, design.T @ y)
+        return self
+
+    def predict(self, x):
+        return self._design_matrix(x) @ self.coefficients
+
+    def get_state(self):
+        return {
+            'degree': np.array(self.degree),
+            'regularization': np.array(self.regularization),
+            'mean': self.mean,
+            'scale': self.scale,
+            'coefficients': self.coefficients,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        model = cls(int(state['degree']), float(state['regularization']))
+        model.mean = state['mean']
+        model.scale = state['scale']
+        model.coefficients = state['coefficients']
+        return model
+
+
+class RBFModel:
+    """Cubic radial basis function interpolant with linear polynomial tail."""
+
+    kind = 'rbf'
+
+    def __init__(self, regularization=1e-6):
+        self.regularization = regularization
+
+    def _scaled(self, x):
+        return (x - self.mean) / self.scale
+
+    def _kernel(self, x):
+        kernel = np.empty((len(x), len(self.centers)))
+        for start in range(0, len(x), KERNEL_BLOCK_SIZE):
+            block = x[start:start + KERNEL_BLOCK_SIZE]
+            distances = np.linalg.norm(block[:, np.newaxis, :] - self.centers[np.newaxis, :, :], axis=2)
+            kernel[start:start + KERNEL_BLOCK_SIZE] = distances ** 3
+        return kernel
+
+    def fit(self, x, y):
+        self.mean = x.mean(axis=0)
+        self.scale = np.where(x.std(axis=0) > 0, x.std(axis=0), 1.0)
+        self.centers = self._scaled(x)
+
+        n, d = self.centers.shape
+        polynomial = np.hstack((np.ones((n, 1)), self.centers))
+
+        system = np.zeros((n + d + 1, n + d + 1))
+        system[:n, :n] = self._kernel(self.centers) + self.regularization * np.eye(n)
+        system[:n, n:] = polynomial
+        system[n:, :n] = polynomial.T
+
+        rhs = np.zeros((n + d + 1,) + y.shape[1:])
+        rhs[:n] = y
+
+        solution = np.linalg.solve(system, rhs)
+        self.weights = solution[:n]
+        self.coefficients = solution[n:]
+        return self
+
+    def predict(self, x):
+        x = self._scaled(x)
+        polynomial = np.hstack((np.ones((len(x), 1)), x))
+        prediction = polynomial @ self.coefficients
+
+        # Block-wise, so that the kernel matrix of a large query batch is never built as a whole
+        for start in range(0, len(x), KERNEL_BLOCK_SIZE):
+            block = slice(start, start + KERNEL_BLOCK_SIZE)
+            prediction[block] += self._kernel(x[block]) @ self.weights
+        return prediction
+
+    def get_state(self):
+        return {
+            'regularization': np.array(self.regularization),
+            'mean': self.mean,
+            'scale': self.scale,
+            'centers': self.centers,
+            'weights': self.weights,
+            'coefficients': self.coefficients,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        model = cls(float(state['regularization']))
+        for key in ('mean', 'scale', 'centers', 'weights', 'coefficients'):
+            setattr(model, key, state[key])
+        return model
+
+
+MODEL_TYPES = {
+    PolynomialModel.kind: PolynomialModel,
+    RBFModel.kind: RBFModel,
+}
+
+
+class Surrogate:
+    """
+    Fast regression model of steady and transient ampacity of a single
+    conductor (at fixed line altitude and critical temperature) as a
+    function of weather inputs.
+    """
+
+    def __init__(self, model, metadata):
+        self.model = model
+        self.metadata = metadata
+
+    def predict(self, **weather):
+        """
+        Predict ampacity for a batch of weather conditions, given as keyword
+        arguments named after INPUTS (broadcast together). Returns a
+        dictionary mapping TARGETS to arrays, and an array of flags marking
+        inputs outside the training range.
+        """
+        arrays = np.broadcast_arrays(*(np.asarray(weather[key], dtype=float) for key in INPUTS))
+        shape = arrays[0].shape
+        inputs = np.stack([array.reshape(-1) for array in arrays], axis=1)
+
+        out_of_range = np.zeros(len(inputs), dtype=bool)
+        for column, key in enumerate(INPUTS):
+            if key == 'wind_direction':
+                continue  # folded, always in range
+            low, high = self.metadata['ranges'][key]
+            out_of_range |= (inputs[:, column] < low) | (inputs[:, column] > high)
+
+        predictions = self.model.predict(_features(inputs))
+        return (
+            {target: predictions[:, idx].reshape(shape) for idx, target in enumerate(self.metadata['targets'])},
+            out_of_range.reshape(shape),
+        )
+
+    def save(self, filename):
+        state = {f"model.{key}": value for key, value in self.model.get_state().items()}
+        np.savez(filename, kind=np.array(self.model.kind), metadata=np.array(json.dumps(self.metadata)), **state)
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as data:
+            state = {name[len("model."):]: data[name] for name in data.files if name.startswith("model.")}
+            model = MODEL_TYPES[str(data['kind'])].from_state(state)
+            metadata = json.loads(str(data['metadata']))
+        return cls(model, metadata)
+
+
+def surrogate_path(conductor_types_dir, conductor_name):
+    # Stored next to the conductor definitions (and not picked up by load_conductor_definitions(), which reads JSON)
+    return pathlib.Path(conductor_types_dir) / f"{table_name(conductor_name)}.surrogate.npz"
+
+
+def _holdout_errors(predicted, actual):
+    errors = {}
+    for idx, target in enumerate(TARGETS):
+        residuals = predicted[:, idx] - actual[:, idx]
+        variance = np.var(actual[:, idx])
+        errors[target] = {
+            'rmse': float(np.sqrt(np.mean(residuals ** 2))),
+            'mae': float(np.mean(np.abs(residuals))),
+            'max_abs_error': float(np.max(np.abs(residuals))),
+            'r2': float(1 - np.mean(residuals ** 2) / variance) if variance > 0 else float('nan'),
+        }
+    return errors
+
+
+def train_surrogate(
+    line_data,
+    num_samples=2000,
+    kind='polynomial',
+    ranges=None,
+    transient_duration=900,
+    holdout_fraction=0.2,
+    points_per_request=200,
+    num_workers=None,
+    seed=None,
+    model_options=None,
+):
+    """
+    Train surrogate model from solver runs over a Latin hypercube sample of
+    weather inputs. Part of the samples is held out to report the model
+    error. Returns the Surrogate instance.
+    """
+    rng = np.random.default_rng(seed)
+    ranges = {**DEFAULT_RANGES, **(ranges or {})}
+
+    # Latin hypercube sample
+    inputs = np.empty((num_samples, len(INPUTS)))
+    for column, key in enumerate(INPUTS):
+        low, high = ranges[key]
+        strata = (rng.permutation(num_samples) + rng.random(num_samples)) / num_samples
+        inputs[:, column] = low + strata * (high - low)
+
+    # Steady and transient ampacity differ only in the time horizon of the inner simulations
+    horizons = {
+        'steady_ampacity': static_rating.STEADY_STATE_HORIZON,
+        'transient_ampacity': transient_duration,
+    }
+
+    samples = []
+    chunks = []
+    for target, horizon in horizons.items():
+        for start in range(0, num_samples, points_per_request):
+            points = slice(start, start + points_per_request)
+            weather = {key: inputs[points, column] for column, key in enumerate(INPUTS)}
+            samples.append(batch.weather_points_sample(
+                line_data,
+                weather,
+                request_options={'inner_simulation_duration': horizon},
+            ))
+            chunks.append((target, points))
+
+    results = batch.run_batch(samples, num_workers)
+
+    outputs = np.full((num_samples, len(TARGETS)), np.nan)
+    for (target, points), result in zip(chunks, results):
+        if result is not None and result.succeeded:
+            outputs[points, TARGETS.index(target)] = result.ampacity
+
+    valid = np.all(np.isfinite(outputs), axis=1)
+    if np.count_nonzero(valid) < len(INPUTS) + 2:
+        raise RuntimeError("Too few successful simulations to train the surrogate model!")
+    inputs, outputs = inputs[valid], outputs[valid]
+
+    # Train/holdout split
+    order = rng.permutation(len(inputs))
+    num_holdout = int(round(holdout_fraction * len(inputs)))
+    holdout, train = order[:num_holdout], order[num_holdout:]
+
+    model = MODEL_TYPES[kind](**(model_options or {}))
+    model.fit(_features(inputs[train]), outputs[train])
+
+    errors = None
+    if num_holdout:
+        errors = _holdout_errors(model.predict(_features(inputs[holdout])), outputs[holdout])
+        for target, error in errors.items():
+            logger.info(
+                "Surrogate %s holdout error: RMSE %.1f A, max. %.1f A, R^2 %.4f",
+                target, error['rmse'], error['max_abs_error'], error['r2'],
+            )
+
+    metadata = {
+        'conductor': line_data['name'],
+        'line_altitude': line_data['line_altitude'],
+        'critical_temperature': line_data['critical_temperature'],
+        'steady_state_horizon': static_rating.STEADY_STATE_HORIZON,
+        'transient_duration': transient_duration,
+        'inputs': list(INPUTS),
+        'targets': list(TARGETS),
+        'ranges': {key: list(value) for key, value in ranges.items()},
+        'num_train_samples': len(train),
+        'holdout_errors': errors,
+    }
+    return Surrogate(model, metadata)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train ampacity surrogate model for a conductor from solver runs.")
+    dlr_simutils_common.core.logging.parser_add_logging_arguments(parser)
+    parser.add_argument('conductor', type=pathlib.Path, help="Conductor definition (JSON) file.")
+    parser.add_argument('--kind', choices=sorted(MODEL_TYPES), default='polynomial', help="Model type.")
+    parser.add_argument('--num-samples', type=int, default=2000, help="Number of training weather points.")
+    parser.add_argument('--altitude', type=float, default=300, help="Line altitude [m].")
+    parser.add_argument('--critical-temperature', type=float, default=None,
+                        help="Critical temperature [deg C] (defaults to the value from the conductor definition).")
+    parser.add_argument('--transient-duration', type=float, default=900, help="Horizon of transient ampacity [s].")
+    parser.add_argument('--workers', type=int, default=None, help="Number of parallel simulations.")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed.")
+    args = parser.parse_args()
+
+    dlr_simutils_common.core.logging.setup_logging(args, default_level='INFO')
+
+    with open(args.conductor, 'r') as fp:
+        line_data = json.load(fp)
+    line_data['line_altitude'] = args.altitude
+    line_data['line_orientation'] = 0.0  # wind direction inputs are relative to the line
+    if args.critical_temperature is not None:
+        line_data['critical_temperature'] = args.critical_temperature
+
+    surrogate = train_surrogate(
+        line_data,
+        num_samples=args.num_samples,
+        kind=args.kind,
+        transient_duration=args.transient_duration,
+        num_workers=args.workers,
+        seed=args.seed,
+    )
+
+    filename = surrogate_path(args.conductor.parent, line_data['name'])
+    surrogate.save(filename)
+    logger.info("Surrogate model written to %s", filename)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,256 @@
+import logging
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+from .simulation import batch
+
+
+logger = logging.getLogger(__name__)
+
+
+# Plausible ranges of the data series inputs, in request units; values outside are treated as gaps
+DEFAULT_RANGES = {
+    'ambient_temperature': (-60.0, 60.0),  # [deg C]
+    'wind_speed': (0.0, 75.0),  # [m/s]
+    'wind_direction': (0.0, 360.0),  # [deg]
+    'air_pressure': (500.0, 1100.0),  # [mbar]
+    'rain_rate': (0.0, 500.0),  # [mm/h]
+    'relative_humidity': (0.0, 100.0),  # [%]
+    'solar_irradiance': (0.0, 1500.0),  # [W/m^2]
+    'line_load': (0.0, 10000.0),  # [A]
+}
+
+# Conversions of source units to request units: value * scale + offset
+UNIT_CONVERSIONS = {
+    'K': (1.0, -273.15),
+    'degF': (5.0 / 9.0, -160.0 / 9.0),
+    'km/h': (1 / 3.6, 0.0),
+    'knots': (0.514444, 0.0),
+    'Pa': (0.01, 0.0),
+    'hPa': (1.0, 0.0),
+    'kPa': (10.0, 0.0),
+    'fraction': (100.0, 0.0),
+    'kA': (1000.0, 0.0),
+}
+
+
+def _read_chunks(filename, chunk_size):
+    # Iterate over the file as DataFrames of at most `chunk_size` rows
+    suffix = filename.suffix.lower()
+    if suffix == '.csv':
+        yield from pd.read_csv(filename, chunksize=chunk_size)
+    elif suffix == '.parquet':
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Reading Parquet files requires the pyarrow package!")
+        for record_batch in pyarrow.parquet.ParquetFile(filename).iter_batches(batch_size=chunk_size):
+            yield record_batch.to_pandas()
+    elif suffix in ('.xlsx', '.xls'):
+        # Excel files cannot be read in chunks
+        yield pd.read_excel(filename)
+    else:
+        raise ValueError(f"Unsupported time series file type: {suffix!r}!")
+
+
+def column_names(filename):
+    # Column names of a time series file (only the first chunk is read)
+    return list(next(_read_chunks(pathlib.Path(filename), 1)).columns)
+
+
+def _time_in_seconds(values):
+    # Numeric time columns are taken as seconds; anything else is parsed as date/time (seconds since the epoch)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    timestamps = pd.to_datetime(values, utc=True)
+    return (timestamps - pd.Timestamp(0, tz='UTC')).dt.total_seconds().to_numpy(dtype=float)
+
+
+def convert_units(key, values, unit):
+    if unit is None:
+        return values
+    if unit not in UNIT_CONVERSIONS:
+        raise ValueError(f"Unsupported unit of {key}: {unit!r}!")
+    scale, offset = UNIT_CONVERSIONS[unit]
+    return values * scale + offset
+
+
+class _BinAccumulator:
+    """
+    Accumulates values into bins of the target timeline across chunks
+    (sums and counts per bin), so that memory use is bounded by the
+    length of the output rather than of the raw data.
+    """
+
+    def __init__(self, time_step):
+        self.time_step = time_step
+        self.origin = None
+        self.parts = []  # list of (bin indices, {key: (sums, counts)})
+
+    def add(self, time, columns):
+        if self.origin is None:
+            self.origin = np.floor(np.nanmin(time) / self.time_step) * self.time_step
+        bins = np.round((time - self.origin) / self.time_step).astype(np.int64)
+        unique, inverse = np.unique(bins, return_inverse=True)
+
+        sums = {}
+        for key, values in columns.items():
+            valid = np.isfinite(values)
+            sums[key] = (
+                np.bincount(inverse[valid], weights=values[valid], minlength=len(unique)),
+                np.bincount(inverse[valid], minlength=len(unique)),
+            )
+        self.parts.append((unique, sums))
+
+    def means(self, keys):
+        # Timeline and per-bin means (NaN for empty bins)
+        first = min(part[0][0] for part in self.parts)
+        last = max(part[0][-1] for part in self.parts)
+        size = last - first + 1
+
+        means = {}
+        for key in keys:
+            sums = np.zeros(size)
+            counts = np.zeros(size)
+            for unique, partSums in self.parts:
+                np.add.at(sums, unique - first, partSums[key][0])
+                np.add.at(counts, unique - first, partSums[key][1])
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means[key] = np.where(counts > 0, sums / counts, np.nan)
+
+        time = self.origin + (first + np.arange(size)) * self.time_step
+        return time, means
+
+
+def fill_gaps(time, values, max_gap):
+    """
+    Linearly interpolate missing values (NaN) across gaps of at most
+    `max_gap` seconds; at the ends of the series, the first/last valid
+    value is held for up to `max_gap` seconds. Longer gaps are left
+    missing.
+    """
+    valid = np.isfinite(values)
+    if valid.all() or not valid.any():
+        return values
+
+    validTime = time[valid]
+    filled = np.interp(time, validTime, values[valid])
+
+    # Gap length: distance between the enclosing valid points, or to the nearest one at the ends
+    following = np.clip(np.searchsorted(validTime, time), 0, len(validTime) - 1)
+    preceding = np.clip(following - 1, 0, len(validTime) - 1)
+    gap = validTime[following] - validTime[preceding]
+    gap = np.where(time < validTime[0], validTime[0] - time, gap)
+    gap = np.where(time > validTime[-1], time - validTime[-1], gap)
+    return np.where(valid | (gap <= max_gap), filled, np.nan)
+
+
+def load_time_series(
+    filename,
+    columns,
+    time_column='time',
+    units=None,
+    time_step=30,
+    max_gap=600,
+    ranges=None,
+    defaults=None,
+    chunk_size=100000,
+    extra_keys=(),
+):
+    """
+    Load a weather/load time series (CSV, Parquet or Excel) as a data
+    series for simulation requests (see batch.DATA_SERIES_KEYS).
+
+    `columns` maps source column names to data series keys; `units`
+    optionally maps data series keys to source units (see
+    UNIT_CONVERSIONS). The file is processed in chunks: values are
+    converted, values outside `ranges` (see DEFAULT_RANGES) are dropped,
+    and the rest is averaged into bins of `time_step` seconds (wind
+    direction as a vector average, weighted by wind speed if available).
+    Empty bins are then interpolated across gaps of at most `max_gap`
+    seconds. Keys without source column are filled with `defaults`
+    (scalar values; e.g., batch.STANDARD_WEATHER).
+
+    `extra_keys` are accepted in addition to the data series keys (e.g.,
+    measured outputs); they are binned and gap-filled alike, but may
+    remain incomplete.
+
+    Raises ValueError if gaps remain or required keys are missing.
+    """
+    filename = pathlib.Path(filename)
+    units = units or {}
+    ranges = {**DEFAULT_RANGES, **(ranges or {})}
+    keys = list(columns.values())
+
+    for key in extra_keys:
+        ranges.setdefault(key, (-np.inf, np.inf))
+
+    unknown = set(keys) - set(batch.DATA_SERIES_KEYS[1:]) - set(extra_keys)
+    if unknown:
+        raise ValueError(f"Invalid data series key(s): {', '.join(sorted(unknown))}!")
+
+    accumulator = _BinAccumulator(time_step)
+    numRows = 0
+    numRejected = dict.fromkeys(keys, 0)
+    for chunk in _read_chunks(filename, chunk_size):
+        missing = set(columns) - set(chunk.columns) | ({time_column} - set(chunk.columns))
+        if missing:
+            raise ValueError(f"Missing column(s) in '{filename}': {', '.join(sorted(missing))}!")
+
+        time = _time_in_seconds(chunk[time_column])
+        values = {}
+        for column, key in columns.items():
+            data = pd.to_numeric(chunk[column], errors='coerce').to_numpy(dtype=float)
+            data = convert_units(key, data, units.get(key))
+            low, high = ranges[key]
+            outside = (data < low) | (data > high)
+            numRejected[key] += int(np.count_nonzero(outside))
+            values[key] = np.where(outside, np.nan, data)
+
+        # Wind direction is averaged as a vector
+        if 'wind_direction' in values:
+            direction = np.radians(values.pop('wind_direction'))
+            weight = values.get('wind_speed', np.ones_like(direction))
+            values['wind_u'] = weight * np.sin(direction)
+            values['wind_v'] = weight * np.cos(direction)
+
+        valid = np.isfinite(time)
+        accumulator.add(time[valid], {key: data[valid] for key, data in values.items()})
+        numRows += len(chunk)
+
+    if accumulator.origin is None:
+        raise ValueError(f"No data in '{filename}'!")
+
+    for key, count in numRejected.items():
+        if count:
+            logger.warning(
+                "%s: %d out of %d values outside of range %r were dropped.", key, count, numRows, ranges[key]
+            )
+
+    averagedKeys = [key for key in keys if key != 'wind_direction']
+    if 'wind_direction' in keys:
+        averagedKeys += ['wind_u', 'wind_v']
+    time, means = accumulator.means(averagedKeys)
+
+    data_series = {'time': time}
+    for key in averagedKeys:
+        data_series[key] = fill_gaps(time, means[key], max_gap)
+    if 'wind_direction' in keys:
+        data_series['wind_direction'] = np.degrees(
+            np.arctan2(data_series.pop('wind_u'), data_series.pop('wind_v'))
+        ) % 360
+
+    for key in batch.DATA_SERIES_KEYS[1:]:
+        if key in data_series:
+            numMissing = int(np.count_nonzero(np.isnan(data_series[key])))
+            if numMissing:
+                raise ValueError(f"{key}: {numMissing} values remain missing after filling gaps of up to {max_gap} s!")
+        elif defaults is not None and key in defaults:
+            data_series[key] = np.full(time.shape, float(defaults[key]))
+        else:
+            raise ValueError(f"No data for {key}!")
+
+    logger.info("Loaded %d rows from '%s' into %d time steps of %g s.", numRows, filename, len(time), time_step)
+    return data_series
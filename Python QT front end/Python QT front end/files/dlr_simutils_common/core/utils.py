@@ -46,3 +46,11 @@ def cdf_from_histogram(hist, bins):
 
     # Return the CDF
     return cdf
+
+
+def barometric_pressure(altitude):
+    """
+    Air pressure [mbar] of the standard atmosphere at the given altitude
+    [m] (scalar or array).
+    """
+    return 1013.25 * (1 - 2.25577e-5 * np.asarray(altitude, dtype=float)) ** 5.25588
@@ -4,11 +4,18 @@ import re
 import pathlib
 import json
 import os
+import logging
 from datetime import datetime
 
 from qtpy.QtWidgets import  QFileDialog
 from qtpy.QtCore import Signal
 
+from ..core import static_rating
+from ..core.simulation import batch
+
+
+logger = logging.getLogger(__name__)
+
 
 class _AutoFieldsWidgetMixin:
     def __init__(self, *args, **kwargs):
@@ -354,6 +361,14 @@ class ConductorInfoWidget(_AutoFieldsWidgetMixin,QtWidgets.QWidget):
         self.conductor_type = "default_type"
         self.standards_name ="standard"
 
+        # Critical temperature and static thermal limit of the current conductor; the limit is recomputed in the
+        # background whenever the conductor is saved (see core.static_rating). The limit is only valid for the
+        # parameters it was computed for.
+        self.critical_temperature = default_values_common["critical_temperature"]
+        self.static_thermal_limit = None
+        self.static_thermal_limit_parameters = None
+        self._staticRatingProcessors = []
+
     def load_from_json(self):
 
         while True:
@@ -395,28 +410,35 @@ class ConductorInfoWidget(_AutoFieldsWidgetMixin,QtWidgets.QWidget):
         return spin_box_values
 
 
-    def dump_to_json(self):
+    def collect_parameters(self):
         # Collect the values of all QSpinBox and QDoubleSpinBox widgets in the ConductorInfoWidget
-
         spin_box_inner = self.collect_spinbox_values(self.widgetInner)
         spin_box_common = self.collect_spinbox_values(self.widgetCommon)
         spin_box_outer = self.collect_spinbox_values(self.widgetOuter)
+        return {**spin_box_inner, **spin_box_outer, **spin_box_common,
+                "critical_temperature": self.critical_temperature}
+
+    def dump_to_json(self):
+        parameters = self.collect_parameters()
         self.conductor_type = self.lineEditConductorType.text()
         self.standards_name = self.lineEditStandardsName.text()
 
-        #dummy values
-        temperature = 80
-        ampacity = 500
-
         # Create a dictionary for the conductor type and standard's name
         type_and_standard = {
             "name": self.conductor_type,
             "standard": self.standards_name,
         }
         # Combine all the collected values into one dictionary, ensuring type and standard are at the top
-        self.data = {**type_and_standard, **spin_box_inner, **spin_box_outer, **spin_box_common,
-            "critical_temperature": temperature,
-            "static_thermal_limit": ampacity}
+        # Until the background computation finishes, the static thermal limit is the known value if the parameters
+        # are unchanged, and a heat balance estimate otherwise, so that the saved file always holds a usable limit
+        static_thermal_limit = self.static_thermal_limit
+        if static_thermal_limit is None or parameters != self.static_thermal_limit_parameters:
+            static_thermal_limit = None
+            try:
+                static_thermal_limit = round(static_rating.estimated_static_thermal_limit(parameters), 1)
+            except Exception:
+                logger.warning("Failed to estimate the static thermal limit!", exc_info=True)
+        self.data = {**type_and_standard, **parameters, "static_thermal_limit": static_thermal_limit}
 
         # Delete all key-value pairs where the keys are empty
         #self.data = {k: v for k, v in self.data.items() if k}
@@ -440,6 +462,49 @@ class ConductorInfoWidget(_AutoFieldsWidgetMixin,QtWidgets.QWidget):
             json.dump(self.data, json_file, indent=4)
         print(f"JSON file created at {json_file_path}")
 
+        self.startStaticRating(json_file_path, dict(self.data))
+
+    def startStaticRating(self, json_file_path, data):
+        # Compute the static thermal limit on a worker thread; the JSON file is updated when it finishes
+        processor = batch.BatchSimulationProcessor(parent=self)
+        processor.processingFinished.connect(
+            lambda: self.onStaticRatingFinished(processor, json_file_path, data)
+        )
+        self._staticRatingProcessors.append(processor)
+
+        self.labelConductorType.setText("Computing static thermal limit...")
+        processor.processData([static_rating.static_rating_sample(data)], 1)
+
+    def onStaticRatingFinished(self, processor, json_file_path, data):
+        self._staticRatingProcessors.remove(processor)
+        processor.deleteLater()
+        if not self._staticRatingProcessors:
+            self.labelConductorType.setText("Press enter to save the JSON file:")
+
+        limit = static_rating.static_thermal_limit(processor.sampleResults[0])
+        if limit is None:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Error",
+                f"Failed to compute the static thermal limit of {data['name']}!\n"
+                f"The conductor was saved with the previous or estimated value "
+                f"({data['static_thermal_limit']} A).",
+            )
+            return
+
+        data["static_thermal_limit"] = round(limit, 1)
+        with open(json_file_path, 'w') as json_file:
+            json.dump(data, json_file, indent=4)
+        logger.info("Static thermal limit of %s: %.1f A (written to %s)", data['name'], limit, json_file_path)
+
+        # Only update the displayed values if the saved conductor is still the current one
+        if data["name"] == self.lineEditConductorType.text():
+            self.static_thermal_limit = data["static_thermal_limit"]
+            self.static_thermal_limit_parameters = {
+                key: value for key, value in data.items() if key not in ("name", "standard", "static_thermal_limit")
+            }
+            self.dataUpdated_temperature_thermal_limit.emit(int(self.critical_temperature), int(limit))
+
     def updateConductorData(self, name, data):
         # Update the QLineEdit widgets with the conductor type and standards name
         self.lineEditConductorType.setText(name)
@@ -451,9 +516,13 @@ class ConductorInfoWidget(_AutoFieldsWidgetMixin,QtWidgets.QWidget):
         self.widgetCommon.updateData(data)
 
 
+        self.critical_temperature = data.get("critical_temperature", self.critical_temperature)
+        self.static_thermal_limit = data.get("static_thermal_limit")
+        self.static_thermal_limit_parameters = self.collect_parameters()
+
         # Emit signal to update the conductor data
         critical_temperature = int(data.get("critical_temperature", 0))  # Default to 0 if not found
-        static_thermal_limit = int(data.get("static_thermal_limit", 0))  # Default to 0 if not found
+        static_thermal_limit = int(data.get("static_thermal_limit") or 0)  # Default to 0 if not found
         self.dataUpdated_temperature_thermal_limit.emit(critical_temperature, static_thermal_limit)
 
 